@@ -1,5 +1,10 @@
 from collections.abc import Callable
 
+import functools
+import hashlib
+import inspect
+import os
+from collections import OrderedDict
 import gdsfactory as gf
 import numpy as np
 from gdsfactory.component import Component,ComponentAllAngle
@@ -9,10 +14,8 @@ from gdsfactory.path import Path, _fresnel
 from gdsfactory.pdk import get_active_pdk
 from gdsfactory.technology.layer_map import LayerMap
 from gdsfactory.typings import Layer, LayerSpec, LayerSpecs, CrossSectionSpec
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, is_dataclass
 from typing import Union, Sequence
-PDK = get_generic_pdk()
-PDK.activate()
 
 
 # layer define
@@ -72,7 +75,288 @@ class HeaterConfigClass:
     LayerRoute: tuple[int,int] = LAYER.M2
     LayerVia: tuple[int,int] = LAYER.VIA
     LayerELE: tuple[int,int] = LAYER.M1
+
+    def __post_init__(self):
+        # 列表 / numpy 数组统一转换为元组，使取值相同的配置相等且可哈希
+        for name in ("WidthHeat", "DeltaHeat"):
+            value = getattr(self, name)
+            if not isinstance(value, (str, tuple)) and hasattr(value, "__iter__"):
+                object.__setattr__(self, name, tuple(float(v) for v in value))
 heaterconfig0 = HeaterConfigClass()
+# %% canonical cell cache
+_CELL_CACHE = OrderedDict()
+_CELL_CACHE_STATS = {}
+_CELL_CACHE_CONFIG = {"maxsize": 4096}
+# 按名称识别的长度参数 / 字段 (单位: µm)，只有它们按 DBU 取整；角度、比例等其余数值保持原值
+_LENGTH_NAMES = ("width", "length", "radius", "gap", "delta", "spacing", "enclosure", "tilesize", "pitch", "period")
+
+
+def _is_length(name: str) -> bool:
+    return name.lower().startswith(_LENGTH_NAMES)
+
+
+def canonical_key(value, dbu: float | None = None):
+    """
+    把单元参数规范化为稳定、可快速哈希的键。
+
+    - 给出 `dbu` 时数值 (int/float/numpy 标量) 按 DBU 取整为整数，用于长度参数；
+      `dbu` 为 None 时浮点数保持原值，整数保持整数。bool、str、None 保持不变。
+    - 列表、元组及 numpy 数组转换为元组；较大的数组按同样规则处理后用 SHA-1 摘要代替。
+    - `Path` 的点列是坐标，总是按 DBU 取整后摘要，端点角度保持原值。
+    - dataclass (如 `HeaterConfigClass`)、dict 按字段/键逐项规范化，名称为长度参数的项按 DBU 取整；
+      `Component` 用单元名表示；函数等可调用对象按对象本身 (即身份) 区分。
+
+    参数:
+        value: 待规范化的参数值。
+        dbu (float | None): 数据库单位 (单位: µm)。默认为 None，数值不取整。
+
+    返回:
+        可哈希的键。
+    """
+    if value is None or isinstance(value, (bool, np.bool_, str)):
+        return value
+    if isinstance(value, (int, np.integer)) and dbu is None:
+        return int(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value) if dbu is None else int(round(float(value) / dbu))
+    if isinstance(value, Path):
+        points = np.round(np.asarray(value.points, dtype=float) / gf.kcl.dbu).astype(np.int64)
+        return ("Path", hashlib.sha1(points.tobytes()).hexdigest(),
+                canonical_key(value.start_angle), canonical_key(value.end_angle))
+    if isinstance(value, Component):
+        return ("Component", value.name)
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in "biuf" and value.size > 16:
+            arr = value.astype(float) if dbu is None else np.round(value.astype(float) / dbu).astype(np.int64)
+            return ("ndarray", value.shape, hashlib.sha1(arr.tobytes()).hexdigest())
+        return tuple(canonical_key(v, dbu) for v in value.tolist())
+    if isinstance(value, (list, tuple)):
+        return tuple(canonical_key(v, dbu) for v in value)
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted((str(k), _canonical_arg(str(k), v)) for k, v in value.items()))
+    if is_dataclass(value) and not isinstance(value, type):
+        if value.__dataclass_params__.frozen:
+            try:
+                return _canonical_frozen(value, gf.kcl.dbu)
+            except TypeError:
+                pass
+        return _canonical_dataclass(value, gf.kcl.dbu)
+    if callable(value):
+        # 不同的 lambda / 闭包可能同名，只能按身份区分；键中保留对象本身，避免 id 被复用
+        try:
+            hash(value)
+        except TypeError:
+            return ("callable", id(value), repr(value))
+        return ("callable", value)
+    try:
+        hash(value)
+    except TypeError:
+        return ("repr", repr(value))
+    return value
+
+
+def _canonical_arg(name: str, value, dbu: float | None = None):
+    """按参数名规范化：长度参数按 DBU 取整，其余保持原值。"""
+    return canonical_key(value, (dbu or gf.kcl.dbu) if _is_length(name) else None)
+
+
+def _canonical_dataclass(value, dbu: float):
+    return (type(value).__name__,) + tuple((f.name, _canonical_arg(f.name, getattr(value, f.name), dbu))
+                                           for f in fields(value))
+
+
+# 冻结且可哈希的配置对象 (如 HeaterConfigClass) 会被反复传入，规范化结果直接复用
+_canonical_frozen = functools.lru_cache(maxsize=1024)(_canonical_dataclass)
+
+
+def canonical_cell(func: Callable) -> Callable:
+    """
+    为单元函数加一层规范化缓存，用法为写在 `@geometry_cell` (或 `@gf.cell`) 之上。
+
+    调用参数 (含默认值) 先经 `canonical_key` 规范化 (长度参数按 DBU 取整，见 `_LENGTH_NAMES`)，
+    连同当前的 `geometry_mode` 组成键，键相同即直接返回已生成的单元，不再经过 gdsfactory 的参数序列化和命名；未命中时照常调用原函数。
+    缓存按最近使用顺序保留至多 `configure_cell_cache` 设定的个数，已被删除的单元在查到时丢弃。
+    每个函数的命中/未命中次数可由 `cell_cache_info` 查看。
+    """
+    signature = inspect.signature(func)
+    name = func.__qualname__
+    stats = _CELL_CACHE_STATS.setdefault(name, {"hits": 0, "misses": 0, "evictions": 0})
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            dbu = gf.kcl.dbu
+            key = (name, tuple((arg, _canonical_arg(arg, value, dbu)) for arg, value in bound.arguments.items()),
+                   geometry_mode())
+            hash(key)
+        except Exception:
+            # 无法规范化的参数交给 gdsfactory 自己处理
+            stats["misses"] += 1
+            return func(*args, **kwargs)
+        component = _CELL_CACHE.get(key)
+        if component is not None:
+            if not component.destroyed():
+                _CELL_CACHE.move_to_end(key)
+                stats["hits"] += 1
+                return component
+            del _CELL_CACHE[key]
+        stats["misses"] += 1
+        component = func(*args, **kwargs)
+        if _CELL_CACHE_CONFIG["maxsize"] > 0:
+            _CELL_CACHE[key] = component
+            _cell_cache_trim()
+        return component
+
+    return wrapper
+
+
+def _cell_cache_prune() -> None:
+    """丢弃缓存中已被删除的单元。"""
+    for key in [key for key, component in _CELL_CACHE.items() if component.destroyed()]:
+        del _CELL_CACHE[key]
+
+
+def _cell_cache_trim() -> None:
+    """按最近使用顺序淘汰超出上限的条目；已被删除的单元直接丢弃，不计入淘汰次数。"""
+    while len(_CELL_CACHE) > _CELL_CACHE_CONFIG["maxsize"]:
+        (func_name, *_), component = _CELL_CACHE.popitem(last=False)
+        if not component.destroyed():
+            _CELL_CACHE_STATS[func_name]["evictions"] += 1
+
+
+def configure_cell_cache(maxsize: int = 4096) -> None:
+    """
+    设置 `canonical_cell` 缓存的容量 (默认 4096 个单元)，为 0 时关闭缓存。
+
+    缓存持有单元的强引用，容量限制了因此无法释放的单元个数；超出时淘汰最久未使用的条目。
+    """
+    _CELL_CACHE_CONFIG["maxsize"] = max(int(maxsize), 0)
+    _cell_cache_prune()
+    _cell_cache_trim()
+
+
+def cell_cache_info(name: str | None = None) -> dict:
+    """
+    返回 `canonical_cell` 缓存的统计信息。
+
+    参数:
+        name (str | None): 函数名。默认为 None，返回所有函数的 {函数名: {"hits", "misses", "evictions", "size"}}。
+    """
+    _cell_cache_prune()
+    sizes = {}
+    for func_name, *_ in _CELL_CACHE:
+        sizes[func_name] = sizes.get(func_name, 0) + 1
+    info = {func_name: dict(stat, size=sizes.get(func_name, 0)) for func_name, stat in _CELL_CACHE_STATS.items()}
+    return info if name is None else info[name]
+
+
+def clear_cell_cache() -> None:
+    """清空 `canonical_cell` 缓存及命中统计。"""
+    _CELL_CACHE.clear()
+    for stat in _CELL_CACHE_STATS.values():
+        stat.update(hits=0, misses=0, evictions=0)
+
+
+# %% snap-at-source: 生成时即取整到整数 DBU
+_SNAP_AT_SOURCE = {"enabled": False}
+
+
+def configure_snap_at_source(enabled: bool = True) -> None:
+    """
+    打开或关闭 snap-at-source 模式 (默认关闭)。
+
+    打开后，本包的构建函数在生成几何时就把坐标取整到整数 DBU：DBR 系列的矩形直接以整数
+    `kdb.Box` 合并写入，`OffsetRamp` 的顶点与端口宽度按 DBU 取整，加热器横档与过孔位置落在
+    DBU 网格上。此时 `DBRFromCsvOffset`、`SGDBRFromCsvOffset` 不再调用
+    `snap_all_polygons_iteratively` 做事后捕捉。
+
+    模式打开时经 `geometry_cell` 计入单元名和缓存键，切换前后生成的同参数单元互不混用。
+    """
+    _SNAP_AT_SOURCE["enabled"] = bool(enabled)
+
+
+def snap_at_source() -> bool:
+    """返回 snap-at-source 模式是否打开，见 `configure_snap_at_source`。"""
+    return _SNAP_AT_SOURCE["enabled"]
+
+
+# %% 几何模式: 改变几何的进程级设置作为单元参数
+def geometry_mode() -> str | None:
+    """
+    返回当前非默认的几何模式 (snap-at-source、弦高误差采样) 组成的字符串；全部为默认设置时返回 None。
+    """
+    modes = []
+    if _SNAP_AT_SOURCE["enabled"]:
+        modes.append("snap")
+    if _SAGITTA_SAMPLING["tolerance"] is not None:
+        modes.append(f"sagitta{_SAGITTA_SAMPLING['tolerance']:g}")
+    return "_".join(modes) or None
+
+
+def geometry_cell(func: Callable) -> Callable:
+    """
+    代替 `@gf.cell` 的单元装饰器，把当前几何模式 (见 `geometry_mode`) 计入单元名和缓存键。
+
+    gdsfactory 按参数缓存单元，并按单元名复用版图中已有的单元；几何随进程级设置变化的单元若只用
+    `@gf.cell`，切换设置后仍会取回旧模式下生成的同名单元。本装饰器在模式不是默认设置时额外传入关键字
+    参数 `GeometryMode` (单元名带 `_G<模式>` 后缀，并记录在 `settings` 中)；默认设置下单元名与
+    `@gf.cell` 完全相同。外层单元的几何随所含子单元变化，因此本包的单元一律使用它。
+    """
+    signature = inspect.signature(func)
+    parameters = list(signature.parameters.values())
+    # 无默认值的参数未传入时不进入 gdsfactory 的参数表，默认设置下的单元名因此不变
+    mode = inspect.Parameter("GeometryMode", inspect.Parameter.KEYWORD_ONLY)
+    if parameters and parameters[-1].kind is inspect.Parameter.VAR_KEYWORD:
+        parameters.insert(len(parameters) - 1, mode)
+    else:
+        parameters.append(mode)
+
+    @functools.wraps(func)
+    def build(*args, GeometryMode: str | None = None, **kwargs):
+        return func(*args, **kwargs)
+
+    build.__signature__ = signature.replace(parameters=parameters)
+    cell = gf.cell(build)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        mode = geometry_mode()
+        if mode is not None:
+            kwargs["GeometryMode"] = mode
+        return cell(*args, **kwargs)
+
+    wrapper.is_gf_cell = True  # 供 gdsfactory 的 get_cells 识别
+    return wrapper
+
+
+def to_dbu(values, dbu: float | None = None) -> np.ndarray:
+    """把以 µm 为单位的数值 (标量或数组) 取整为整数 DBU (np.int64)。`dbu` 默认取 `gf.kcl.dbu`。"""
+    if dbu is None:
+        dbu = gf.kcl.dbu
+    return np.round(np.asarray(values, dtype=float) / dbu).astype(np.int64)
+
+
+def add_boxes_dbu(
+        component: Component,
+        x0: np.ndarray,
+        x1: np.ndarray,
+        y0: np.ndarray,
+        y1: np.ndarray,
+        layer: LayerSpec,
+) -> None:
+    """
+    把一组轴对齐矩形 (整数 DBU 坐标，各参数为等长数组) 合并后一次性写入 `component` 的 `layer` 层。
+
+    几何从生成起就在网格上，不经过浮点多边形，也不需要事后捕捉。
+    """
+    region = gf.kdb.Region()
+    for box in zip(np.asarray(x0).tolist(), np.asarray(y0).tolist(),
+                   np.asarray(x1).tolist(), np.asarray(y1).tolist()):
+        region.insert(gf.kdb.Box(*box))
+    region.merge()
+    component.kdb_cell.shapes(gf.get_layer(layer)).insert(region)
 # %% section & crosssection
 S_in_te0 = gf.Section(width=0.5, layer=LAYER.WG, port_names=("o1", "o2"))
 S_in_te1 = gf.Section(width=1, layer=LAYER.WG, port_names=("o1", "o2"))
@@ -82,24 +366,85 @@ X_in0 = gf.CrossSection(sections=[S_in_te0])
 X_in1 = gf.CrossSection(sections=[S_in_te1])
 X_out0 = gf.CrossSection(sections=[S_out_te0])
 X_out1 = gf.CrossSection(sections=[S_out_te1])
+# %% 延迟构建的参考组件
+class LazyComponent:
+    """
+    首次使用时才构建、之后复用的参考组件，用作 `tin`、`tout` 这类组件参数的默认值。
+
+    调用实例返回构建好的 Component；缓存的组件被 `gf.clear_cache()` 销毁后会重新构建。
+    `name` 与构建出的组件同名，因此以它作默认值的 `@gf.cell` 单元名称与直接传入组件时一致。
+    """
+
+    def __init__(self, builder: Callable[[], Component]):
+        self._builder = builder
+        self._component = None
+        functools.update_wrapper(self, builder)
+
+    def __call__(self) -> Component:
+        if self._component is None or self._component.destroyed():
+            self._component = self._builder()
+        return self._component
+
+    @property
+    def name(self) -> str:
+        return self().name
+
+    def built(self) -> bool:
+        """返回组件是否已经构建 (且未被销毁)。"""
+        return self._component is not None and not self._component.destroyed()
+
+
+def resolve_component(component):
+    """把 `LazyComponent` 解析为实际组件；其他值 (包括 None) 原样返回。"""
+    return component() if isinstance(component, LazyComponent) else component
+
+
+@functools.lru_cache(maxsize=None)
+def _generic_pdk():
+    # 旧版在导入时激活通用 PDK；现在只在访问 `PDK` 时激活一次，
+    # 未激活任何 PDK 时 gdsfactory 本身也会回退到同一个通用 PDK
+    pdk = get_generic_pdk()
+    pdk.activate()
+    return pdk
+
+
 # %% test tpaer
-taper_in = gf.Component("taper_in_test")
-taper_in_te0 = taper_in << gf.c.taper(width1=0.5, width2=1, length=500 - 100, layer=LAYER.WG)
-taper_in_tes0 = taper_in << gf.c.straight(length=100, cross_section=X_in0)
-taper_in_tes1 = taper_in << gf.c.straight(length=100, cross_section=X_in1)
-taper_in_te0.connect("o1", other=taper_in_tes0.ports["o2"])
-taper_in_tes1.connect("o1", taper_in_te0.ports["o2"])
-taper_in.add_port(name="o1", port=taper_in_tes0.ports["o1"])
-taper_in.add_port(name="o2", port=taper_in_tes1.ports["o2"])
-
-taper_out = gf.Component("taper_out_test")
-taper_out_te0 = taper_out << gf.c.taper(width2=1.5, width1=1, length=500 - 100, layer=LAYER.WG)
-taper_out_tes1 = taper_out << gf.c.straight(length=100, cross_section=X_out1)
-taper_out_tes0 = taper_out << gf.c.straight(length=100, cross_section=X_out0)
-taper_out_te0.connect("o1", other=taper_out_tes0.ports["o2"])
-taper_out_tes1.connect("o1", taper_out_te0.ports["o2"])
-taper_out.add_port(name="o1", port=taper_out_tes0.ports["o1"])
-taper_out.add_port(name="o2", port=taper_out_tes1.ports["o2"])
+@LazyComponent
+def _taper_in():
+    taper_in = gf.Component("taper_in_test")
+    taper_in_te0 = taper_in << gf.c.taper(width1=0.5, width2=1, length=500 - 100, layer=LAYER.WG)
+    taper_in_tes0 = taper_in << gf.c.straight(length=100, cross_section=X_in0)
+    taper_in_tes1 = taper_in << gf.c.straight(length=100, cross_section=X_in1)
+    taper_in_te0.connect("o1", other=taper_in_tes0.ports["o2"])
+    taper_in_tes1.connect("o1", taper_in_te0.ports["o2"])
+    taper_in.add_port(name="o1", port=taper_in_tes0.ports["o1"])
+    taper_in.add_port(name="o2", port=taper_in_tes1.ports["o2"])
+    return taper_in
+
+
+@LazyComponent
+def _taper_out():
+    taper_out = gf.Component("taper_out_test")
+    taper_out_te0 = taper_out << gf.c.taper(width2=1.5, width1=1, length=500 - 100, layer=LAYER.WG)
+    taper_out_tes1 = taper_out << gf.c.straight(length=100, cross_section=X_out1)
+    taper_out_tes0 = taper_out << gf.c.straight(length=100, cross_section=X_out0)
+    taper_out_te0.connect("o1", other=taper_out_tes0.ports["o2"])
+    taper_out_tes1.connect("o1", taper_out_te0.ports["o2"])
+    taper_out.add_port(name="o1", port=taper_out_tes0.ports["o1"])
+    taper_out.add_port(name="o2", port=taper_out_tes1.ports["o2"])
+    return taper_out
+
+
+_LAZY_ATTRS = {"PDK": _generic_pdk, "taper_in": _taper_in, "taper_out": _taper_out}
+
+
+def __getattr__(name):
+    # PEP 562: `PDK`、`taper_in`、`taper_out` 在第一次被访问时才构建
+    if name in _LAZY_ATTRS:
+        return _LAZY_ATTRS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # remove layer
 def remove_layer(
         component: Component = None,
@@ -168,7 +513,8 @@ def add_labels_to_ports(
     return
 
 # %% original straight
-@gf.cell
+@canonical_cell
+@geometry_cell
 def GfCStraight(length=10, width=1, layer=(1, 0)):
     """
     创建一个简单的直波导组件。
@@ -269,6 +615,11 @@ def GfCBendEuler(
     elif width:
         x = gf.get_cross_section(cross_section, width=width or x.width)
 
+    if npoints is None and sagitta_sampling() is not None:
+        # 弦高误差采样：用一条粗采样的曲线估计最小曲率半径与弧长；gf.path.euler 的 npoints 为半条曲线的点数
+        coarse = gf.path.euler(radius=radius, angle=angle, p=p, use_eff=with_arc_floorplan, npoints=256)
+        rmin = coarse.info["Rmin"]
+        npoints = int(np.ceil(sagitta_npoints(rmin, np.degrees(coarse.length() / rmin)) / 2)) + 1
     path = gf.path.euler(
         radius=radius, angle=angle, p=p, use_eff=with_arc_floorplan, npoints=npoints
     )
@@ -298,7 +649,7 @@ def GfCBendEuler(
 
 
 # %% TaperRsoa
-@gf.cell()
+@geometry_cell
 def Crossing_taper(
         WidthCross: float = 1,
         WidthWg: float = 0.45,
@@ -340,7 +691,7 @@ def Crossing_taper(
     return Crossing
 
 
-@gf.cell()
+@geometry_cell
 def TaperRsoa(
         AngleRsoa: float = 13,
         WidthRsoa: float = 8,
@@ -384,7 +735,7 @@ def TaperRsoa(
 
 
 # %% OffsetRamp: 定义一个带有偏移的锥形渐变波导组件
-@gf.cell  # 使用 gf.cell 装饰器，使其成为一个可缓存的 gdsfactory 单元
+@geometry_cell  # 可缓存的 gdsfactory 单元，几何模式计入单元名
 def OffsetRamp(
     length: float = 10.0,  # 渐变区域的长度，单位：um
     width1: float = 5.0,  # 输入端的宽度，单位：um
@@ -427,6 +778,11 @@ def OffsetRamp(
     # /______________________\
     # (0, -width1/2)         (length, -width2/2 + offset)
     #
+    if snap_at_source():
+        # snap-at-source: 长度、偏移与半宽取整到 DBU，端口宽度取为两倍半宽，与多边形边缘一致
+        dbu = c.kcl.dbu
+        length, offset = to_dbu([length, offset], dbu) * dbu
+        width1, width2 = to_dbu([width1 / 2, width2 / 2], dbu) * 2 * dbu
     points = [
         (0, width1 / 2),
         (length, width2 / 2 + offset),
@@ -456,7 +812,7 @@ def OffsetRamp(
 
 
 # %% cir2end
-@gf.cell()
+@geometry_cell
 def cir2end(
         WidthNear: float = 1,
         WidthEnd: float = 0.5,
@@ -513,7 +869,466 @@ def cir2end(
     return c
 
 
+# %% 弦高误差采样
+_SAGITTA_SAMPLING = {"tolerance": None}
+
+
+def configure_sagitta_sampling(tolerance: float | None = 0.001) -> None:
+    """
+    打开或关闭按弦高误差确定点数的采样方式 (默认关闭)。
+
+    默认的点数由 `pdk.bend_points_distance` 决定，随半径线性增长，半径 1000–2000 µm 的环会有
+    上万个顶点。打开后，`GfPathArc`、`GfCBendEuler` 与 `euler_Bend_Half` 系列、`euler_Bend_Part`
+    在未显式给定 `npoints` 时，改为按最小曲率半径处相邻两点之间的弦高不超过 `tolerance` 确定点数，
+    点数只随 sqrt(半径) 增长。
+
+    参数:
+        tolerance (float | None): 允许的最大弦高误差 (单位: µm)，默认为 0.001 (1 nm)。为 None 时关闭。
+
+    修改设置会改变生成的点数，因此同时清空 euler 路径缓存；单元方面，容限经 `geometry_cell`
+    计入单元名和缓存键，切换前后生成的同参数单元互不混用。
+    """
+    _SAGITTA_SAMPLING["tolerance"] = tolerance
+    _EULER_CACHE.clear()
+
+
+def sagitta_sampling() -> float | None:
+    """返回当前的弦高误差容限 (单位: µm)；未打开时返回 None。"""
+    return _SAGITTA_SAMPLING["tolerance"]
+
+
+def sagitta_npoints(
+        radius: float,
+        angle: float,
+        tolerance: float | None = None,
+) -> int | None:
+    """
+    返回半径为 `radius`、角度为 `angle` (度) 的圆弧在弦高误差不超过 `tolerance` 时所需的点数 (含两端)。
+
+    弦对应圆心角 dθ 时弦高为 R·(1 - cos(dθ/2))，因此 dθ ≤ 2·arccos(1 - tolerance/R)。
+    `tolerance` 默认取 `configure_sagitta_sampling` 的设置；两者都为 None 时返回 None。
+    """
+    if tolerance is None:
+        tolerance = _SAGITTA_SAMPLING["tolerance"]
+    if tolerance is None:
+        return None
+    radius = abs(float(radius))
+    dtheta = 2 * np.arccos(max(1 - tolerance / radius, -1.0)) if radius > 0 else np.pi
+    return max(int(np.ceil(np.radians(abs(angle)) / dtheta)) + 1, 2)
+
+
+def GfPathArc(
+        radius: float = 10.0,
+        angle: float = 90,
+        npoints: int | None = None,
+        start_angle: float = -90,
+) -> Path:
+    """
+    与 `gf.path.arc` 相同的圆弧路径；打开弦高误差采样且未给定 `npoints` 时按弦高误差确定点数。
+
+    参数:
+        radius (float): 圆弧半径 (单位: µm)。
+        angle (float): 圆弧角度 (单位: 度)，负值向右弯。
+        npoints (int | None): 点数。默认为 None，由 gdsfactory 或弦高误差采样决定。
+        start_angle (float): 起始角度 (单位: 度)，与 `gf.path.arc` 相同，默认为 -90。
+
+    返回:
+        Path: 圆弧路径。
+    """
+    if npoints is None:
+        npoints = sagitta_npoints(radius, angle)
+    return gf.path.arc(radius=radius, angle=angle, npoints=npoints, start_angle=start_angle)
+
+
+# %% euler 路径缓存
+_EULER_CACHE_CONFIG = {"maxsize": 512, "copy": False}
+_EULER_CACHE = OrderedDict()
+_EULER_CACHE_STATS = {}
+
+
+def configure_euler_cache(
+        maxsize: int = 512,
+        copy: bool = False,
+) -> None:
+    """
+    设置 `euler_Bend_Half`、`euler_Bend_Half_Forward`、`euler_Bend_Half_Backward` 的路径缓存。
+
+    参数:
+        maxsize (int): 最多保留的路径条数，按 LRU 淘汰；0 表示关闭缓存。默认为 512。
+        copy (bool): 为 False (默认) 时，各次调用返回的 Path 共享同一个只读点列数组，
+                     `mirror`、`move`、`+` 等 gdsfactory 操作都会生成新数组，不受影响；
+                     若调用方需要原地修改 `path.points`，设为 True，每次返回一份可写的拷贝。
+    """
+    _EULER_CACHE_CONFIG.update(maxsize=maxsize, copy=copy)
+    while len(_EULER_CACHE) > max(maxsize, 0):
+        _EULER_CACHE.popitem(last=False)
+
+
+def clear_euler_cache() -> None:
+    """清空 euler 路径缓存及命中统计。"""
+    _EULER_CACHE.clear()
+    for stat in _EULER_CACHE_STATS.values():
+        stat.update(hits=0, misses=0)
+
+
+def euler_cache_info(name: str | None = None) -> dict:
+    """
+    返回 euler 路径缓存的统计信息。
+
+    参数:
+        name (str | None): 函数名。默认为 None，返回所有函数的
+                           {函数名: {"hits", "misses", "hit_rate", "size"}}，以及总计 "total"。
+    """
+    sizes = {}
+    for key in _EULER_CACHE:
+        sizes[key[0]] = sizes.get(key[0], 0) + 1
+    info = {}
+    for func_name, stat in _EULER_CACHE_STATS.items():
+        calls = stat["hits"] + stat["misses"]
+        info[func_name] = dict(stat, hit_rate=stat["hits"] / calls if calls else 0.0, size=sizes.get(func_name, 0))
+    if name is not None:
+        return info[name]
+    hits = sum(stat["hits"] for stat in _EULER_CACHE_STATS.values())
+    calls = hits + sum(stat["misses"] for stat in _EULER_CACHE_STATS.values())
+    info["total"] = {"hits": hits, "misses": calls - hits, "hit_rate": hits / calls if calls else 0.0,
+                     "size": len(_EULER_CACHE), "maxsize": _EULER_CACHE_CONFIG["maxsize"]}
+    return info
+
+
+def _memoized_path(func: Callable) -> Callable:
+    """
+    为返回 `Path` 的 euler 函数加 LRU 缓存。
+
+    键为全部调用参数 (含默认值) 加上当前 PDK 的 `bend_points_distance`，后者决定了
+    `npoints=None` 时的自动采样点数。每次调用都返回新的 Path 对象 (info 为拷贝)，点列按
+    `configure_euler_cache` 的设置共享只读数组或返回拷贝。
+    """
+    signature = inspect.signature(func)
+    name = func.__qualname__
+    stats = _EULER_CACHE_STATS.setdefault(name, {"hits": 0, "misses": 0})
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _EULER_CACHE_CONFIG["maxsize"] <= 0:
+            return func(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (name, get_active_pdk().bend_points_distance) + tuple(bound.arguments.values())
+        try:
+            entry = _EULER_CACHE.get(key)
+        except TypeError:
+            # 参数不可哈希 (如传入了数组)，不缓存
+            return func(*args, **kwargs)
+        if entry is None:
+            stats["misses"] += 1
+            path = func(*args, **kwargs)
+            points = path.points
+            points.flags.writeable = False
+            entry = (points, path.start_angle, path.end_angle, path.info)
+            _EULER_CACHE[key] = entry
+            while len(_EULER_CACHE) > _EULER_CACHE_CONFIG["maxsize"]:
+                _EULER_CACHE.popitem(last=False)
+        else:
+            stats["hits"] += 1
+            _EULER_CACHE.move_to_end(key)
+        points, start_angle, end_angle, info = entry
+        path = Path()
+        path.points = np.array(points) if _EULER_CACHE_CONFIG["copy"] else points
+        path.start_angle = start_angle
+        path.end_angle = end_angle
+        path.info = dict(info)
+        return path
+
+    return wrapper
+
+
+# %% euler 单位曲线模板
+# 随包发布的模板文件，由 `build_euler_templates(); save_euler_templates()` 生成，首次查找模板时载入
+EULER_TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "euler_templates.npz")
+# 模板分辨率阶梯：相邻两级之比为 1.5 或 4/3
+EULER_TEMPLATE_RESOLUTIONS = tuple(sorted({int(b * 2 ** k) for k in range(4, 15) for b in (1, 1.5)}))
+_EULER_TEMPLATE_CONFIG = {"resolutions": np.array(EULER_TEMPLATE_RESOLUTIONS), "maxsize": 4096, "bundled": True}
+_EULER_TEMPLATE_STATE = {"bundled_loaded": False}
+_EULER_TEMPLATES = OrderedDict()
+_EULER_TEMPLATE_STATS = {"hits": 0, "misses": 0, "loaded": 0}
+
+
+def configure_euler_templates(
+        resolutions: Sequence[int] | None = EULER_TEMPLATE_RESOLUTIONS,
+        maxsize: int = 4096,
+        bundled: bool = True,
+) -> None:
+    """
+    设置 euler 单位曲线模板。
+
+    `euler_Bend_Half_Backward` / `_Forward` 先生成 R0 = 1 的单位曲线再整体缩放，单位曲线只取决于
+    (方向, 角度, p, 点数)，因此按这四项缓存为模板，新的半径只需一次数组乘法。
+
+    参数:
+        resolutions (Sequence[int] | None): 默认为 `EULER_TEMPLATE_RESOLUTIONS`：自动计算的点数向上取到
+            最近的一级 (显式传入的 `npoints` 不受影响)，不同半径只需缩放同一模板，代价是点数最多增加约 50%。
+            为 None 时按原规则计算点数，只有点数恰好相同的调用才复用模板。
+        maxsize (int): 内存中最多保留的模板数，按 LRU 淘汰。默认为 4096。
+        bundled (bool): 是否在首次查找模板时载入随包发布的 `EULER_TEMPLATE_FILE`。默认为 True。
+
+    修改分辨率会改变生成的点数，因此同时清空 euler 路径缓存。
+    """
+    _EULER_TEMPLATE_CONFIG.update(
+        resolutions=None if resolutions is None else np.unique(np.asarray(resolutions, dtype=int)),
+        maxsize=maxsize,
+        bundled=bundled,
+    )
+    while len(_EULER_TEMPLATES) > max(maxsize, 0):
+        _EULER_TEMPLATES.popitem(last=False)
+    _EULER_CACHE.clear()
+
+
+def clear_euler_templates() -> None:
+    """清空内存中的单位曲线模板及统计；随包发布的模板在下次查找时重新载入。"""
+    _EULER_TEMPLATES.clear()
+    _EULER_TEMPLATE_STATS.update(hits=0, misses=0, loaded=0)
+    _EULER_TEMPLATE_STATE.update(bundled_loaded=False)
+
+
+def euler_template_info() -> dict:
+    """返回单位曲线模板的统计信息：hits、misses、loaded (从文件载入的条数)、size、maxsize。"""
+    return dict(_EULER_TEMPLATE_STATS, size=len(_EULER_TEMPLATES), maxsize=_EULER_TEMPLATE_CONFIG["maxsize"])
+
+
+def _euler_npoints(
+        radius: float,
+        angle: float,
+        npoints: int | None,
+        direction: str = "Backward",
+        p: float = 0.5,
+        use_eff: bool = False,
+) -> int:
+    """
+    计算半欧拉弯曲的点数 (`angle` 为正)：默认按 `bend_points_distance`，打开弦高误差采样时按
+    `sagitta_npoints`；设置了模板分辨率时再向上取到最近一级。
+    """
+    explicit = bool(npoints)
+    if not explicit and sagitta_sampling() is not None:
+        # 单位曲线上的点沿弧长均匀分布，总弧长 s0/2 按最小曲率半径 Rp 处的最大步长等分
+        alpha = np.radians(angle * 2)
+        Rp = 1 / np.sqrt(p * alpha)
+        sp = np.sqrt(p * alpha)
+        s0 = 2 * sp + Rp * alpha * (1 - p)
+        if use_eff:
+            # 等效半径与点数关系很弱，用 256 点的单位曲线估计
+            Reff = _euler_unit_curve(direction, angle, p, 256)[1]
+            rmin = radius * Rp / Reff
+        else:
+            rmin = radius
+        npoints = sagitta_npoints(rmin, np.degrees(s0 / 2 / Rp))
+    pdk = get_active_pdk()
+    npoints = npoints or abs(int(angle / 360 * radius / pdk.bend_points_distance / 2))
+    npoints = max(npoints, int(360 / angle) + 1)
+    resolutions = _EULER_TEMPLATE_CONFIG["resolutions"]
+    if resolutions is not None and not explicit:
+        i = np.searchsorted(resolutions, npoints)
+        if i < len(resolutions):
+            npoints = int(resolutions[i])
+    return npoints
+
+
+def _euler_unit_curve(
+        direction: str,
+        angle: float,
+        p: float,
+        npoints: int,
+) -> tuple[np.ndarray, float, float]:
+    """取出 (或生成并缓存) 单位曲线模板，返回只读的 (points, Reff, Rmin)。"""
+    if _EULER_TEMPLATE_CONFIG["bundled"] and not _EULER_TEMPLATE_STATE["bundled_loaded"]:
+        _EULER_TEMPLATE_STATE["bundled_loaded"] = True
+        if os.path.exists(EULER_TEMPLATE_FILE):
+            load_euler_templates()
+    key = (direction, float(angle), float(p), int(npoints))
+    entry = _EULER_TEMPLATES.get(key)
+    if entry is not None:
+        _EULER_TEMPLATE_STATS["hits"] += 1
+        _EULER_TEMPLATES.move_to_end(key)
+        return entry
+    _EULER_TEMPLATE_STATS["misses"] += 1
+    unit = _euler_unit_backward if direction == "Backward" else _euler_unit_forward
+    points, Reff, Rmin = unit(angle, p, npoints)
+    return _euler_template_put(key, points, Reff, Rmin)
+
+
+def _euler_template_put(
+        key: tuple,
+        points: np.ndarray,
+        Reff: float,
+        Rmin: float,
+) -> tuple[np.ndarray, float, float]:
+    points.flags.writeable = False
+    entry = (points, float(Reff), float(Rmin))
+    if _EULER_TEMPLATE_CONFIG["maxsize"] > 0:
+        _EULER_TEMPLATES[key] = entry
+        while len(_EULER_TEMPLATES) > _EULER_TEMPLATE_CONFIG["maxsize"]:
+            _EULER_TEMPLATES.popitem(last=False)
+    return entry
+
+
+def build_euler_templates(
+        angles: Sequence[float] = (10, 15, 20, 30, 45, 60, 75, 90),
+        ps: Sequence[float] = (0.5,),
+        resolutions: Sequence[int] = tuple(r for r in EULER_TEMPLATE_RESOLUTIONS if r <= 1024),
+        directions: Sequence[str] = ("Backward",),
+) -> int:
+    """
+    预先生成一批单位曲线模板，返回新生成的条数。
+
+    默认参数即随包发布的 `euler_templates.npz` 的内容：本包耦合器与加热器引出臂用到的角度、
+    默认的 p = 0.5、Backward 方向、不超过 1024 点的各级分辨率，由
+    `build_euler_templates(); save_euler_templates()` 生成。点数小于该角度最少点数
+    (int(360 / angle) + 1) 的分辨率会被跳过。
+    """
+    count = 0
+    for direction in directions:
+        for angle in angles:
+            for p in ps:
+                for npoints in resolutions:
+                    key = (direction, float(angle), float(p), int(npoints))
+                    if npoints < int(360 / angle) + 1 or key in _EULER_TEMPLATES:
+                        continue
+                    _euler_unit_curve(direction, angle, p, npoints)
+                    count += 1
+    return count
+
+
+def save_euler_templates(filename: str = EULER_TEMPLATE_FILE) -> int:
+    """把内存中的全部模板写入一个 .npz 文件，返回写入的条数。"""
+    keys = list(_EULER_TEMPLATES)
+    entries = [_EULER_TEMPLATES[key] for key in keys]
+    np.savez_compressed(
+        filename,
+        directions=np.array([key[0] for key in keys]),
+        params=np.array([key[1:] for key in keys], dtype=float).reshape(-1, 3),
+        radii=np.array([entry[1:] for entry in entries], dtype=float).reshape(-1, 2),
+        counts=np.array([len(entry[0]) for entry in entries], dtype=np.int64),
+        points=np.concatenate([entry[0] for entry in entries]) if entries else np.zeros((0, 2)),
+    )
+    return len(keys)
+
+
+def load_euler_templates(filename: str = EULER_TEMPLATE_FILE) -> int:
+    """
+    从 `save_euler_templates` 写出的 .npz 文件载入模板，返回载入的条数。
+
+    默认读取随包发布的 `euler_templates.npz` (首次查找模板时已自动载入)，载入后这些角度与分辨率的
+    首次调用也无需计算。
+    """
+    with np.load(filename) as data:
+        directions = data["directions"].tolist()
+        params = data["params"]
+        radii = data["radii"]
+        counts = data["counts"]
+        points = data["points"]
+    ends = np.cumsum(counts)
+    for direction, (angle, p, npoints), (Reff, Rmin), chunk in zip(
+            directions, params, radii, np.split(points, ends[:-1])):
+        _euler_template_put((direction, float(angle), float(p), int(npoints)), chunk, Reff, Rmin)
+    _EULER_TEMPLATE_STATS["loaded"] += len(directions)
+    return len(directions)
+
+
+def _euler_unit_backward(
+        angle: float,
+        p: float,
+        npoints: int,
+) -> tuple[np.ndarray, float, float]:
+    """`euler_Bend_Half_Backward` 的单位曲线 (R0 = 1)：返回 (points, Reff, Rmin)，`angle` 为正。"""
+    R0 = 1
+    alpha = np.radians(angle * 2)
+    Rp = R0 / (np.sqrt(p * alpha))
+    sp = R0 * np.sqrt(p * alpha)
+    s0 = 2 * sp + Rp * alpha * (1 - p)
+
+    num_pts_euler = int(np.round(sp / (s0 / 2) * npoints))
+    num_pts_arc = npoints - num_pts_euler
+
+    # Ensure a minimum of 2 points for each euler/arc section
+    if npoints <= 2:
+        num_pts_euler = 0
+        num_pts_arc = 2
+
+    if num_pts_euler > 0:
+        xbend1, ybend1 = _fresnel(R0, sp, num_pts_euler)
+        xp, yp = xbend1[-1], ybend1[-1]
+        dx = xp - Rp * np.sin(p * alpha / 2)
+        dy = yp - Rp * (1 - np.cos(p * alpha / 2))
+    else:
+        xbend1 = ybend1 = np.asfarray([])
+        dx = 0
+        dy = 0
+
+    s = np.linspace(sp, s0 / 2, num_pts_arc)
+    xbend2 = Rp * np.sin((s - sp) / Rp + p * alpha / 2) + dx
+    ybend2 = Rp * (1 - np.cos((s - sp) / Rp + p * alpha / 2)) + dy
+
+    x = np.concatenate([xbend1, xbend2[1:]])
+    y = np.concatenate([ybend1, ybend2[1:]])
+
+    points1 = np.array([x, y]).T
+    points2 = np.flipud(np.array([x, -y]).T)
+
+    points2 = rotate_points(points2, angle - 180)
+    points2 += -points2[0, :]
+
+    points = points2
+
+    # Find y-axis intersection point to compute Reff
+    end_angle = angle
+    dy = np.tan(np.radians(end_angle - 90)) * points[-1][0]
+    Reff = points[-1][1] - dy
+
+    # Fix degenerate condition at angle == 180
+    if np.abs(180 - angle) < 1e-3:
+        Reff = points[-1][1] / 2
+    return points, Reff, Rp
+
+
+def _euler_unit_forward(
+        angle: float,
+        p: float,
+        npoints: int,
+) -> tuple[np.ndarray, float, float]:
+    """`euler_Bend_Half_Forward` 的单位曲线 (R0 = 1)：返回 (points, Reff, Rmin)，`angle` 为正。"""
+    R0 = 1
+    alpha = np.radians(angle * 2)
+    Rp = R0 / np.sqrt(p * alpha)
+    sp = R0 * np.sqrt(p * alpha)
+    s0 = 2 * sp + Rp * alpha * (1 - p)
+
+    num_pts_euler = int(np.round(sp / (s0 / 2) * npoints))
+    num_pts_arc = npoints - num_pts_euler
+    num_pts_euler = max(num_pts_euler, 2)
+
+    # --- 生成欧拉曲线前半段（从直线 → 弯曲）
+    xbend1, ybend1 = _fresnel(R0, sp, num_pts_euler)
+    # 缩放使得终点曲率=1/Rp
+    xbend1 *= R0
+    ybend1 *= R0
+
+    # --- 生成纯圆弧段
+    s = np.linspace(sp, s0 / 2, num_pts_arc)
+    xbend2 = Rp * np.sin((s - sp) / Rp + p * alpha / 2) + xbend1[-1] - Rp * np.sin(p * alpha / 2)
+    ybend2 = Rp * (1 - np.cos((s - sp) / Rp + p * alpha / 2)) + ybend1[-1] - Rp * (1 - np.cos(p * alpha / 2))
+
+    # 合并坐标
+    x = np.concatenate([xbend1, xbend2[1:]])
+    y = np.concatenate([ybend1, ybend2[1:]])
+
+    points = np.array([x, y]).T
+
+    Rmin = Rp
+    Reff = points[-1][1] / (1 - np.cos(np.radians(angle)))
+    return points, Reff, Rmin
+
+
 # %% euler_Bend_Half
+@_memoized_path
 def euler_Bend_Half(
         radius: float = 10,
         angle: float = 90,
@@ -561,6 +1376,7 @@ def euler_Bend_Half(
     else:
         raise ValueError("direction must be 'Forward' or 'Backward'")
 # %% euler_Bend_Half：从圆弧过渡到直线的欧拉路径
+@_memoized_path
 def euler_Bend_Half_Backward(
         radius: float = 10,
         angle: float = 90,
@@ -606,63 +1422,14 @@ def euler_Bend_Half_Backward(
     else:
         mirror = False
 
-    R0 = 1
-    alpha = np.radians(angle * 2)
-    Rp = R0 / (np.sqrt(p * alpha))
-    sp = R0 * np.sqrt(p * alpha)
-    s0 = 2 * sp + Rp * alpha * (1 - p)
-
-    pdk = get_active_pdk()
-    npoints = npoints or abs(int(angle / 360 * radius / pdk.bend_points_distance / 2))
-    npoints = max(npoints, int(360 / angle) + 1)
-
-    num_pts_euler = int(np.round(sp / (s0 / 2) * npoints))
-    num_pts_arc = npoints - num_pts_euler
-
-    # Ensure a minimum of 2 points for each euler/arc section
-    if npoints <= 2:
-        num_pts_euler = 0
-        num_pts_arc = 2
-
-    if num_pts_euler > 0:
-        xbend1, ybend1 = _fresnel(R0, sp, num_pts_euler)
-        xp, yp = xbend1[-1], ybend1[-1]
-        dx = xp - Rp * np.sin(p * alpha / 2)
-        dy = yp - Rp * (1 - np.cos(p * alpha / 2))
-    else:
-        xbend1 = ybend1 = np.asfarray([])
-        dx = 0
-        dy = 0
-
-    s = np.linspace(sp, s0 / 2, num_pts_arc)
-    xbend2 = Rp * np.sin((s - sp) / Rp + p * alpha / 2) + dx
-    ybend2 = Rp * (1 - np.cos((s - sp) / Rp + p * alpha / 2)) + dy
-
-    x = np.concatenate([xbend1, xbend2[1:]])
-    y = np.concatenate([ybend1, ybend2[1:]])
-
-    points1 = np.array([x, y]).T
-    points2 = np.flipud(np.array([x, -y]).T)
-
-    points2 = rotate_points(points2, angle - 180)
-    points2 += -points2[0, :]
-
-    points = points2
-
-    # Find y-axis intersection point to compute Reff
+    npoints = _euler_npoints(radius, angle, npoints, "Backward", p, use_eff)
+    points, Reff, Rmin = _euler_unit_curve("Backward", angle, p, npoints)
     start_angle = 180 * (angle < 0)
     end_angle = start_angle + angle
-    dy = np.tan(np.radians(end_angle - 90)) * points[-1][0]
-    Reff = points[-1][1] - dy
-    Rmin = Rp
-
-    # Fix degenerate condition at angle == 180
-    if np.abs(180 - angle) < 1e-3:
-        Reff = points[-1][1] / 2
 
     # Scale curve to either match Reff or Rmin
     scale = radius / Reff if use_eff else radius / Rmin
-    points *= scale
+    points = points * scale
 
     P = Path()
 
@@ -676,6 +1443,7 @@ def euler_Bend_Half_Backward(
         P.mirror((1, 0))
     return P
 # 从直线过渡到圆弧的欧拉路径
+@_memoized_path
 def euler_Bend_Half_Forward(
         radius: float = 10,
         angle: float = 90,
@@ -721,43 +1489,12 @@ def euler_Bend_Half_Forward(
     else:
         mirror = False
 
-    R0 = 1
-    alpha = np.radians(angle * 2)
-    Rp = R0 / np.sqrt(p * alpha)
-    sp = R0 * np.sqrt(p * alpha)
-    s0 = 2 * sp + Rp * alpha * (1 - p)
-
-    # 自动确定采样点数
-    pdk = get_active_pdk()
-    npoints = npoints or abs(int(angle / 360 * radius / pdk.bend_points_distance / 2))
-    npoints = max(npoints, int(360 / angle) + 1)
-
-    num_pts_euler = int(np.round(sp / (s0 / 2) * npoints))
-    num_pts_arc = npoints - num_pts_euler
-    num_pts_euler = max(num_pts_euler, 2)
-
-    # --- 生成欧拉曲线前半段（从直线 → 弯曲）
-    xbend1, ybend1 = _fresnel(R0, sp, num_pts_euler)
-    # 缩放使得终点曲率=1/Rp
-    xbend1 *= R0
-    ybend1 *= R0
-
-    # --- 生成纯圆弧段
-    s = np.linspace(sp, s0 / 2, num_pts_arc)
-    xbend2 = Rp * np.sin((s - sp) / Rp + p * alpha / 2) + xbend1[-1] - Rp * np.sin(p * alpha / 2)
-    ybend2 = Rp * (1 - np.cos((s - sp) / Rp + p * alpha / 2)) + ybend1[-1] - Rp * (1 - np.cos(p * alpha / 2))
-
-    # 合并坐标
-    x = np.concatenate([xbend1, xbend2[1:]])
-    y = np.concatenate([ybend1, ybend2[1:]])
-
-    points = np.array([x, y]).T
+    npoints = _euler_npoints(radius, angle, npoints, "Forward", p, use_eff)
+    points, Reff, Rmin = _euler_unit_curve("Forward", angle, p, npoints)
 
     # 缩放匹配真实半径
-    Rmin = Rp
-    Reff = points[-1][1] / (1 - np.cos(np.radians(angle)))
     scale = radius / (Reff if use_eff else Rmin)
-    points *= scale
+    points = points * scale
 
     # 若 flip，则翻转曲线方向
     if flip:
@@ -820,12 +1557,6 @@ def euler_Bend_Part(
     else:
         s_total = 0.0
 
-    # 动态曲率函数（线性随 s）
-    def dynamic_curvature(s: float) -> float:
-        if s_total == 0:
-            return k2
-        return k1 + (k2 - k1) * (s / s_total)
-
     # 计算点数
     pdk = get_active_pdk()
     # 若 pdk 未设置 bend_points_distance，则退回到一个默认值保护
@@ -836,6 +1567,7 @@ def euler_Bend_Part(
     except Exception:
         base_dist = 0.5
 
+    sample_sagitta = npoints is None and sagitta_sampling() is not None
     if npoints is None:
         # 依据最大半径近似估计点数（保守估计）
         est_len = max(radius1, radius2) * alpha / 1.0
@@ -858,30 +1590,17 @@ def euler_Bend_Part(
     y_euler = np.zeros(0)
     theta = 0.0
     if num_pts_euler >= 2 and s_total > 0:
+        # 与逐点累加相同的前向积分格式，用 cumsum 一次完成：
+        #   第 i 点的切线角 θ_i = Σ_{j=1..i} κ(s_j)·ds，曲率 κ(s) = k1 + (k2-k1)·s/s_total 随弧长线性变化；
+        #   第 i 点的位置     = Σ_{j=0..i} ds·(cos θ_j, sin θ_j)。
         s_vals = np.linspace(0.0, s_total, num_pts_euler)
         ds = s_total / (num_pts_euler - 1)
-        xs = []
-        ys = []
-        cur_x = 0.0
-        cur_y = 0.0
-        cur_theta = 0.0
-        for i, s in enumerate(s_vals):
-            # 在每一步使用当前曲率近似（用 s 或 s-ds/2 中点也可）
-            kappa = dynamic_curvature(s)
-            # 对角度增量积分
-            if i == 0:
-                dtheta = 0.0
-            else:
-                dtheta = kappa * ds
-            cur_theta += dtheta
-            # 小步位移
-            cur_x += ds * np.cos(cur_theta)
-            cur_y += ds * np.sin(cur_theta)
-            xs.append(cur_x)
-            ys.append(cur_y)
-        x_euler = np.array(xs)
-        y_euler = np.array(ys)
-        theta = cur_theta  # 欧拉段末端切线角（rad）
+        dtheta = (k1 + (k2 - k1) * (s_vals / s_total)) * ds
+        dtheta[0] = 0.0
+        thetas = np.cumsum(dtheta)
+        x_euler = np.cumsum(ds * np.cos(thetas))
+        y_euler = np.cumsum(ds * np.sin(thetas))
+        theta = float(thetas[-1])  # 欧拉段末端切线角（rad）
     else:
         # 没有欧拉段 => 起点位于原点，theta 初始为 0
         x_euler = np.array([0.0])
@@ -947,11 +1666,33 @@ def euler_Bend_Part(
     else:
         scale_factor = 1.0
 
+    # ---------------------------
+    # 4.5) 弦高误差采样：积分仍按原密度进行以保证曲线精度，输出时只保留按弦高误差所需的点，
+    #      相邻两点之间的弧长不超过最小曲率半径处允许的最大步长
+    # ---------------------------
+    if sample_sagitta and len(points) > 2:
+        rmin = min(radius1, radius2) * scale_factor
+        step = rmin * 2 * np.arccos(max(1 - sagitta_sampling() / rmin, -1.0))
+        s_cum = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))))
+        keep = [0]
+        while keep[-1] < len(points) - 1:
+            j = np.searchsorted(s_cum, s_cum[keep[-1]] + step, side="right") - 1
+            keep.append(min(max(j, keep[-1] + 1), len(points) - 1))
+        points = points[keep]
+
     # ---------------------------
     # 5) 创建 Path 并记录信息
     # ---------------------------
-    # 使用 Path(points) 构造（更符合 gdsfactory）
-    path = Path(points.tolist())
+    # 与 Path(points) 的结果相同，但直接赋值点列，跳过其对 object 数组的逐元素类型检查
+    path = Path()
+    path.points = points
+    if sample_sagitta:
+        # 抽稀后首末两段弦的方向偏离切线较多，直接使用积分得到的切线角
+        path.start_angle = 0.0
+        path.end_angle = np.degrees(theta + alpha_arc)
+    else:
+        path.start_angle = np.arctan2(*(points[1] - points[0])[::-1]) / np.pi * 180
+        path.end_angle = np.arctan2(*(points[-1] - points[-2])[::-1]) / np.pi * 180
     # 记录一些信息
     path.info.update({
         "R_start": radius1,
@@ -976,7 +1717,7 @@ def euler_Bend_Part(
 
 
 # %% QRcode of team website
-@gf.cell()
+@geometry_cell
 def TWQRcode(
         Size: float = 10,
         lglayer: LayerSpec = (10, 0)
@@ -7,7 +7,7 @@ from .Heater import *
 LengthAllAround = [0, 0, 0]  # 回旋镖腔
 
 
-@gf.cell
+@geometry_cell
 def Boomerang(
         WidthRingIn: float = 2,
         WidthRingOut: float = 1,
@@ -89,8 +89,8 @@ def Boomerang(
     XT_in2str = gf.path.transition(cross_section1=X_in, cross_section2=X_str, width_type="linear")
     XT_out2str = gf.path.transition(cross_section1=X_out, cross_section2=X_str, width_type="linear")
     # paths
-    path_circle_in = gf.path.arc(radius=RadiusRing, angle=30)
-    path_circle_out = gf.path.arc(radius=RadiusRing + GapRR + WidthRingIn / 2 + WidthRingOut / 2, angle=30)
+    path_circle_in = GfPathArc(radius=RadiusRing, angle=30)
+    path_circle_out = GfPathArc(radius=RadiusRing + GapRR + WidthRingIn / 2 + WidthRingOut / 2, angle=30)
     path_euler_in = euler_Bend_Half(radius=RadiusRing, angle=15)
     path_euler_out = euler_Bend_Half(radius=RadiusRing + GapRR + WidthRingIn / 2 + WidthRingOut / 2, angle=15)
     path_euler_bridge = euler_Bend_Half(radius=RadiusEuler, angle=90)
@@ -187,7 +187,7 @@ def Boomerang(
 
 
 # 回旋镖腔
-@gf.cell
+@geometry_cell
 def RingBoomerang(
         WidthRingIn: float = 2,
         WidthRingOut: float = 1,
@@ -286,7 +286,7 @@ def RingBoomerang(
 
 
 # 双回旋镖腔
-@gf.cell
+@geometry_cell
 def RingDouBoomerang(
         WidthRingIn: float = 2,
         WidthRingOut: float = 1,
@@ -399,7 +399,7 @@ def RingDouBoomerang(
 
 
 # 三回旋镖腔
-@gf.cell
+@geometry_cell
 def RingTriBoomerang(
         WidthRingIn: float = 2,
         WidthRingOut: float = 1,
@@ -43,17 +43,17 @@ def PulleyCoupler2X2(
     sin = gf.Section(width=WidthIn, offset=0, layer=oplayer, port_names=("in", "out"))
     csout = gf.CrossSection(sections=[sout])
     csin = gf.CrossSection(sections=[sin])
-    po_ring = gf.path.arc(radius=r_out, angle=AngleCouple / 2)
+    po_ring = GfPathArc(radius=r_out, angle=AngleCouple / 2)
     po_euler = euler_Bend_Half(radius=r_out, angle=-AngleCouple / 2, p=0.5)
     po = po_euler + po_ring
     if AngleIn == None:
         AngleIn = AngleCouple * 2
     pi_euler = euler_Bend_Half(radius=r_in, angle=-AngleIn / 2, p=1)
     if IsParallel:
-        pi_ring = gf.path.arc(radius=r_in, angle=AngleIn / 2)
+        pi_ring = GfPathArc(radius=r_in, angle=AngleIn / 2)
         pi = pi_euler + pi_ring
     else:
-        pi_ring = gf.path.arc(radius=r_in, angle=-AngleIn / 2)
+        pi_ring = GfPathArc(radius=r_in, angle=-AngleIn / 2)
         pi = pi_ring
     co = gf.path.extrude(po, cross_section=csout)
     ci = gf.path.extrude(pi, cross_section=csin)
@@ -75,7 +75,7 @@ def PulleyCoupler2X2(
 
 
 # %% DMZI
-@gf.cell
+@geometry_cell
 def DMZI(
         WidthWG: float = 0.8,
         LengthCoup: float = 100,
@@ -176,7 +176,7 @@ def DMZI(
 
 
 # %% PMZI:pulley coupler MZI
-@gf.cell
+@geometry_cell
 def PMZI(
         WidthNear: float = 0.8,
         WidthRing: float = 1,
@@ -262,8 +262,8 @@ def PMZI(
     taper_2.connect("o1", other=Coup2.ports["out2"])
     bridgeL.connect("out", other=taper_2.ports["o2"], mirror=True)
     # coupler ring out
-    path_ringout1 = gf.path.arc(radius=Radius, angle=-AngleOut1 + AngleIn / 2)
-    path_ringout2 = gf.path.arc(radius=Radius, angle=-AngleOut2 + AngleIn / 2)
+    path_ringout1 = GfPathArc(radius=Radius, angle=-AngleOut1 + AngleIn / 2)
+    path_ringout2 = GfPathArc(radius=Radius, angle=-AngleOut2 + AngleIn / 2)
     ringout_1 = c << gf.path.extrude(path_ringout1, cross_section=CS_ring)
     ringout_2 = c << gf.path.extrude(path_ringout2, cross_section=CS_ring)
     ringout_1.connect("out", other=Coup1.ports["in1"], mirror=True)
@@ -295,7 +295,7 @@ def PMZI(
 
 
 # %% PMZIHSn:pulley coupler MZI width Snake Heater
-@gf.cell
+@geometry_cell
 def PMZIHSn(
         WidthNear: float = 0.8,
         WidthRing: float = 1,
@@ -359,7 +359,7 @@ def PMZIHSn(
 
 
 # %% SagnacRing
-@gf.cell
+@geometry_cell
 def SagnacRing(
         WidthOut: float = 1.55,
         WidthIn: float = 2,
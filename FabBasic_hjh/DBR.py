@@ -6,7 +6,7 @@ from .BasicDefine import *
 from .SnapMerge import *
 
 # %% DBR: 分布式布拉格反射器
-@gf.cell
+@geometry_cell
 def DBR(
         Width1: float = 2,  # 第一部分波导宽度 (µm)
         Width2: float = 1,  # 第二部分波导宽度 (µm)
@@ -106,7 +106,7 @@ def DBR(
 
 
 # %% DBRFromCsv: 从 CSV 文件创建 DBR
-@gf.cell
+@geometry_cell
 def DBRFromCsv(
         CSVName: str = "D:/Mask Download/Temp202311_LN_ZJ/单_D01.5e-25_k0.5_1500-1600.csv",  # CSV 文件路径
         WidthHeat: float = 4,  # 加热器宽度 (µm)
@@ -157,8 +157,25 @@ def DBRFromCsv(
 )
 
 
+def _add_segments_dbu(
+        c: Component,
+        junction_x: np.ndarray,
+        widths: np.ndarray,
+        layer: LayerSpec,
+) -> None:
+    """
+    snap-at-source 模式下写入 DBR 波导段：第 i 段为 [junction_x[i-1], junction_x[i]] × ±widths[i]/2
+    (第 0 段从 x=0 开始)，段边界与半宽取整到整数 DBU，零宽度的段被跳过。
+    """
+    dbu = c.kcl.dbu
+    edges_x = to_dbu(np.insert(junction_x, 0, 0), dbu)
+    half_w = to_dbu(np.asarray(widths) / 2, dbu)
+    keep = half_w > 0
+    add_boxes_dbu(c, edges_x[:-1][keep], edges_x[1:][keep], -half_w[keep], half_w[keep], layer)
+
+
 # %% DBRFromCsv: 从 CSV 文件创建 DBR
-@gf.cell
+@geometry_cell
 def DBRFromCsvOffset(
         CSVName: str = "D:/Mask Download/Temp202311_LN_ZJ/单_D01.5e-25_k0.5_1500-1600.csv",  # CSV 文件路径
         WidthHeat: float = 4,  # 加热器宽度 (µm)
@@ -229,12 +246,16 @@ def DBRFromCsvOffset(
     # 计算所有波导段的起始x坐标
     start_x = np.insert(junction_x[:-1], 0, 0)
 
-    # 将所有波导段直接添加为多边形
-    for i in range(len(start_x)):
-        x0, x1 = start_x[i], junction_x[i]
-        w_half = all_widths[i] / 2
-        if w_half > 0: # 避免添加零宽度多边形
-            c.add_polygon([(x0, -w_half), (x1, -w_half), (x1, w_half), (x0, w_half)], layer=oplayer)
+    if snap_at_source():
+        # snap-at-source: 各段边界与半宽取整到整数 DBU，合并后一次性写入
+        _add_segments_dbu(c, junction_x, all_widths, oplayer)
+    else:
+        # 将所有波导段直接添加为多边形
+        for i in range(len(start_x)):
+            x0, x1 = start_x[i], junction_x[i]
+            w_half = all_widths[i] / 2
+            if w_half > 0: # 避免添加零宽度多边形
+                c.add_polygon([(x0, -w_half), (x1, -w_half), (x1, w_half), (x0, w_half)], layer=oplayer)
 
     # --- 4. 添加端口和加热器 ---
     total_length = junction_x[-1]
@@ -268,11 +289,12 @@ def DBRFromCsvOffset(
             c.add_port(name="h2", center=(total_length, 0), width=WidthHeat, orientation=0, layer=routelayer)
 
     # --- 5. 完成 ---
-    # 如果定义了自定义的捕捉函数，则应用它
-    c = snap_all_polygons_iteratively(c, Flag=True)
+    # 如果定义了自定义的捕捉函数，则应用它；snap-at-source 模式下几何已在网格上
+    if not snap_at_source():
+        c = snap_all_polygons_iteratively(c, Flag=True)
     return c
 # %% DBRFromCsv: 从 CSV 文件创建 DBR
-@gf.cell
+@geometry_cell
 def SGDBRFromCsvOffset(
         CSVName: str = "D:/Mask Download/Temp202311_LN_ZJ/单_D01.5e-25_k0.5_1500-1600.csv",  # CSV 文件路径
         WidthHeat: float = 4,  # 加热器宽度 (µm)
@@ -367,11 +389,15 @@ def SGDBRFromCsvOffset(
     # 计算所有波导段的起始x坐标
     start_x = np.insert(junction_x[:-1], 0, 0)
 
-    # 将所有波导段直接添加为多边形
-    for i in range(len(start_x)):
-        x0, x1 = start_x[i], junction_x[i]
-        w_half = all_widths[i] / 2
-        c.add_polygon([(x0, -w_half), (x1, -w_half), (x1, w_half), (x0, w_half)], layer=oplayer)
+    if snap_at_source():
+        # snap-at-source: 各段边界与半宽取整到整数 DBU，合并后一次性写入
+        _add_segments_dbu(c, junction_x, all_widths, oplayer)
+    else:
+        # 将所有波导段直接添加为多边形
+        for i in range(len(start_x)):
+            x0, x1 = start_x[i], junction_x[i]
+            w_half = all_widths[i] / 2
+            c.add_polygon([(x0, -w_half), (x1, -w_half), (x1, w_half), (x0, w_half)], layer=oplayer)
 
     # --- 4. 添加端口和加热器 ---
     total_length = junction_x[-1]
@@ -407,10 +433,12 @@ def SGDBRFromCsvOffset(
     # --- 5. 完成 ---
     # 如果定义了自定义的捕捉函数，则应用它
     c.flatten()
-    c = snap_all_polygons_iteratively(c, Flag=True)
+    # snap-at-source 模式下几何已在网格上，无需事后捕捉
+    if not snap_at_source():
+        c = snap_all_polygons_iteratively(c, Flag=True)
     return c
 # %% DBRFromCsv: 从 CSV 文件创建 DBR
-@gf.cell
+@geometry_cell
 def EstrDBRFromCsvOffset(
         CSVName: str = "D:/Mask Download/Temp202311_LN_ZJ/单_D01.5e-25_k0.5_1500-1600.csv",  # CSV 文件路径
         WidthMidWG: float = 0.8,
@@ -490,34 +518,44 @@ def EstrDBRFromCsvOffset(
 
     # --- 3. 将几何图形添加为多边形 ---
 
-    # A. 将中心连续波导添加为一整个长方形
-    y_mid_half = WidthMidWG / 2
-    c.add_polygon(
-        [(0, -y_mid_half), (total_length, -y_mid_half), (total_length, y_mid_half), (0, y_mid_half)],
-        layer=oplayer,
-    )
-
-    # B. 批量添加侧边的“牙齿”
-    # 这里的循环速度很快，因为内部只涉及从数组中取值和简单的加法
-    for i in range(num_periods):
-        x_start, x_end = teeth_start_x[i], teeth_end_x[i]
-        w_side = side_widths[i]
-
-        # 上方的牙齿
-        y_top_bottom = GapMidSide - w_side/2
-        y_top_top = GapMidSide + w_side/2
+    if snap_at_source():
+        # snap-at-source: 中心波导与上下两排“牙齿”的边缘取整到整数 DBU，合并后一次性写入
+        dbu = c.kcl.dbu
+        x0 = np.concatenate(([0], teeth_start_x, teeth_start_x))
+        x1 = np.concatenate(([total_length], teeth_end_x, teeth_end_x))
+        y_mid = np.concatenate(([0], np.full(num_periods, GapMidSide), np.full(num_periods, -GapMidSide)))
+        half_w = np.concatenate(([WidthMidWG], side_widths, side_widths)) / 2
+        add_boxes_dbu(c, to_dbu(x0, dbu), to_dbu(x1, dbu), to_dbu(y_mid - half_w, dbu), to_dbu(y_mid + half_w, dbu),
+                      oplayer)
+    else:
+        # A. 将中心连续波导添加为一整个长方形
+        y_mid_half = WidthMidWG / 2
         c.add_polygon(
-            [(x_start, y_top_bottom), (x_end, y_top_bottom), (x_end, y_top_top), (x_start, y_top_top)],
+            [(0, -y_mid_half), (total_length, -y_mid_half), (total_length, y_mid_half), (0, y_mid_half)],
             layer=oplayer,
         )
 
-        # 下方的牙齿
-        y_bot_top = -GapMidSide + w_side/2
-        y_bot_bottom = -GapMidSide - w_side/2
-        c.add_polygon(
-            [(x_start, y_bot_top), (x_end, y_bot_top), (x_end, y_bot_bottom), (x_start, y_bot_bottom)],
-            layer=oplayer,
-        )
+        # B. 批量添加侧边的“牙齿”
+        # 这里的循环速度很快，因为内部只涉及从数组中取值和简单的加法
+        for i in range(num_periods):
+            x_start, x_end = teeth_start_x[i], teeth_end_x[i]
+            w_side = side_widths[i]
+
+            # 上方的牙齿
+            y_top_bottom = GapMidSide - w_side/2
+            y_top_top = GapMidSide + w_side/2
+            c.add_polygon(
+                [(x_start, y_top_bottom), (x_end, y_top_bottom), (x_end, y_top_top), (x_start, y_top_top)],
+                layer=oplayer,
+            )
+
+            # 下方的牙齿
+            y_bot_top = -GapMidSide + w_side/2
+            y_bot_bottom = -GapMidSide - w_side/2
+            c.add_polygon(
+                [(x_start, y_bot_top), (x_end, y_bot_top), (x_end, y_bot_bottom), (x_start, y_bot_bottom)],
+                layer=oplayer,
+            )
 
     # --- 4. 添加端口和可选的加热器 ---
     c.add_port("o1", center=(0, 0), width=WidthMidWG, orientation=180, layer=oplayer)
@@ -553,7 +591,7 @@ def EstrDBRFromCsvOffset(
     c.flatten()
     return c
 # %% EDBR structure Repeat
-@gf.cell()
+@geometry_cell
 def EDBRStrRep(
         Structure:Component = None,
         WidthMidWG: float = 0.8,
@@ -5,7 +5,7 @@ from gdsfactory.component import Component # 明确导入Component类
 from gdsfactory.typings import LayerSpec # 明确导入LayerSpec类型
 
 # %% OpenPad: 定义一个开放焊盘组件
-@gf.cell
+@geometry_cell
 def OpenPad(
     WidthOpen: float = 90,  # 中心开放区域的宽度，单位：um
     Enclosure: float = 10,  # 金属电极层超出开放区域的包围宽度，单位：um
@@ -94,7 +94,7 @@ def OpenPad(
     return c
 
 # %% GSGELE: 定义一个GSG (Ground-Signal-Ground) 电极组件
-@gf.cell
+@geometry_cell
 def GSGELE(
     WidthG: float = 80,  # G (Ground) 电极的宽度，单位：um
     WidthS: float = 25,  # S (Signal) 电极的宽度，单位：um
@@ -796,7 +796,7 @@ def ExtCavDouRing3(
 
 
 # %% ExternalCavity2: tri ring ecl
-@gf.cell
+@geometry_cell
 def ExtCavTriRing2(
         r_ring: float = 200,
         radius_delta: float = 4,
@@ -902,7 +902,7 @@ def ExtCavTriRing2(
 
 
 # %% ExternalCavity3: risky design2
-@gf.cell
+@geometry_cell
 def ExtCavTriRing2_2(
         r_ring: float = 200,
         radius_delta: float = 4,
@@ -1,10 +1,132 @@
 from .BasicDefine import *
 from .SnapMerge import *
+from .SnapMerge import _DiskCacheIndex
 from shapely.ops import unary_union
 from shapely.affinity import translate
+import hashlib
+import os
+import time
+from collections import OrderedDict
 import numpy as np
+import shapely
+import shapely.affinity
 from shapely.geometry import Polygon, MultiPoint, box
 from joblib import Parallel, delayed,cpu_count
+from joblib.externals.loky import ProcessPoolExecutor
+def _path_frame(
+        PathHeat: Path,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    把路径离散为弧长站点。
+
+    返回:
+        (s, points, angle)：各顶点的累计弧长、坐标 (N, 2)，以及顶点处的切线角 (弧度，已展开，
+        中间顶点取相邻两段方向的平均值，与 `gf.path.extrude` 的偏移方式一致)。
+    """
+    points = np.asarray(PathHeat.points, dtype=float)
+    seg_len = np.hypot(*np.diff(points, axis=0).T)
+    # 路径拼接处可能有重合的点，去掉零长度段
+    points = points[np.concatenate(([True], seg_len > 1e-9))]
+    seg = np.diff(points, axis=0)
+    s = np.concatenate(([0.0], np.cumsum(np.hypot(seg[:, 0], seg[:, 1]))))
+    seg_angle = np.unwrap(np.arctan2(seg[:, 1], seg[:, 0]))
+    angle = np.concatenate(([seg_angle[0]], (seg_angle[:-1] + seg_angle[1:]) / 2, [seg_angle[-1]]))
+    return s, points, angle
+
+
+def _path_offset_points(
+        frame: tuple[np.ndarray, np.ndarray, np.ndarray],
+        s_query: np.ndarray,
+        offset: np.ndarray,
+) -> np.ndarray:
+    """返回弧长 `s_query` 处沿左法线偏移 `offset` 的点 (N, 2)，位置和切线角都在站点间线性插值。"""
+    s, points, angle = frame
+    a = np.interp(s_query, s, angle)
+    x = np.interp(s_query, s, points[:, 0]) - offset * np.sin(a)
+    y = np.interp(s_query, s, points[:, 1]) + offset * np.cos(a)
+    return np.column_stack([x, y])
+
+
+def _along_path_stations(
+        length: float,
+        spacing: float,
+        padding: float,
+) -> np.ndarray:
+    """
+    与 `gf.path.along_path` 相同的放置规则：按 `spacing` 等距、整体居中。
+
+    `length` 应与 `Path.length()` 一样取整到 1 nm；位置按原实现的方式逐个累加，
+    末端因浮点误差超出范围的那一个同样被舍去，因此个数与原实现完全一致。
+    """
+    number = (length - 2 * padding) // spacing + 1
+    if number <= 0:
+        return np.empty(0)
+    first = (length - (number - 1) * spacing) / 2
+    stations = np.cumsum(np.concatenate(([first], np.full(int(number) - 1, spacing))))
+    return stations[stations <= length - first]
+
+
+def _notched_edge(
+        s: np.ndarray,
+        a: float,
+        b: float,
+        cuts: np.ndarray,
+        half_gap: float,
+        full: float,
+        notched: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    加热条一侧边缘在 [a, b] 上的折线：切口 (中心 `cuts`，半宽 `half_gap`) 内偏移为 `notched`，其余为 `full`。
+
+    返回:
+        (弧长, 偏移)，切口边缘处同一弧长上有两个点，形成台阶。
+    """
+    edges = np.concatenate((cuts - half_gap, cuts + half_gap))
+    st = np.unique(np.concatenate(([a, b], s[(s > a) & (s < b)], edges[(edges > a) & (edges < b)])))
+    mid = (st[:-1] + st[1:]) / 2
+    k = np.clip(np.searchsorted(cuts, mid), 1, max(len(cuts) - 1, 1))
+    inside = np.zeros(len(mid), dtype=bool)
+    if len(cuts):
+        inside = (np.abs(mid - cuts[k - 1]) < half_gap) | (np.abs(mid - cuts[np.minimum(k, len(cuts) - 1)]) < half_gap)
+    off = np.where(inside, notched, full)
+    # 每个区间给出起止两个点，再去掉偏移不变处的重复点
+    s_pts = np.column_stack([st[:-1], st[1:]]).ravel()
+    o_pts = np.repeat(off, 2)
+    keep = np.concatenate(([True], (np.diff(s_pts) != 0) | (np.diff(o_pts) != 0)))
+    return s_pts[keep], o_pts[keep]
+
+
+def _snake_heater_polygons(
+        PathHeat: Path,
+        WidthHeat: float,
+        WidthWG: float,
+        GapHeat: float,
+) -> list[np.ndarray]:
+    """
+    直接由路径计算蛇形加热器的轮廓，每个弯折一个多边形，不做任何布尔运算。
+
+    切口位置与原实现相同：上侧切口按 padding = WidthHeat / 2、下侧按 padding = WidthHeat + GapHeat / 2，
+    周期均为 WidthHeat + GapHeat，并沿路径居中。切口宽 `GapHeat`，在法向上从 ±WidthWG/2 切到加热条边缘，
+    切口边缘沿当地法线方向。多边形在每个切口中心处断开，相邻多边形共边。
+    """
+    frame = _path_frame(PathHeat)
+    s = frame[0]
+    length = s[-1]
+    period = WidthHeat + GapHeat
+    cuts_up = _along_path_stations(np.round(length, 3), period, WidthHeat / 2)
+    cuts_down = _along_path_stations(np.round(length, 3), period, WidthHeat + GapHeat / 2)
+    splits = np.unique(np.concatenate(([0.0, length], cuts_up, cuts_down)))
+    splits = splits[(splits >= 0) & (splits <= length)]
+    polygons = []
+    for a, b in zip(splits[:-1], splits[1:]):
+        s_up, o_up = _notched_edge(s, a, b, cuts_up, GapHeat / 2, WidthHeat / 2, WidthWG / 2)
+        s_down, o_down = _notched_edge(s, a, b, cuts_down, GapHeat / 2, -WidthHeat / 2, -WidthWG / 2)
+        up = _path_offset_points(frame, s_up, o_up)
+        down = _path_offset_points(frame, s_down[::-1], o_down[::-1])
+        polygons.append(np.concatenate([up, down]))
+    return polygons
+
+
 def SnakeHeater(
         WidthHeat: float = 8,
         WidthWG: float = 2,
@@ -35,41 +157,137 @@ def SnakeHeater(
 
     端口:
         根据 `PortName` 定义的两个端口，通常是加热器的电极连接点。
+
+    注意:
+        轮廓由 `_snake_heater_polygons` 根据路径的弧长和法线直接算出，每个弯折一个多边形，
+        不再拉伸切口图形后做布尔运算。切口周期 (WidthHeat + GapHeat) 与端口位置与原实现相同。
     """
     h = gf.Component()
-    # section and crosssection
-    S_heat = gf.Section(width=WidthHeat, offset=0, layer=heatlayer, port_names=(PortName[0], PortName[1]))
-    S_test = gf.Section(width=1, offset=0, layer=(1, 100), port_names=(PortName[0], PortName[1]))
-    CAP_Rin_comp = gf.Component()
-    CAP_R0 = CAP_Rin_comp << GfCStraight(width=GapHeat, length=WidthHeat - WidthWG, layer=(1, 10))
-    CAP_R0.rotate(90).movey(WidthWG / 2)
-    CAP_Rout_comp = gf.Component()
-    CAP_R1 = CAP_Rout_comp << GfCStraight(width=GapHeat, length=WidthHeat - WidthWG, layer=(1, 10))
-    CAP_R1.rotate(90).movey(-(WidthHeat - WidthWG) - WidthWG / 2)
-    via = gf.cross_section.ComponentAlongPath(
-        component=gf.c.rectangle(size=(1, 1), centered=True), spacing=5, padding=2
-    )
-    CAP_Rin = gf.cross_section.ComponentAlongPath(component=CAP_Rout_comp, spacing=WidthHeat + GapHeat,
-                                                  padding=WidthHeat + GapHeat / 2)
-    CAP_Rout = gf.cross_section.ComponentAlongPath(component=CAP_Rin_comp, spacing=WidthHeat + GapHeat,
-                                                   padding=WidthHeat / 2)
-    # Cross-Section
-    CS_RnoH = gf.CrossSection(components_along_path=(CAP_Rin, CAP_Rout), sections=(S_test,))
-    CS_Heat = gf.CrossSection(sections=(S_heat,))
-    # heat component
-    Hp = gf.Component()
-    Hm = gf.Component()
-    HSn = gf.Component()
-    Hp1 = Hp << gf.path.extrude(PathHeat, cross_section=CS_Heat)
-    Hm1 = Hm << gf.path.extrude(PathHeat, cross_section=CS_RnoH)
-    HSn = h << gf.boolean(A=Hp, B=Hm, operation="not", layer1=heatlayer, layer2=(1, 10), layer=heatlayer)
-    h.add_port(PortName[0], port=Hp1.ports[PortName[0]])
-    h.add_port(PortName[1], port=Hp1.ports[PortName[1]])
+    for points in _snake_heater_polygons(PathHeat, WidthHeat, WidthWG, GapHeat):
+        h.add_polygon(points, layer=heatlayer)
+    h.add_port(PortName[0], center=PathHeat.points[0], width=WidthHeat,
+               orientation=(PathHeat.start_angle + 180) % 360, layer=heatlayer)
+    h.add_port(PortName[1], center=PathHeat.points[-1], width=WidthHeat,
+               orientation=PathHeat.end_angle % 360, layer=heatlayer)
     return h
 
 
+# %% spilt heater 横档
+# 过孔相对横档边缘的内缩量 (单位: µm)，与原先对横档调用 ViaArray 时的默认 Enclosure 相同；
+# heater_metrics 的 Enclosure 默认值也取此值
+_SPILT_VIA_ENCLOSURE = 2
+
+
+def _along_path_placements(
+        points: np.ndarray,
+        spacing: float,
+        padding: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    按 `gf.path.along_path` 的规则计算沿折线等距放置的位置和方向，但不生成任何引用。
+
+    返回:
+        (centers, angles)：放置点 (N, 2) 及其所在线段的方向角 (弧度)。
+    """
+    points = np.asarray(points, dtype=float)
+    seg = np.diff(points, axis=0)
+    seg_len = np.sqrt(seg[:, 0] ** 2 + seg[:, 1] ** 2)
+    cum_end = np.cumsum(seg_len)
+    stations = _along_path_stations(np.round(seg_len.sum(), 3), spacing, padding)
+    # 与 along_path 一样，恰好落在线段终点的位置归入前一段
+    idx = np.minimum(np.searchsorted(cum_end, stations, side="left"), len(seg) - 1)
+    t = (stations - (cum_end[idx] - seg_len[idx])) / seg_len[idx]
+    return points[idx] + t[:, None] * seg[idx], np.arctan2(seg[idx, 1], seg[idx, 0])
+
+
+def _rung_corners(
+        centers: np.ndarray,
+        angles: np.ndarray,
+        x0: float,
+        x1: float,
+        y0: float,
+        y1: float,
+) -> np.ndarray:
+    """把局部坐标中的矩形 [x0, x1] × [y0, y1] 旋转到各放置点，返回 (N, 4, 2) 的顶点数组。"""
+    local = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+    cos = np.cos(angles)[:, None]
+    sin = np.sin(angles)[:, None]
+    x = centers[:, :1] + local[:, 0] * cos - local[:, 1] * sin
+    y = centers[:, 1:] + local[:, 0] * sin + local[:, 1] * cos
+    return np.stack([x, y], axis=-1)
+
+
+def _spilt_rungs(
+        PathHeat: Path,
+        WidthRoute: float,
+        DeltaHeat: float,
+        GapHeat: float,
+) -> np.ndarray:
+    """
+    计算 'spilt' 加热器中连接加热条与两侧布线臂的全部横档，返回 (N, 4, 2) 的顶点数组 (单位: µm)。
+
+    两组横档的位置与原先的 `ComponentAlongPath` 完全一致：周期 2 * (WidthRoute + GapHeat)，
+    指向外侧的一组沿偏移 -0.3 µm 的中心线放置、padding 为 WidthRoute + GapHeat，
+    指向内侧的一组沿偏移 +0.3 µm 的中心线放置、padding 为 0。
+    """
+    spacing = 2 * (WidthRoute + GapHeat)
+    rungs = []
+    for offset, padding, y0, y1 in ((-0.3, WidthRoute + GapHeat, 0, DeltaHeat),
+                                    (0.3, 0, -DeltaHeat, 0)):
+        points = PathHeat.centerpoint_offset_curve(PathHeat.points, offset_distance=offset,
+                                                   start_angle=PathHeat.start_angle,
+                                                   end_angle=PathHeat.end_angle)
+        centers, angles = _along_path_placements(points, spacing, padding)
+        rungs.append(_rung_corners(centers, angles, -WidthRoute / 2, WidthRoute / 2, y0, y1))
+    return np.concatenate(rungs)
+
+
+def _rung_region(
+        rungs: np.ndarray,
+        dbu: float,
+):
+    """把横档顶点数组转换为 kdb.Region (单位: DBU)，用于一次性写入版图。"""
+    rungs_dbu = np.round(rungs / dbu).astype(np.int64)
+    return gf.kdb.Region([gf.kdb.SimplePolygon([gf.kdb.Point(x, y) for x, y in rung]) for rung in rungs_dbu.tolist()])
+
+
+def _rung_via_region(
+        rungs: np.ndarray,
+        Enclosure: float,
+        dbu: float,
+):
+    """
+    返回横档内缩 `Enclosure` 后的过孔放置区域 kdb.Region (单位: DBU)，每个横档一个多边形。
+
+    横档互不相交时直接在矩形的局部坐标中内缩，不做布尔运算；若参数使横档相互重叠，
+    退回到合并后的区域上内缩。两种情况都取整到 DBU，与 `ViaArray` 从版图区域内缩的结果一致，
+    也使 `_via_region_blocks` 的平移不变缓存可以直接使用。
+    """
+    rects = shapely.polygons(rungs)
+    tree = shapely.STRtree(rects)
+    pairs = tree.query(rects, predicate="intersects")
+    if np.any(pairs[0] != pairs[1]):
+        Br = _rung_region(rungs, dbu)
+        Br.size(-Enclosure * 1000)
+        Br.merge()
+        return Br
+    # 横档是矩形，四个顶点沿两条边向内各收 Enclosure 即为内缩结果
+    u = rungs[:, 1] - rungs[:, 0]
+    v = rungs[:, 3] - rungs[:, 0]
+    len_u = np.hypot(u[:, 0], u[:, 1])
+    len_v = np.hypot(v[:, 0], v[:, 1])
+    keep = (len_u > 2 * Enclosure) & (len_v > 2 * Enclosure)
+    du = (u / len_u[:, None] * Enclosure)[:, None, :]
+    dv = (v / len_v[:, None] * Enclosure)[:, None, :]
+    sign_u = np.array([1, -1, -1, 1])[None, :, None]
+    sign_v = np.array([1, 1, -1, -1])[None, :, None]
+    shrunk = rungs + sign_u * du + sign_v * dv
+    return _rung_region(shrunk[keep], dbu)
+
+
 # %% different heater
-@gf.cell
+@canonical_cell
+@geometry_cell
 def DifferentHeater(
         PathHeat: Path = None,
         WidthWG: float = 1,
@@ -123,149 +341,945 @@ def DifferentHeater(
             - "HeatIn", "HeatOut": 主加热区域（中心条）的（概念性）输入/输出。
     """
     h = gf.Component()
-    # 从配置对象中提取参数
+    if HeaterConfig.TypeHeater == "None" or HeaterConfig.TypeHeater == "none":
+        return h
+    _build_heater(h, PathHeat, WidthWG, HeaterConfig, _heater_cross_section(HeaterConfig))
+    h.add_port(name="o1", port=h.ports["HeatIn"])  # 添加加热输入端口
+    h.add_port(name="o2", port=h.ports["HeatOut"])  # 添加加热输入端口
+    # h = snap_all_polygons_iteratively(h)
+    return h
+
+
+def _heater_cross_section(
+        HeaterConfig: HeaterConfigClass,
+) -> gf.CrossSection | None:
+    """
+    按加热器配置构建沿路径拉伸用的截面，与路径无关，同一配置的多段加热器可以共用。
+
+    返回:
+        gf.CrossSection，"snake" 类型不需要截面时返回 None。
+
+    异常:
+        ValueError: TypeHeater 不是支持的类型。
+    """
     TypeHeater = HeaterConfig.TypeHeater
     WidthHeat = HeaterConfig.WidthHeat
     WidthRoute = HeaterConfig.WidthRoute
-    WidthVia = HeaterConfig.WidthVia
-    Spacing = HeaterConfig.Spacing
     DeltaHeat = HeaterConfig.DeltaHeat
-    GapHeat = HeaterConfig.GapHeat
     heatlayer = HeaterConfig.LayerHeat
     routelayer = HeaterConfig.LayerRoute
     vialayer = HeaterConfig.LayerVia
     if TypeHeater == "default":
-        # 默认加热电极
-        heatL_comp1 = h << gf.path.extrude(PathHeat, width=WidthHeat, layer=heatlayer)  # 创建左侧加热电极
-        h.add_port(name="HeatIn", port=heatL_comp1.ports["o1"])  # 添加加热输入端口
-        h.add_port(name="HeatOut", port=heatL_comp1.ports["o2"])  # 添加加热输出端口
+        section = gf.Section(width=WidthHeat, offset=0, layer=heatlayer, port_names=("o1", "o2"))
+        return gf.CrossSection(sections=(section,))
     elif TypeHeater == "snake":
-        # 蛇形加热电极
-        HPart = h << SnakeHeater(WidthHeat, WidthWG, GapHeat, PathHeat, ["o1", "o2"], heatlayer)
-        h.add_port(name="HeatIn", port=HPart.ports["o2"])  # 添加加热输入端口
-        h.add_port(name="HeatOut", port=HPart.ports["o2"])  # 添加加热输出端口
+        return None
     elif TypeHeater == "side":
-        # 侧边加热电极
         section1 = gf.Section(width=WidthHeat, offset=DeltaHeat, layer=heatlayer, port_names=("Uo1", "Uo2"))
         section2 = gf.Section(width=0.01, offset=0, layer=vialayer, port_names=("o1", "o2"))
-        CrossSection = gf.CrossSection(sections=(section1,section2))
-        HPart = h << gf.path.extrude(PathHeat, cross_section=CrossSection)  # 创建左侧加热电极
-        h.add_port(name="HeatIn", port=HPart.ports["o1"])  # 添加加热输入端口
-        h.add_port(name="HeatOut", port=HPart.ports["o2"])  # 添加加热输出端口
-        h.add_port(name="HeatSIn", port=HPart.ports["Uo1"])  # 添加加热输入端口
-        h.add_port(name="HeatSOut", port=HPart.ports["Uo2"])  # 添加加热输出端口
-        h.remove_layers(layers=[vialayer,])
+        return gf.CrossSection(sections=(section1, section2))
     elif TypeHeater == "bothside":
         DeltaHeat = abs(DeltaHeat)
-        # 两侧边加热电极
         section1 = gf.Section(width=WidthHeat, offset=DeltaHeat, layer=heatlayer, port_names=("Uo1", "Uo2"))
         section2 = gf.Section(width=WidthHeat, offset=-DeltaHeat, layer=heatlayer, port_names=("Do1", "Do2"))
-        CrossSection = gf.CrossSection(sections=(section1, section2,))
-        HPart = h << gf.path.extrude(PathHeat, cross_section=CrossSection)  # 创建左侧加热电极
-        h.add_port(name="HeatLIn", port=HPart.ports["Uo1"])  # 添加加热输入端口
-        h.add_port(name="HeatLOut", port=HPart.ports["Uo2"])  # 添加加热输出端口
-        h.add_port(name="HeatRIn", port=HPart.ports["Do1"])  # 添加加热输入端口
-        h.add_port(name="HeatROut", port=HPart.ports["Do2"])  # 添加加热输出端口
-        h.add_port(name="HeatIn", width=WidthWG, layer=heatlayer,
-                   center=np.array(h.ports["HeatLIn"].center) / 2 + np.array(h.ports["HeatRIn"].center / 2))  # 添加加热输入端口
-        h.add_port(name="HeatOut", width=WidthWG, layer=heatlayer,
-                   center=np.array(h.ports["HeatLOut"].center) / 2 + np.array(h.ports["HeatROut"].center / 2))  # 添加加热输出端口
+        return gf.CrossSection(sections=(section1, section2,))
     elif TypeHeater == "multi":
         if isinstance(WidthHeat, (list, tuple)) or hasattr(WidthHeat, "__iter__"):
-            noh = len(WidthHeat)
+            widthheat = list(WidthHeat)
         else:
-            noh = 1
-            WidthHeat = [WidthHeat]
+            widthheat = [WidthHeat]
         if isinstance(DeltaHeat, (list, tuple)) or hasattr(DeltaHeat, "__iter__"):
-            nod = len(DeltaHeat)
+            deltaheat = list(DeltaHeat)
         else:
-            nod = 1
-            DeltaHeat = [DeltaHeat]
-        if noh != nod:
+            deltaheat = [DeltaHeat]
+        if len(widthheat) != len(deltaheat):
             raise ValueError(
                 "Number of WidthHeat != Number of DeltaHeat"
             )
-        widthheat = []
-        deltaheat = []
-        for i in range(noh):
-            if isinstance(WidthHeat, (list, tuple)):
-                widthheat.append(WidthHeat[i])
-            elif hasattr(WidthHeat, "__iter__"):  # 支持 numpy.ndarray
-                WidthHeat = list(WidthHeat)
-                widthheat.append(WidthHeat[i])
-            if isinstance(DeltaHeat, (list, tuple)):
-                deltaheat.append(DeltaHeat[i])
-            elif hasattr(DeltaHeat, "__iter__"):  # 支持 numpy.ndarray
-                DeltaHeat = list(DeltaHeat)
-                deltaheat.append(DeltaHeat[i])
-        # section & crosssection
-        section = []
-        for i in range(noh):
-            sec = gf.Section(width=widthheat[i], offset=deltaheat[i], layer=heatlayer,
-                                    port_names=("Heat"+str(i)+"In", "Heat"+str(i)+"Out"))
-            section.append(sec)
-        section_assit = gf.Section(width=0.01, offset=0, layer=vialayer, port_names=("assit1", "assit2"))
-        section.append(section_assit)
-        sections_tuple = tuple(section)
-        Xdbs = gf.CrossSection(sections=sections_tuple)
-        HPart = h << gf.path.extrude(PathHeat, cross_section=Xdbs)  # 创建左侧加热电极
-        h.add_port(name="HeatIn", port=HPart.ports["assit1"])  # 添加加热输入端口
-        h.add_port(name="HeatOut", port=HPart.ports["assit2"])  # 添加加热输出端口
+        section = [gf.Section(width=widthheat[i], offset=deltaheat[i], layer=heatlayer,
+                              port_names=("Heat" + str(i) + "In", "Heat" + str(i) + "Out"))
+                   for i in range(len(widthheat))]
+        section.append(gf.Section(width=0.01, offset=0, layer=vialayer, port_names=("assit1", "assit2")))
+        return gf.CrossSection(sections=tuple(section))
+    elif TypeHeater == "spilt":
+        S_heat = gf.Section(width=WidthHeat, offset=0, layer=heatlayer, port_names=("o1", "o2"))
+        S_route1 = gf.Section(width=WidthRoute, offset=DeltaHeat, layer=routelayer, port_names=("r1o1", "r1o2"))
+        S_route2 = gf.Section(width=WidthRoute, offset=-(DeltaHeat), layer=routelayer, port_names=("r2o1", "r2o2"))
+        return gf.CrossSection(sections=[S_heat, S_route1, S_route2])
+    else:
+        raise ValueError(
+            "no Heater Type"
+        )
+
+
+def _build_heater(
+        h: Component,
+        PathHeat: Path,
+        WidthWG: float,
+        HeaterConfig: HeaterConfigClass,
+        CrossSection: gf.CrossSection | None,
+        prefix: str = "",
+        trans: gf.kdb.DCplxTrans | None = None,
+) -> None:
+    """
+    把一段加热器写入 `h`，端口名前加上 `prefix`。`CrossSection` 由 `_heater_cross_section` 给出，
+    `DifferentHeater` 与 `DifferentHeaterBatch` 共用此函数。
+
+    给出 `trans` 时，加热器先在路径自身的坐标系中生成，再整体按 `trans` 变换，
+    结果与把 `DifferentHeater(PathHeat)` 的引用按 `trans` 放置相同 (包括 'spilt' 过孔的网格方向)。
+    """
+    def place(ref):
+        if trans is not None:
+            ref.transform(trans)
+        return ref
+
+    TypeHeater = HeaterConfig.TypeHeater
+    WidthHeat = HeaterConfig.WidthHeat
+    WidthRoute = HeaterConfig.WidthRoute
+    WidthVia = HeaterConfig.WidthVia
+    Spacing = HeaterConfig.Spacing
+    DeltaHeat = HeaterConfig.DeltaHeat
+    GapHeat = HeaterConfig.GapHeat
+    heatlayer = HeaterConfig.LayerHeat
+    routelayer = HeaterConfig.LayerRoute
+    vialayer = HeaterConfig.LayerVia
+    if TypeHeater == "default":
+        # 默认加热电极
+        heatL_comp1 = place(h << gf.path.extrude(PathHeat, cross_section=CrossSection))  # 创建左侧加热电极
+        h.add_port(name=prefix + "HeatIn", port=heatL_comp1.ports["o1"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatOut", port=heatL_comp1.ports["o2"])  # 添加加热输出端口
+    elif TypeHeater == "snake":
+        # 蛇形加热电极
+        HPart = place(h << SnakeHeater(WidthHeat, WidthWG, GapHeat, PathHeat, ["o1", "o2"], heatlayer))
+        h.add_port(name=prefix + "HeatIn", port=HPart.ports["o2"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatOut", port=HPart.ports["o2"])  # 添加加热输出端口
+    elif TypeHeater == "side":
+        # 侧边加热电极
+        HPart = place(h << gf.path.extrude(PathHeat, cross_section=CrossSection))  # 创建左侧加热电极
+        h.add_port(name=prefix + "HeatIn", port=HPart.ports["o1"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatOut", port=HPart.ports["o2"])  # 添加加热输出端口
+        h.add_port(name=prefix + "HeatSIn", port=HPart.ports["Uo1"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatSOut", port=HPart.ports["Uo2"])  # 添加加热输出端口
+        h.remove_layers(layers=[vialayer,])
+    elif TypeHeater == "bothside":
+        # 两侧边加热电极
+        HPart = place(h << gf.path.extrude(PathHeat, cross_section=CrossSection))  # 创建左侧加热电极
+        h.add_port(name=prefix + "HeatLIn", port=HPart.ports["Uo1"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatLOut", port=HPart.ports["Uo2"])  # 添加加热输出端口
+        h.add_port(name=prefix + "HeatRIn", port=HPart.ports["Do1"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatROut", port=HPart.ports["Do2"])  # 添加加热输出端口
+        orientation = 0 if trans is None else trans.angle
+        h.add_port(name=prefix + "HeatIn", width=WidthWG, layer=heatlayer, orientation=orientation,
+                   center=np.array(HPart.ports["Uo1"].center) / 2 + np.array(HPart.ports["Do1"].center) / 2)  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatOut", width=WidthWG, layer=heatlayer, orientation=orientation,
+                   center=np.array(HPart.ports["Uo2"].center) / 2 + np.array(HPart.ports["Do2"].center) / 2)  # 添加加热输出端口
+    elif TypeHeater == "multi":
+        HPart = place(h << gf.path.extrude(PathHeat, cross_section=CrossSection))  # 创建左侧加热电极
+        h.add_port(name=prefix + "HeatIn", port=HPart.ports["assit1"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatOut", port=HPart.ports["assit2"])  # 添加加热输出端口
         for port in HPart.ports:
-            h.add_port(name=port.name, port=port)
+            h.add_port(name=prefix + port.name, port=port)
         h.remove_layers(layers=[vialayer,])
     elif TypeHeater == "spilt":
-        # section and crosssection
         n_pieces = np.floor((PathHeat.length()) / (WidthRoute + GapHeat))
         GapHeat = (PathHeat.length() - WidthRoute * (n_pieces + 1)) / n_pieces - 0.5
-        S_heat = gf.Section(width=WidthHeat, offset=0, layer=heatlayer, port_names=("o1", "o2"))
-        S_route1 = gf.Section(width=WidthRoute, offset=DeltaHeat, layer=routelayer, port_names=("r1o1", "r1o2"))
-        S_route2 = gf.Section(width=WidthRoute, offset=-(DeltaHeat), layer=routelayer, port_names=("r2o1", "r2o2"))
-        S_hmid = gf.Section(width=0, layer=(512, 8))
-        CAP_Rin_comp = gf.Component()
-        CAP_H0 = CAP_Rin_comp << GfCStraight(width=WidthRoute, length=DeltaHeat, layer=heatlayer)
-        CAP_R0 = CAP_Rin_comp << GfCStraight(width=WidthRoute, length=DeltaHeat, layer=routelayer)
-        CAP_H0.rotate(90, CAP_H0.ports["o1"].center)
-        CAP_R0.rotate(90, CAP_R0.ports["o1"].center)
-        CAP_Rout = gf.cross_section.ComponentAlongPath(component=CAP_Rin_comp, spacing=2 * (WidthRoute + GapHeat),
-                                                       padding=WidthRoute + GapHeat,
-                                                       offset=(- 0.3))
-        CAP_Rout_comp = gf.Component()
-        CAP_H1 = CAP_Rout_comp << GfCStraight(width=WidthRoute, length=DeltaHeat, layer=heatlayer)
-        CAP_R1 = CAP_Rout_comp << GfCStraight(width=WidthRoute, length=DeltaHeat, layer=routelayer)
-        CAP_R1.rotate(-90, CAP_R1.ports["o1"].center)
-        CAP_H1.rotate(-90, CAP_H1.ports["o1"].center)
-        CAP_Rin = gf.cross_section.ComponentAlongPath(component=CAP_Rout_comp, spacing=2 * (WidthRoute + GapHeat),
-                                                      padding=0, offset=(+ 0.3))
-
-        ## Cross-Section
-        X_RnoH = gf.CrossSection(components_along_path=[CAP_Rout, CAP_Rin], sections=(S_hmid,))
-        X_Heat = gf.CrossSection(sections=[S_heat, S_route1, S_route2])
         # heat component
-        Hp1 = h << gf.path.extrude(PathHeat, cross_section=X_Heat)
-        Hc1 = gf.path.extrude(PathHeat, cross_section=X_RnoH)
-        Hvia = h << ViaArray(Hc1, WidthVia=WidthVia, Spacing=Spacing, vialayer=vialayer, arraylayer=heatlayer)
-        h << Hc1
-        h.add_port(name="HeatLIn", port=Hp1.ports["r1o1"])  # 添加加热输入端口
-        h.add_port(name="HeatLOut", port=Hp1.ports["r1o2"])  # 添加加热输出端口
-        h.add_port(name="HeatRIn", port=Hp1.ports["r2o1"])  # 添加加热输入端口
-        h.add_port(name="HeatROut", port=Hp1.ports["r2o2"])  # 添加加热输出端口
-        h.add_port(name="HeatIn", port=Hp1.ports["o1"])  # 添加加热输入端口
-        h.add_port(name="HeatOut", port=Hp1.ports["o2"])  # 添加加热输出端口
-    elif TypeHeater == "None" or TypeHeater == "none":
+        Hp1 = place(h << gf.path.extrude(PathHeat, cross_section=CrossSection))
+        # 横档：由路径弧长直接算出位置和方向，加热层与布线层各一次性写入
+        rungs = _spilt_rungs(PathHeat, WidthRoute, DeltaHeat, GapHeat)
+        if len(rungs):
+            dbu = h.kcl.dbu
+            rung_region = _rung_region(rungs, dbu)
+            if trans is not None:
+                rung_region.transform(trans.to_itrans(dbu))
+            h.add_polygon(rung_region, layer=heatlayer)
+            h.add_polygon(rung_region, layer=routelayer)
+            # 过孔：直接在每个横档内缩后的矩形内计算，与 ViaArray 共用结果缓存
+            via, viabox = _via_cell(WidthVia, vialayer)
+            Br = _rung_via_region(rungs, _SPILT_VIA_ENCLOSURE, dbu)
+            for x_centers, y_centers, mask in _via_region_blocks(Br, dbu, WidthVia, Spacing, viabox):
+                _place_via_grid(h, via, x_centers, y_centers, mask, Spacing, trans)
+        h.add_port(name=prefix + "HeatLIn", port=Hp1.ports["r1o1"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatLOut", port=Hp1.ports["r1o2"])  # 添加加热输出端口
+        h.add_port(name=prefix + "HeatRIn", port=Hp1.ports["r2o1"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatROut", port=Hp1.ports["r2o2"])  # 添加加热输出端口
+        h.add_port(name=prefix + "HeatIn", port=Hp1.ports["o1"])  # 添加加热输入端口
+        h.add_port(name=prefix + "HeatOut", port=Hp1.ports["o2"])  # 添加加热输出端口
+
+
+@canonical_cell
+@geometry_cell
+def DifferentHeaterBatch(
+        paths: Sequence[Path] | dict[str, Path] = None,
+        WidthWG: float = 1,
+        HeaterConfig: HeaterConfigClass = heaterconfig0,
+        placements: Sequence[tuple] | dict[str, tuple] | None = None,
+) -> Component:
+    """
+    一次生成同一配置下的多段加热器，合并为一个组件。
+
+    截面只按 `HeaterConfig` 构建一次，各段共用；各段直接写入同一个组件，而不是每段生成一个
+    `DifferentHeater` 单元再引用，环形/跑道谐振器的多段加热器因此只需一次调用。
+
+    各段默认按路径原本的位置和方向放置。需要拼接的段应通过 `placements` 给出摆放方式，而不是先
+    `Path.rotate` 路径：'spilt' 的过孔网格是在路径坐标系中计算的，只有按 `placements` 变换，
+    过孔才与原先 `DifferentHeater` 引用旋转后的位置和方向一致。
+
+    参数:
+        paths (Sequence[Path] | dict[str, Path]): 各段加热器的中心线。为列表时第 i 段的命名空间为 "H{i}"，
+                                                 为字典时以键为命名空间。
+        WidthWG (float): 被加热波导的宽度 (单位: µm)，含义同 `DifferentHeater`。
+        HeaterConfig (HeaterConfigClass): 所有段共用的加热器配置。
+        placements (Sequence[tuple] | dict[str, tuple] | None): 各段的摆放方式 (x, y, rotation[, mirror])，
+                                  与 `paths` 一一对应：先按 mirror 关于 x 轴镜像，再绕原点旋转 rotation (度)，
+                                  最后平移 (x, y)，与 `gf.kdb.DCplxTrans` 的约定相同。None 表示不变换。
+                                  旋转角不是 90° 的整数倍时返回的组件已展平。
+
+    返回:
+        Component: 包含所有段的加热器组件。
+
+    端口:
+        每段的端口与 `DifferentHeater` 相同，名称加上命名空间前缀，例如 "H0_HeatIn"、"H1_HeatLOut"。
+    """
+    h = gf.Component()
+    if HeaterConfig.TypeHeater == "None" or HeaterConfig.TypeHeater == "none":
         return h
+    if not isinstance(paths, dict):
+        paths = {f"H{i}": path for i, path in enumerate(paths)}
+    if placements is None:
+        placements = {}
+    elif not isinstance(placements, dict):
+        placements = dict(zip(paths, placements))
+    CrossSection = _heater_cross_section(HeaterConfig)
+    ortho = True
+    for name, path in paths.items():
+        placement = placements.get(name)
+        trans = None if placement is None else _placement_trans(placement)
+        ortho = ortho and (trans is None or trans.is_ortho())
+        _build_heater(h, path, WidthWG, HeaterConfig, CrossSection, prefix=f"{name}_", trans=trans)
+    if not ortho:
+        # 任意角度旋转的引用不在网格上，与父组件展平原先旋转的 DifferentHeater 引用等价
+        h.flatten()
+    return h
+
+
+def _placement_trans(
+        placement: tuple,
+) -> gf.kdb.DCplxTrans:
+    """把 (x, y, rotation[, mirror]) 转换为 `gf.kdb.DCplxTrans`。"""
+    x, y, rotation, *mirror = placement
+    return gf.kdb.DCplxTrans(1, rotation, bool(mirror and mirror[0]), x, y)
+
+
+
+# %% heater metrics
+def _path_turning(
+        PathHeat: Path,
+) -> float:
+    """返回路径从起点到终点的总转角 (弧度，逆时针为正，已展开)。"""
+    points = np.asarray(PathHeat.points, dtype=float)
+    seg = np.diff(points, axis=0)
+    seg = seg[np.hypot(seg[:, 0], seg[:, 1]) > 1e-9]
+    angles = np.concatenate(([np.deg2rad(PathHeat.start_angle)], np.arctan2(seg[:, 1], seg[:, 0]),
+                             [np.deg2rad(PathHeat.end_angle)]))
+    angles = np.unwrap(angles)
+    return float(angles[-1] - angles[0])
+
+
+def _cut_mask(
+        mid: np.ndarray,
+        cuts: np.ndarray,
+        half_gap: float,
+) -> np.ndarray:
+    """返回 `mid` 中落在任一切口 (中心 `cuts`，半宽 `half_gap`) 内的位置。"""
+    if not len(cuts):
+        return np.zeros(len(mid), dtype=bool)
+    k = np.clip(np.searchsorted(cuts, mid), 1, max(len(cuts) - 1, 1))
+    return (np.abs(mid - cuts[k - 1]) < half_gap) | (np.abs(mid - cuts[np.minimum(k, len(cuts) - 1)]) < half_gap)
+
+
+def heater_metrics(
+        PathHeat: Path = None,
+        WidthWG: float = 1,
+        HeaterConfig: HeaterConfigClass = heaterconfig0,
+        SheetResistance: float = 1,
+        Enclosure: float = _SPILT_VIA_ENCLOSURE,
+) -> dict:
+    """
+    不生成加热器几何，直接由路径和加热器配置计算 `DifferentHeater` 的电学与版图指标。
+
+    参数:
+        PathHeat (Path): 加热器中心线，与 `DifferentHeater` 相同。
+        WidthWG (float): 被加热波导的宽度 (单位: µm)，仅 "snake" 类型使用。
+        HeaterConfig (HeaterConfigClass): 加热器配置。
+        SheetResistance (float): 加热层方块电阻 (单位: Ω/□)。默认为 1，此时 resistance 即方块数。
+        Enclosure (float): "spilt" 类型过孔相对横档边缘的内缩量 (单位: µm)，与 `DifferentHeater` 中一致。
+
+    返回:
+        dict，包含:
+            - "squares": 加热层从 HeatIn 到 HeatOut 的等效方块数。
+            - "resistance": squares * SheetResistance (单位: Ω)。
+            - "heater_area": 加热层 (LayerHeat) 的图形面积 (单位: µm²)。
+            - "heater_length": 加热条沿各自中心线的总长度 (单位: µm)。
+            - "metal_length": 所有金属条 (含 "spilt" 的布线臂) 沿中心线的总长度 (单位: µm)。
+            - "via_count": 过孔数，只有 "spilt" 类型非零。
+
+    注意:
+        - 偏移为 d 的金属条长度按 L + d * Θ 计算，Θ 为路径总转角，与 gdsfactory 的偏移方向一致。
+        - "bothside"、"multi" 的各条加热条视为并联；"snake" 按沿路径的一维近似，对每段宽度求 ds / w 之和；
+          "spilt" 中相邻两个横档之间的加热条段经两侧布线臂并联，横档位置按中心线弧长计 (实际沿 ±0.3 µm
+          偏移线放置，弯曲路径上每个横档的位置偏差不超过 0.3 µm × 局部转角)。
+        - "spilt" 的过孔数不是估计值：横档与过孔网格用与 `DifferentHeater` 相同的函数计算
+          (只计算坐标，不生成单元，并与其共用过孔缓存)，与实际版图中的过孔数相同。
+        - 与实际版图的偏差 (tests/test_heater_metrics.py 中检查)：面积与方块数在 DBU 取整和折线化误差内一致
+          (相对误差 < 0.01%)；"snake" 的方块数忽略切口处电流的横向流动，只给出一维近似。
+    """
+    TypeHeater = HeaterConfig.TypeHeater
+    WidthHeat = HeaterConfig.WidthHeat
+    DeltaHeat = HeaterConfig.DeltaHeat
+    length = PathHeat.length()
+    turning = _path_turning(PathHeat)
+    via_count = 0
+    if TypeHeater == "None" or TypeHeater == "none":
+        return dict(squares=0.0, resistance=0.0, heater_area=0.0, heater_length=0.0, metal_length=0.0, via_count=0)
+    elif TypeHeater in ("default", "side", "bothside", "multi"):
+        if TypeHeater == "default":
+            strips = [(WidthHeat, 0)]
+        elif TypeHeater == "side":
+            strips = [(WidthHeat, DeltaHeat)]
+        elif TypeHeater == "bothside":
+            strips = [(WidthHeat, abs(DeltaHeat)), (WidthHeat, -abs(DeltaHeat))]
+        else:
+            widthheat = list(WidthHeat) if hasattr(WidthHeat, "__iter__") else [WidthHeat]
+            deltaheat = list(DeltaHeat) if hasattr(DeltaHeat, "__iter__") else [DeltaHeat]
+            if len(widthheat) != len(deltaheat):
+                raise ValueError(
+                    "Number of WidthHeat != Number of DeltaHeat"
+                )
+            strips = list(zip(widthheat, deltaheat))
+        lengths = np.array([length + offset * turning for _, offset in strips])
+        widths = np.array([width for width, _ in strips], dtype=float)
+        squares = 1 / np.sum(widths / lengths)
+        heater_area = float(np.sum(widths * lengths))
+        heater_length = metal_length = float(lengths.sum())
+    elif TypeHeater == "snake":
+        GapHeat = HeaterConfig.GapHeat
+        period = WidthHeat + GapHeat
+        cuts_up = _along_path_stations(length, period, WidthHeat / 2)
+        cuts_down = _along_path_stations(length, period, WidthHeat + GapHeat / 2)
+        edges = np.concatenate(([0, length], cuts_up - GapHeat / 2, cuts_up + GapHeat / 2,
+                                cuts_down - GapHeat / 2, cuts_down + GapHeat / 2))
+        st = np.unique(np.clip(edges, 0, length))
+        mid = (st[:-1] + st[1:]) / 2
+        up = np.where(_cut_mask(mid, cuts_up, GapHeat / 2), WidthWG / 2, WidthHeat / 2)
+        down = np.where(_cut_mask(mid, cuts_down, GapHeat / 2), -WidthWG / 2, -WidthHeat / 2)
+        squares = float(np.sum(np.diff(st) / (up - down)))
+        # 轮廓沿左法线偏移 (见 _snake_heater_polygons)，[down, up] 条带的面积为 ∫ (up - down) ds - (up² - down²) / 2 dθ
+        s, _, angle = _path_frame(PathHeat)
+        dtheta = np.diff(np.interp(st, s, angle))
+        heater_area = float(np.sum((up - down) * np.diff(st) - (up ** 2 - down ** 2) / 2 * dtheta))
+        heater_length = metal_length = length
+    elif TypeHeater == "spilt":
+        WidthRoute = HeaterConfig.WidthRoute
+        n_pieces = np.floor(length / (WidthRoute + HeaterConfig.GapHeat))
+        GapHeat = (length - WidthRoute * (n_pieces + 1)) / n_pieces - 0.5
+        pitch = 2 * (WidthRoute + GapHeat)
+        # 两组横档沿 ±0.3 µm 的偏移线放置，这里按中心线近似
+        rungs = np.sort(np.concatenate((_along_path_stations(length, pitch, WidthRoute + GapHeat),
+                                        _along_path_stations(length, pitch, 0))))
+        segments = np.diff(rungs) - WidthRoute
+        segments = segments[segments > 0]
+        squares = float(1 / np.sum(WidthHeat / segments)) if len(segments) else float(length / WidthHeat)
+        heater_length = length
+        metal_length = 3 * length + len(rungs) * DeltaHeat
+        # 加热层 = 加热条 ∪ 横档；横档可能伸出路径两端，直接求并集的面积
+        corners = _spilt_rungs(PathHeat, WidthRoute, DeltaHeat, GapHeat)
+        frame = _path_frame(PathHeat)
+        strip = Polygon(np.concatenate([_path_offset_points(frame, frame[0], WidthHeat / 2),
+                                        _path_offset_points(frame, frame[0][::-1], -WidthHeat / 2)]))
+        heater_area = shapely.union_all([strip, *shapely.polygons(corners)]).area
+        if len(corners):
+            dbu = gf.kcl.dbu
+            _, viabox = _via_cell(HeaterConfig.WidthVia, HeaterConfig.LayerVia)
+            Br = _rung_via_region(corners, Enclosure, dbu)
+            via_count = int(sum(np.count_nonzero(mask) for _, _, mask in
+                                _via_region_blocks(Br, dbu, HeaterConfig.WidthVia, HeaterConfig.Spacing, viabox)))
     else:
         raise ValueError(
             "no Heater Type"
         )
-    h.add_port(name="o1", port=h.ports["HeatIn"])  # 添加加热输入端口
-    h.add_port(name="o2", port=h.ports["HeatOut"])  # 添加加热输入端口
-    # h = snap_all_polygons_iteratively(h)
-    return h
+    return dict(squares=float(squares), resistance=float(squares) * SheetResistance, heater_area=float(heater_area),
+                heater_length=float(heater_length), metal_length=float(metal_length), via_count=via_count)
+
+
+# %% ViaArray 核心算法
+# 负向 buffer 用折线逼近圆角，按弦高误差放大内缩量，保证“必然包含”的判断是保守的
+_VIA_QUAD_SEGS = 8
+_VIA_ARC_MARGIN = 1 / np.cos(np.pi / (4 * _VIA_QUAD_SEGS))
+_VIA_EPS = 1e-6
+
+
+def _via_region(
+        CompEn: Component,
+        Enclosure: float,
+        arraylayer: LayerSpec,
+):
+    """取出 `CompEn` 在 `arraylayer` 上的区域并内缩 `Enclosure`，返回合并后的 kdb.Region (单位: DBU)。"""
+    Br = CompEn.get_region(layer=arraylayer)
+    Br.size(-Enclosure * 1000)
+    Br.merge()
+    return Br
+
+
+def _via_region_parts(
+        Br,
+        dbu: float,
+) -> list[Polygon]:
+    """把内缩后的区域按连通块转换为 shapely 多边形 (单位: µm)。"""
+    parts = []
+    for poly in Br.each():
+        hull = [(pt.x * dbu, pt.y * dbu) for pt in poly.each_point_hull()]
+        holes = [[(pt.x * dbu, pt.y * dbu) for pt in poly.each_point_hole(i)] for i in range(poly.holes())]
+        parts.append(Polygon(hull, holes))
+    return parts
+
+
+def _via_grid_shape(
+        part: Polygon,
+        WidthVia: float,
+        Spacing: float,
+) -> tuple[int, int]:
+    """返回连通块候选网格的 (列数, 行数)。"""
+    min_x, min_y, max_x, max_y = part.bounds
+    cols = int((max_x - min_x - WidthVia) // Spacing) + 5
+    rows = int((max_y - min_y - WidthVia) // Spacing) + 5
+    return cols, rows
+
+
+def _via_grid_axes(
+        part: Polygon,
+        WidthVia: float,
+        Spacing: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """返回连通块候选网格的 x、y 坐标轴，与原 `ViaArray` 一致以连通块左下角为起点。"""
+    min_x, min_y, max_x, max_y = part.bounds
+    cols, rows = _via_grid_shape(part, WidthVia, Spacing)
+    return _via_axes(min_x, min_y, cols, rows, WidthVia, Spacing)
+
+
+def _via_axes(
+        min_x: float,
+        min_y: float,
+        cols: int,
+        rows: int,
+        WidthVia: float,
+        Spacing: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    x_centers = min_x + WidthVia / 2 + Spacing * np.arange(cols)
+    y_centers = min_y + WidthVia / 2 + Spacing * np.arange(rows)
+    return x_centers, y_centers
+
+
+def _via_mask(
+        part,
+        x_centers: np.ndarray,
+        y_centers: np.ndarray,
+        viabox: tuple[float, float, float, float],
+) -> np.ndarray:
+    """
+    判断网格 (x_centers × y_centers) 上每个候选过孔是否完全落在 `part` 内。
+    `viabox` 为过孔外形相对放置点的 (left, bottom, right, top)。
+
+    先把区域内缩过孔半宽，对所有候选点做一次矢量化的点包含判断；只有落在内、外两次内缩之间
+    窄带里的候选点才需要精确的方块包含判断，因此结果与逐个 `contains` 完全相同。
+
+    返回:
+        形状为 (len(x_centers), len(y_centers)) 的布尔数组。
+    """
+    gx, gy = np.meshgrid(x_centers, y_centers, indexing="ij")
+    x = gx.ravel()
+    y = gy.ravel()
+    # 过孔外形相对于放置点的偏移（GfCStraight 的原点在左端中点）
+    left, bottom, right, top = viabox
+    half_x = (right - left) / 2
+    half_y = (top - bottom) / 2
+    cx = x + (left + right) / 2
+    cy = y + (bottom + top) / 2
+    # ========== 粗筛：方块内切圆必须在区域内 ==========
+    outer = part.buffer(-(min(half_x, half_y) - _VIA_EPS), quad_segs=_VIA_QUAD_SEGS)
+    shapely.prepare(outer)
+    mask = shapely.contains_xy(outer, cx, cy)
+    if mask.any():
+        # ========== 确认：方块外接圆在区域内则方块必在区域内 ==========
+        inner = part.buffer(-(np.hypot(half_x, half_y) * _VIA_ARC_MARGIN + _VIA_EPS), quad_segs=_VIA_QUAD_SEGS)
+        shapely.prepare(inner)
+        idx = np.flatnonzero(mask)
+        band = idx[~shapely.contains_xy(inner, cx[idx], cy[idx])]
+        # ========== 精筛：只对窄带内的候选点做精确的方块包含判断 ==========
+        if band.size:
+            shapely.prepare(part)
+            boxes = shapely.box(x[band] + left, y[band] + bottom, x[band] + right, y[band] + top)
+            mask[band] = shapely.contains(part, boxes)
+    return mask.reshape(len(x_centers), len(y_centers))
+
+
+def _via_grid_in_part(
+        part: Polygon,
+        WidthVia: float,
+        Spacing: float,
+        viabox: tuple[float, float, float, float],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    计算单个连通块上的候选网格及其中合法过孔的掩码。
+
+    返回:
+        (x_centers, y_centers, mask)，其中 mask[i, j] 表示 (x_centers[i], y_centers[j]) 处可放置过孔。
+    """
+    x_centers, y_centers = _via_grid_axes(part, WidthVia, Spacing)
+    return x_centers, y_centers, _via_mask(part, x_centers, y_centers, viabox)
+
+
+def _via_grid_tiles(
+        parts: list[Polygon],
+        WidthVia: float,
+        Spacing: float,
+        viabox: tuple[float, float, float, float],
+        TileSize: float,
+):
+    """
+    分块计算过孔网格的生成器，逐块产出 (x_centers, y_centers, mask)。
+
+    区域外接矩形被切成边长 `TileSize` 的方块，每个方块先在连通块的 R 树 (STRtree) 上查询，
+    与任何连通块都不相交的方块直接跳过。命中的连通块只截取方块附近的部分参与判断，
+    每块只生成落在方块内的那部分候选网格，因此内存占用只取决于 `TileSize`，与外接矩形面积无关。
+    各连通块仍使用自己的候选网格，所有方块产出的过孔合起来与不分块时完全相同。
+    """
+    if not parts:
+        return
+    left, bottom, right, top = viabox
+    # 截取范围比方块大出一个过孔以上，保证落在方块内的过孔不会碰到截取边界
+    reach = max(abs(left), abs(right), abs(bottom), abs(top)) + Spacing
+    tree = shapely.STRtree(parts)
+    axes = [_via_grid_axes(part, WidthVia, Spacing) for part in parts]
+    min_x, min_y, max_x, max_y = shapely.total_bounds(parts)
+    nx = max(1, int(np.ceil((max_x - min_x) / TileSize)))
+    ny = max(1, int(np.ceil((max_y - min_y) / TileSize)))
+    for a in range(nx):
+        tx0 = min_x + a * TileSize
+        tx1 = tx0 + TileSize
+        for b in range(ny):
+            ty0 = min_y + b * TileSize
+            ty1 = ty0 + TileSize
+            window = box(tx0 - reach, ty0 - reach, tx1 + reach, ty1 + reach)
+            for k in np.sort(tree.query(window, predicate="intersects")):
+                x_axis, y_axis = axes[k]
+                i0, i1 = np.searchsorted(x_axis, (tx0, tx1))
+                j0, j1 = np.searchsorted(y_axis, (ty0, ty1))
+                # 最后一列/行的方块需要收下恰好落在外接矩形右/上边界上的候选点
+                if a == nx - 1:
+                    i1 = len(x_axis)
+                if b == ny - 1:
+                    j1 = len(y_axis)
+                if i1 <= i0 or j1 <= j0:
+                    continue
+                clip = parts[k].intersection(window)
+                if clip.is_empty:
+                    continue
+                x_centers = x_axis[i0:i1]
+                y_centers = y_axis[j0:j1]
+                mask = _via_mask(clip, x_centers, y_centers, viabox)
+                if mask.any():
+                    yield x_centers, y_centers, mask
+
+
+def _via_grids_batch(
+        parts: list[Polygon],
+        WidthVia: float,
+        Spacing: float,
+        viabox: tuple[float, float, float, float],
+) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """工作进程中执行的任务：依次处理一批连通块。"""
+    return [_via_grid_in_part(part, WidthVia, Spacing, viabox) for part in parts]
+
+
+# %% ViaArray 并行进程池
+# 进程池在整个模块中只创建一次并被所有 ViaArray 调用复用；它是本模块自己的 loky 进程池，
+# 不是 joblib 共用的 get_reusable_executor，关闭它不会影响其他代码的进程池。
+# 并行只发生在连通块之间：每个连通块整体交给一个工作进程，单个很大的连通块不会被拆开并行。
+# 候选点总数低于实测的盈亏平衡阈值时直接走串行路径，避免把几何数据序列化到子进程的开销
+_VIA_POOL_CONFIG = {"n_workers": None, "threshold": None, "idle_timeout": 600}
+_VIA_POOL_STATE = {"executor": None, "threshold": None}
+
+
+def configure_via_pool(
+        n_workers: int | None = None,
+        threshold: int | None = None,
+        idle_timeout: float = 600,
+) -> None:
+    """
+    配置 ViaArray 系列函数使用的并行进程池。已存在的进程池会被关闭，下次使用时按新配置重建。
+
+    参数:
+        n_workers (int | None): 工作进程数。None 表示使用 `cpu_count()`；小于等于 1 时始终串行计算。
+        threshold (int | None): 启用并行的候选点数阈值。None 表示首次需要时实测串行计算速度与
+                                进程池往返开销，取两者的盈亏平衡点；实测会在第一次遇到多个连通块时
+                                启动进程池 (冷启动约 2 s)，即使这次调用最终串行计算。
+                                给定阈值可以跳过实测，候选点数低于阈值时不会启动进程池。
+        idle_timeout (float): 工作进程空闲多少秒后自动退出 (单位: s)。
+    """
+    shutdown_via_pool()
+    _VIA_POOL_CONFIG.update(n_workers=n_workers, threshold=threshold, idle_timeout=idle_timeout)
+
+
+def shutdown_via_pool() -> None:
+    """关闭 ViaArray 的并行进程池 (只影响本模块创建的进程池)，并清除已测得的并行阈值。"""
+    executor = _VIA_POOL_STATE["executor"]
+    if executor is not None:
+        executor.shutdown(wait=True)
+    _VIA_POOL_STATE.update(executor=None, threshold=None)
+
+
+def _via_pool_workers() -> int:
+    n_workers = _VIA_POOL_CONFIG["n_workers"]
+    return cpu_count() if n_workers is None else int(n_workers)
+
+
+def _via_pool():
+    """返回本模块独占的进程池，首次调用时创建。"""
+    if _VIA_POOL_STATE["executor"] is None:
+        _VIA_POOL_STATE["executor"] = ProcessPoolExecutor(
+            max_workers=_via_pool_workers(), timeout=_VIA_POOL_CONFIG["idle_timeout"])
+    return _VIA_POOL_STATE["executor"]
+
+
+def _via_pool_threshold() -> float:
+    """
+    返回启用并行所需的最少候选点数。
+
+    若未配置，则实测：串行处理每个候选点的耗时 t_c，以及进程池完成一次小任务的往返耗时 t_p，
+    并行只在 N * t_c * (1 - 1 / n_workers) > t_p 时才有收益，由此得到阈值 N。结果在进程内缓存。
+    实测需要启动进程池；不希望启动时用 `configure_via_pool(threshold=...)` 给定阈值。
+    """
+    if _VIA_POOL_CONFIG["threshold"] is not None:
+        return _VIA_POOL_CONFIG["threshold"]
+    n_workers = _via_pool_workers()
+    if n_workers <= 1:
+        return np.inf
+    if _VIA_POOL_STATE["threshold"] is None:
+        viabox = (0.0, -0.25, 0.5, 0.25)
+        probe = shapely.affinity.rotate(box(0, 0, 200, 20), 30)
+        cols, rows = _via_grid_shape(probe, 0.5, 1.1)
+        t0 = time.perf_counter()
+        _via_grid_in_part(probe, 0.5, 1.1, viabox)
+        t_candidate = (time.perf_counter() - t0) / (cols * rows)
+        executor = _via_pool()
+        tiny = [box(0, 0, 3, 3)]
+        # 第一次提交会拉起工作进程，不计入往返开销
+        executor.submit(_via_grids_batch, tiny, 0.5, 1.1, viabox).result()
+        t0 = time.perf_counter()
+        executor.submit(_via_grids_batch, tiny, 0.5, 1.1, viabox).result()
+        t_pool = time.perf_counter() - t0
+        _VIA_POOL_STATE["threshold"] = t_pool / (t_candidate * (1 - 1 / n_workers))
+    return _VIA_POOL_STATE["threshold"]
+
+
+def _via_grids(
+        parts: list[Polygon],
+        WidthVia: float,
+        Spacing: float,
+        viabox: tuple[float, float, float, float],
+) -> list[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    ViaArray 系列函数共用的过孔定位核心，按连通块返回 (x_centers, y_centers, mask) 列表。
+
+    连通块较多且候选点总数超过 `_via_pool_threshold()` 时，按候选点数均衡分批交给模块级进程池并行计算，
+    否则串行计算。两条路径的结果与顺序完全相同。并行的粒度是连通块，只有一个连通块时总是串行。
+    """
+    n_workers = _via_pool_workers()
+    if n_workers <= 1 or len(parts) < 2:
+        return _via_grids_batch(parts, WidthVia, Spacing, viabox)
+    sizes = np.array([np.prod(_via_grid_shape(part, WidthVia, Spacing)) for part in parts])
+    if sizes.sum() < _via_pool_threshold():
+        return _via_grids_batch(parts, WidthVia, Spacing, viabox)
+    # 按累计候选点数切成约 4 * n_workers 批，保证负载均衡且保持连通块顺序
+    n_batches = min(len(parts), 4 * n_workers)
+    batch_ids = np.minimum((np.cumsum(sizes) - sizes) * n_batches // sizes.sum(), n_batches - 1)
+    batches = [[parts[k] for k in np.flatnonzero(batch_ids == b)] for b in range(n_batches)]
+    executor = _via_pool()
+    futures = [executor.submit(_via_grids_batch, batch, WidthVia, Spacing, viabox) for batch in batches if batch]
+    return [grid for future in futures for grid in future.result()]
+
+
+# %% ViaArray 结果缓存
+# 同一加热器路径（相同半径、角度）在环阵列、外腔等结构中反复出现，只是位置不同。
+# 以内缩后区域平移到原点后的几何指纹为键，缓存各连通块的网格原点（相对区域左下角，单位: DBU）和掩码，
+# 命中时直接还原网格，完全跳过包含判断。
+_VIA_CACHE_VERSION = 1
+_VIA_CACHE_CONFIG = {"maxsize": 256, "path": None, "max_bytes": 256 << 20}
+_VIA_CACHE = OrderedDict()
+_VIA_CACHE_STATS = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0}
+_VIA_CACHE_INDEX = _DiskCacheIndex()
+
+
+def configure_via_cache(
+        maxsize: int = 256,
+        path: str | None = None,
+        max_bytes: int = 256 << 20,
+) -> None:
+    """
+    配置 ViaArray 的结果缓存。
+
+    参数:
+        maxsize (int): 内存中最多保留的条目数，超出后按最近最少使用 (LRU) 淘汰。为 0 时关闭缓存。
+        path (str | None): 持久化目录。设置后每个条目另存为一个 .npz 文件，内存未命中时从磁盘读取，
+                           下次运行同样的版图可以直接复用。默认为 None，仅在内存中缓存。
+        max_bytes (int): 磁盘缓存的总大小上限 (单位: 字节)，超出后删除最久未使用的文件。默认 256 MB。
+    """
+    _VIA_CACHE_CONFIG.update(maxsize=maxsize, path=path, max_bytes=max_bytes)
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+    _VIA_CACHE_INDEX.reset(path)
+    while len(_VIA_CACHE) > max(maxsize, 0):
+        _VIA_CACHE.popitem(last=False)
+
+
+def clear_via_cache(disk: bool = False) -> None:
+    """清空内存中的 ViaArray 结果缓存及命中统计；`disk` 为 True 时同时删除磁盘上的缓存文件。"""
+    _VIA_CACHE.clear()
+    _VIA_CACHE_STATS.update(hits=0, misses=0, disk_hits=0, evictions=0)
+    if disk:
+        _VIA_CACHE_INDEX.clear()
+
+
+def via_cache_info() -> dict:
+    """返回 ViaArray 结果缓存的统计信息：hits、misses、disk_hits、evictions、size、maxsize、disk_bytes。"""
+    return dict(_VIA_CACHE_STATS, size=len(_VIA_CACHE), maxsize=_VIA_CACHE_CONFIG["maxsize"],
+                disk_bytes=_VIA_CACHE_INDEX.size())
+
+
+def _via_cache_key(
+        Br,
+        WidthVia: float,
+        Spacing: float,
+        viabox: tuple[float, float, float, float],
+) -> tuple[str, tuple[int, int]]:
+    """
+    计算内缩后区域的平移不变指纹。
+
+    返回:
+        (key, origin)，origin 为区域外接矩形左下角 (单位: DBU)。
+    """
+    bbox = Br.bbox()
+    origin = (bbox.left, bbox.bottom)
+    digest = hashlib.sha1(repr((_VIA_CACHE_VERSION, WidthVia, Spacing, viabox)).encode())
+    for poly in sorted(str(poly) for poly in Br.moved(-origin[0], -origin[1]).each()):
+        digest.update(poly.encode())
+    return digest.hexdigest(), origin
+
+
+def _via_cache_get(key: str):
+    if key in _VIA_CACHE:
+        _VIA_CACHE.move_to_end(key)
+        _VIA_CACHE_STATS["hits"] += 1
+        return _VIA_CACHE[key]
+    path = _VIA_CACHE_CONFIG["path"]
+    if path is not None:
+        name = key + ".npz"
+        try:
+            with np.load(os.path.join(path, name)) as data:
+                ends = np.cumsum(data["shapes"].prod(axis=1))
+                masks = np.split(data["masks"], ends[:-1])
+                entry = [(int(rx), int(ry), mask.reshape(shape))
+                         for (rx, ry), shape, mask in zip(data["origins"].tolist(), data["shapes"], masks)]
+            _VIA_CACHE_INDEX.touch(name)
+        except (OSError, KeyError, ValueError):
+            # 文件不存在、已被淘汰或损坏时按未命中处理
+            _VIA_CACHE_INDEX.discard(name)
+            entry = None
+        if entry is not None:
+            _VIA_CACHE_STATS["disk_hits"] += 1
+            _via_cache_put(key, entry, persist=False)
+            return entry
+    _VIA_CACHE_STATS["misses"] += 1
+    return None
+
+
+def _via_cache_put(key: str, entry, persist: bool = True) -> None:
+    if _VIA_CACHE_CONFIG["maxsize"] <= 0:
+        return
+    _VIA_CACHE[key] = entry
+    _VIA_CACHE.move_to_end(key)
+    while len(_VIA_CACHE) > _VIA_CACHE_CONFIG["maxsize"]:
+        _VIA_CACHE.popitem(last=False)
+    path = _VIA_CACHE_CONFIG["path"]
+    if persist and path is not None:
+        np.savez_compressed(
+            os.path.join(path, key + ".npz"),
+            origins=np.array([(rx, ry) for rx, ry, _ in entry], dtype=np.int64).reshape(-1, 2),
+            shapes=np.array([mask.shape for _, _, mask in entry], dtype=np.int64).reshape(-1, 2),
+            masks=np.concatenate([mask.ravel() for _, _, mask in entry]) if entry else np.zeros(0, dtype=bool),
+        )
+        _VIA_CACHE_STATS["evictions"] += _VIA_CACHE_INDEX.add(key + ".npz", _VIA_CACHE_CONFIG["max_bytes"])
+
+
+def _via_blocks(
+        CompEn: Component,
+        WidthVia: float,
+        Spacing: float,
+        Enclosure: float,
+        arraylayer: LayerSpec,
+        viabox: tuple[float, float, float, float],
+        TileSize: float | None = None,
+):
+    """
+    按连通块 (TileSize 为 None) 或按方块产出 (x_centers, y_centers, mask)。
+
+    按连通块计算时先查结果缓存；分块模式用于超大区域，为了保持内存有界不做缓存。
+    """
+    return _via_region_blocks(_via_region(CompEn, Enclosure, arraylayer), CompEn.kcl.dbu,
+                              WidthVia, Spacing, viabox, TileSize)
+
+
+def _via_region_blocks(
+        Br,
+        dbu: float,
+        WidthVia: float,
+        Spacing: float,
+        viabox: tuple[float, float, float, float],
+        TileSize: float | None = None,
+):
+    """`_via_blocks` 的核心：对已内缩的区域 `Br` (单位: DBU) 产出 (x_centers, y_centers, mask)。"""
+    if TileSize:
+        return _via_grid_tiles(_via_region_parts(Br, dbu), WidthVia, Spacing, viabox, TileSize)
+    if _VIA_CACHE_CONFIG["maxsize"] <= 0:
+        return iter(_via_grids(_via_region_parts(Br, dbu), WidthVia, Spacing, viabox))
+    key, (ox, oy) = _via_cache_key(Br, WidthVia, Spacing, viabox)
+    entry = _via_cache_get(key)
+    if entry is None:
+        parts = _via_region_parts(Br, dbu)
+        grids = _via_grids(parts, WidthVia, Spacing, viabox)
+        entry = [(round(part.bounds[0] / dbu) - ox, round(part.bounds[1] / dbu) - oy, mask)
+                 for part, (_, _, mask) in zip(parts, grids)]
+        _via_cache_put(key, entry)
+        return iter(grids)
+    # 还原网格：原点按 DBU 整数平移，与直接计算得到的坐标逐位相同
+    return ((*_via_axes((ox + rx) * dbu, (oy + ry) * dbu, *mask.shape, WidthVia, Spacing), mask)
+            for rx, ry, mask in entry)
+
+
+def iter_via_sites(
+        CompEn: Component,
+        WidthVia: float = 0.5,
+        Spacing: float = 1.1,
+        Enclosure: float = 2,
+        arraylayer: LayerSpec = None,
+        TileSize: float | None = 200,
+):
+    """
+    逐块产出 `ViaArray` 会放置的过孔坐标，而不生成任何几何图形。
+
+    参数:
+        CompEn, WidthVia, Spacing, Enclosure, arraylayer: 与 `ViaArray` 相同。
+        TileSize (float | None): 分块边长 (单位: µm)。为 None 时按连通块整体计算。
+
+    产出:
+        np.ndarray: 每块中合法过孔的放置坐标，形状为 (N, 2) (单位: µm)。
+    """
+    via, viabox = _via_cell(WidthVia, LAYER.VIA)
+    for x_centers, y_centers, mask in _via_blocks(CompEn, WidthVia, Spacing, Enclosure, arraylayer, viabox, TileSize):
+        i, j = np.nonzero(mask)
+        yield np.column_stack([x_centers[i], y_centers[j]])
+
+
+def _via_grid_blocks(mask: np.ndarray) -> list[tuple[int, int, int, int]]:
+    """
+    把过孔掩码做行程编码，拆分成若干矩形块。
+
+    每一行 (固定 j) 先找出 i 方向的连续段，相邻行中起止位置完全相同的段合并为一个矩形。
+
+    返回:
+        [(i0, j0, columns, rows), ...]，各矩形互不重叠且恰好覆盖 mask 中所有 True。
+    """
+    cols, rows = mask.shape
+    blocks = []
+    open_runs = {}  # (i0, i1) -> 起始行 j0
+    for j in range(rows + 1):
+        if j < rows:
+            edges = np.diff(np.concatenate(([0], mask[:, j].astype(np.int8), [0])))
+            runs = set(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+        else:
+            runs = set()
+        for run in [r for r in open_runs if r not in runs]:
+            j0 = open_runs.pop(run)
+            blocks.append((run[0], j0, run[1] - run[0], j - j0))
+        for run in runs:
+            open_runs.setdefault(run, j)
+    return blocks
+
+
+def _via_cell(
+        WidthVia: float,
+        vialayer: LayerSpec,
+) -> tuple[Component, tuple[float, float, float, float]]:
+    """返回单个方形过孔单元及其外框 (left, bottom, right, top)，外框是过孔网格计算所用的过孔外形。"""
+    via = GfCStraight(width=WidthVia, length=WidthVia, layer=vialayer)
+    viabox = via.bbox()
+    return via, (viabox.left, viabox.bottom, viabox.right, viabox.top)
+
+
+def _place_via_grid(
+        via_array: Component,
+        via: Component,
+        x_centers: np.ndarray,
+        y_centers: np.ndarray,
+        mask: np.ndarray,
+        Spacing: float,
+        trans: gf.kdb.DCplxTrans | None = None,
+) -> None:
+    """
+    把一个连通块的过孔掩码写入 `via_array`：整块的行/列用一个阵列引用表示，零散的过孔用单个引用。
+    只有 `Spacing` 恰好落在 DBU 网格上时才使用阵列引用，否则阵列累计的取整误差会让过孔偏离原位置。
+    给出 `trans` 时各引用放好后再整体按 `trans` 变换。
+    """
+    dbu = via_array.kcl.dbu
+    on_grid = abs(Spacing / dbu - round(Spacing / dbu)) < 1e-6
+    if snap_at_source():
+        # snap-at-source: 过孔位置在生成时就取到 DBU 网格上
+        x_centers = to_dbu(x_centers, dbu) * dbu
+        y_centers = to_dbu(y_centers, dbu) * dbu
+    if on_grid:
+        blocks = _via_grid_blocks(mask)
+    else:
+        blocks = [(i, j, 1, 1) for i, j in zip(*np.nonzero(mask))]
+    for i0, j0, columns, rows in blocks:
+        if columns * rows == 1:
+            via_ref = via_array << via
+        else:
+            via_ref = via_array.add_ref(via, columns=columns, rows=rows, column_pitch=Spacing, row_pitch=Spacing)
+        via_ref.move((x_centers[i0], y_centers[j0]))
+        if trans is not None:
+            via_ref.transform(trans)
+
+
+def _build_via_array(
+        CompEn: Component,
+        WidthVia: float,
+        Spacing: float,
+        Enclosure: float,
+        arraylayer: LayerSpec,
+        vialayer: LayerSpec,
+        TileSize: float | None = None,
+) -> Component:
+    via_array = gf.Component()
+    via, viabox = _via_cell(WidthVia, vialayer)
+    for x_centers, y_centers, mask in _via_blocks(CompEn, WidthVia, Spacing, Enclosure, arraylayer, viabox, TileSize):
+        _place_via_grid(via_array, via, x_centers, y_centers, mask, Spacing)
+    return via_array
 
 
 # %% ViaArray (Optimized)
-@gf.cell
+@canonical_cell
+@geometry_cell
 def ViaArray(
         CompEn: Component,
         WidthVia: float = 0.5,
@@ -273,6 +1287,7 @@ def ViaArray(
         Enclosure: float = 2,
         arraylayer: LayerSpec = None,
         vialayer: gf.typings.LayerSpec = LAYER.VIA,
+        TileSize: float | None = None,
 ) -> Component:
     """
     在给定组件 (`CompEn`) 的指定图层 (`arraylayer`) 形成的区域内，
@@ -289,60 +1304,25 @@ def ViaArray(
                                      如果为 None，则函数会尝试使用 `CompEn` 的整体轮廓或其包含的第一个图层。
                                      推荐明确指定此图层。
         vialayer (LayerSpec): 生成的过孔所在的GDS图层。默认为 `LAYER.VIA`。
+        TileSize (float | None): 分块计算的方块边长 (单位: µm)。默认为 None，即按连通块整体计算。
+                                 对毫米级的长加热器/螺旋加热器，外接矩形内的候选网格大部分为空，
+                                 设置此参数后内存占用只取决于方块大小，生成的过孔不变。
 
     返回:
         Component: 包含生成的过孔阵列的新组件。
 
     注意:
         - 此函数使用 `shapely` 库进行几何运算。
-        - "关键优化" 注释表明此实现旨在提高效率。
+        - 过孔定位由 `_via_grids` 完成：区域只内缩一次，所有候选点用一次矢量化的
+          点包含判断筛选，`ViaArrayParallel`、`ViaArray_optimized` 共用同一核心，输出完全相同。
+        - 成行成列的过孔以阵列引用输出，实例数远小于过孔数，展开后的过孔集合不变。
         - 如果 `arraylayer` 未指定或 `CompEn` 在该层上没有几何图形，可能不会生成过孔。
     """
-    via_array = gf.Component()
-    B = gf.Component()
-    via = GfCStraight(width=WidthVia, length=WidthVia, layer=vialayer)
-    viabox = via.bbox()
-    # ========== 关键优化1：预处理目标区域 ==========
-    # 获取内缩后的几何区域
-    B0 = CompEn.copy()
-    Br = B0.get_region(layer=arraylayer)
-    Br.size(-Enclosure * 1000)
-    B.add_polygon(Br, layer=arraylayer)
-    # B.show()
-    # B.offset(layer=arraylayer,distance=-Enclosure)
-    b_polys = B.get_polygons_points(by='tuple')
-    for poly in b_polys[arraylayer]:
-        # shape=Polygon(poly)
-        # b_shapely = poly
-        b_shapely = unary_union([Polygon(poly)])
-        # ========== 关键优化2：动态计算网格范围 ==========
-        # 获取B的有效区域边界
-        min_x, min_y, max_x, max_y = b_shapely.bounds
-        via_size = WidthVia
-        # 计算实际需要的行列数（替代固定Num参数）
-        cols = int((max_x - min_x - via_size) // Spacing) + 5
-        rows = int((max_y - min_y - via_size) // Spacing) + 5
-        # 生成所有候选中心坐标
-        x_centers = min_x + via_size / 2 + Spacing * np.arange(cols)
-        y_centers = min_y + via_size / 2 + Spacing * np.arange(rows)
-
-        # 生成通孔阵列
-        for x in x_centers:
-            for y in y_centers:
-                # via_ref = via_array << via
-                # via_ref.movex(x)
-                # via_ref.movey(y)
-                # bbox = via_ref.bbox()
-                a_shapely = box(viabox.left + x, viabox.bottom + y, viabox.right + x, viabox.top + y)
-                # 检查是否完全在B内部
-                if b_shapely.contains(a_shapely):
-                    via_ref = via_array << via
-                    via_ref.movex(x)
-                    via_ref.movey(y)
-    return via_array
+    return _build_via_array(CompEn, WidthVia, Spacing, Enclosure, arraylayer, vialayer, TileSize)
 
 # 并行优化版本的ViaArray
-@gf.cell
+@canonical_cell
+@geometry_cell
 def ViaArrayParallel(
         CompEn: Component,
         WidthVia: float = 0.5,
@@ -350,135 +1330,19 @@ def ViaArrayParallel(
         Enclosure: float = 2,
         arraylayer: LayerSpec = None,
         vialayer: LayerSpec = LAYER.VIA,
+        TileSize: float | None = None,
 ) -> Component:
     """
     在给定组件 (`CompEn`) 的指定图层 (`arraylayer`) 形成的区域内，
     根据内缩值 (`Enclosure`)，高效地生成一个过孔阵列（并行优化版）。
 
-    参数说明见原始文档。
+    与 `ViaArray` 共用同一矢量化核心，输出完全相同。参数说明见 `ViaArray`。
+    并行计算使用模块级进程池，见 `configure_via_pool`。
     """
+    return _build_via_array(CompEn, WidthVia, Spacing, Enclosure, arraylayer, vialayer, TileSize)
 
-    via_array = gf.Component()
-    B = gf.Component()
-    Cw = gf.Section(width=WidthVia,layer=vialayer)
-    Xw = gf.CrossSection(sections=(Cw,))
-    via = gf.components.straight(length=WidthVia,cross_section=Xw)
-    viabox = via.bbox()
-
-    # ========== 关键优化1：预处理目标区域 ==========
-    B0 = CompEn.copy()
-    Br = B0.get_region(layer=arraylayer)
-    Br.size(-Enclosure * 1000)
-    B.add_polygon(Br, layer=arraylayer)
-    b_polys = B.get_polygons_points(by='tuple')
-
-    if arraylayer not in b_polys or not b_polys[arraylayer]:
-        return via_array
-
-
-    # 合并所有 polygon 为 shapely 区域
-    b_shapely = unary_union([Polygon(poly) for poly in b_polys[arraylayer]])
-    if b_shapely.is_empty:
-        return via_array
-
-    # 预生成单个 via 形状（基于 0 原点）
-    via_shape = box(viabox.left, viabox.bottom, viabox.right, viabox.top)
-
-    # 计算布孔区域边界 + 网格坐标
-    min_x, min_y, max_x, max_y = b_shapely.bounds
-    cols = int((max_x - min_x - WidthVia) // Spacing) + 5
-    rows = int((max_y - min_y - WidthVia) // Spacing) + 5
-    x_centers = min_x + WidthVia / 2 + Spacing * np.arange(cols)
-    y_centers = min_y + WidthVia / 2 + Spacing * np.arange(rows)
-
-    # 将 candidate 点转换为 numpy 坐标对
-    candidates = np.array(np.meshgrid(x_centers, y_centers)).reshape(2, -1).T
-
-    # 提取目标区域 bounding box，用于快速预筛
-    bminx, bminy, bmaxx, bmaxy = b_shapely.bounds
-
-    def is_inside_fast(x, y):
-        # 粗筛：如果完全在 bounding box 外，则跳过
-        if not (bminx <= x <= bmaxx and bminy <= y <= bmaxy):
-            return None
-        # 精筛：实际形状是否包含该 via
-        via_moved = translate(via_shape, xoff=x, yoff=y)
-        if b_shapely.contains(via_moved):
-            return (x, y)
-        return None
-
-    # 并行判断 + 筛选合法位置
-    # valid_coords = Parallel(n_jobs=-1, backend="threading")(
-    #     delayed(is_inside_fast)(x, y) for x, y in candidates
-    # )
-    # valid_coords = [c for c in valid_coords if c is not None]
-    # =================== 优化后的批处理并行计算 ===================
-
-    # 1. 定义一个处理“一批”候选点的函数
-    def process_batch(candidate_batch, b_shapely, via_shape):
-        """
-        处理一个批次的候选点，返回该批次中所有有效的坐标。
-        这个函数将在并行进程中执行。
-        """
-        # 预提取目标区域的边界，避免在循环中重复调用
-        bminx, bminy, bmaxx, bmaxy = b_shapely.bounds
-
-        # 预提取 via 形状的相对边界
-        via_b_left, via_b_bottom, via_b_right, via_b_top = via_shape.bounds
-
-        valid_coords_in_batch = []
-        for x, y in candidate_batch:
-            # 2. 快速边界框预筛选 (Coarse Bounding Box Check)
-            # 检查移动后的 via 的边界框是否完全在目标区域的边界框内部
-            # 这比原来的点检查更精确，能过滤掉更多无效情况
-            if not (
-                    x + via_b_left >= bminx and
-                    y + via_b_bottom >= bminy and
-                    x + via_b_right <= bmaxx and
-                    y + via_b_top <= bmaxy
-            ):
-                continue
-
-            # 3. 精确几何包含检查 (Precise Containment Check)
-            # 只有通过了快速筛选的点，才进行昂贵的几何操作
-            via_moved = translate(via_shape, xoff=x, yoff=y)
-            if b_shapely.contains(via_moved):
-                valid_coords_in_batch.append((x, y))
-
-        return valid_coords_in_batch
-
-    # 4. 准备批处理任务
-    # 动态计算一个合理的批大小。这个值可以根据机器性能和数据规模调整。
-    # 一个经验法则是让每个核心至少能分到几个任务。
-    num_cores = 6
-    batch_size = max(1, len(candidates) // (num_cores * 4))
-
-    # 将所有候选点分割成多个批次
-    candidate_batches = [
-        candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)
-    ]
-
-    # 5. 并行执行批处理任务
-    # backend='loky' 或 'multiprocessing' 通常比 'threading' 更适合CPU密集型任务
-    # 因为它可以绕开Python的全局解释器锁 (GIL)。
-    results = Parallel(n_jobs=num_cores, backend="loky")(
-        delayed(process_batch)(batch, b_shapely, via_shape) for batch in candidate_batches
-    )
-
-    # 6. 收集并合并所有结果
-    # results 将是一个列表的列表，例如 [[(x1,y1)], [(x2,y2), (x3,y3)], ...]
-    # 我们需要将其展平为一个单一的坐标列表
-    valid_coords = [coord for batch_result in results for coord in batch_result]
-
-    # =============================================================
-    # 插入 via
-    for x, y in valid_coords:
-        via_ref = via_array << via
-        via_ref.move((x, y))
-
-    return via_array
-
-@gf.cell
+@canonical_cell
+@geometry_cell
 def ViaArray_optimized(
         CompEn: Component,
         WidthVia: float = 0.5,
@@ -486,133 +1350,17 @@ def ViaArray_optimized(
         Enclosure: float = 2.0,
         arraylayer: LayerSpec = (1,0),
         vialayer: LayerSpec = (2,0),
+        TileSize: float | None = None,
 ) -> Component:
     """
     在给定组件 (`CompEn`) 的指定图层 (`arraylayer`) 形成的区域内，
     根据内缩值 (`Enclosure`)，高效地生成一个过孔阵列（并行优化版）。
 
-    参数说明见原始文档。
+    与 `ViaArray` 共用同一矢量化核心，输出完全相同。参数说明见 `ViaArray`。
     """
-
-    via_array = gf.Component()
-    B = gf.Component()
-    Cw = gf.Section(width=WidthVia,layer=vialayer)
-    Xw = gf.CrossSection(sections=(Cw,))
-    via = gf.components.straight(length=WidthVia,cross_section=Xw)
-    viabox = via.bbox()
-
-    # ========== 关键优化1：预处理目标区域 ==========
-    B0 = CompEn.copy()
-    Br = B0.get_region(layer=arraylayer)
-    Br.size(-Enclosure * 1000)
-    B.add_polygon(Br, layer=arraylayer)
-    b_polys = B.get_polygons_points(by='tuple')
-
-    if arraylayer not in b_polys or not b_polys[arraylayer]:
-        return via_array
-
-
-    # 合并所有 polygon 为 shapely 区域
-    b_shapely = unary_union([Polygon(poly) for poly in b_polys[arraylayer]])
-    if b_shapely.is_empty:
-        return via_array
-
-    # 预生成单个 via 形状（基于 0 原点）
-    via_shape = box(viabox.left, viabox.bottom, viabox.right, viabox.top)
-
-    # 计算布孔区域边界 + 网格坐标
-    min_x, min_y, max_x, max_y = b_shapely.bounds
-    cols = int((max_x - min_x - WidthVia) // Spacing) + 5
-    rows = int((max_y - min_y - WidthVia) // Spacing) + 5
-    x_centers = min_x + WidthVia / 2 + Spacing * np.arange(cols)
-    y_centers = min_y + WidthVia / 2 + Spacing * np.arange(rows)
-
-    # 将 candidate 点转换为 numpy 坐标对
-    candidates = np.array(np.meshgrid(x_centers, y_centers)).reshape(2, -1).T
-
-    # 提取目标区域 bounding box，用于快速预筛
-    bminx, bminy, bmaxx, bmaxy = b_shapely.bounds
-
-    def is_inside_fast(x, y):
-        # 粗筛：如果完全在 bounding box 外，则跳过
-        if not (bminx <= x <= bmaxx and bminy <= y <= bmaxy):
-            return None
-        # 精筛：实际形状是否包含该 via
-        via_moved = translate(via_shape, xoff=x, yoff=y)
-        if b_shapely.contains(via_moved):
-            return (x, y)
-        return None
-
-    # =================== 优化方案：并行批处理 + 内部矢量化 (混合方案) ===================
-    # 确保你安装了最新版的 shapely: pip install shapely --upgrade
-
-    def process_batch_vectorized(candidate_batch, b_shapely, via_half_width):
-        """
-        一个并行的工作函数，它使用矢量化操作处理一个批次的候选点。
-
-        参数:
-        - candidate_batch: 一个Numpy数组，形状为 (N, 2)，包含 [x, y] 坐标。
-        - b_shapely: 目标区域的Shapely几何对象。
-        - via_half_width: 过孔宽度的一半。
-        """
-        # 如果收到的批次是空的，直接返回
-        if candidate_batch.shape[0] == 0:
-            return []
-
-        # 1. 矢量化创建几何对象 (仅针对当前批次)
-        # 对批次内的所有坐标点，一次性创建出对应的过孔方块(box)的几何对象。
-        # 这是内存开销最大的部分，但由于我们是按批处理，所以内存是可控的。
-        via_boxes_in_batch = [
-            box(x - via_half_width, y - via_half_width, x + via_half_width, y + via_half_width)
-            for x, y in candidate_batch
-        ]
-
-        # 2. 关键的矢量化判断
-        # 对当前批次的所有 via_boxes，进行一次性的、高效的“包含”判断。
-        # b_shapely.contains() 会返回一个布尔值的列表或数组。
-        contains_mask = b_shapely.contains(via_boxes_in_batch)
-
-        # 3. 使用布尔掩码过滤
-        # 从原始的坐标批次中，根据上面的判断结果，筛选出有效的坐标。
-        valid_coords_in_batch = candidate_batch[contains_mask]
-
-        # 以列表形式返回有效的坐标
-        return valid_coords_in_batch.tolist()
-
-    # -------------------- 在你的主函数中调用 --------------------
-
-    # a. 预先计算过孔的半宽，避免在循环中重复计算
-    via_half_width = WidthVia / 2.0
-
-    # b. 设定批处理参数 (与之前相同)
-    # 经验值：让每个核心至少能分到 8~16 个任务，以实现最佳负载均衡
-    num_cores = 6
-    batch_size = max(1, len(candidates) // (num_cores * 16))
-
-    # 将所有候选点分割成多个批次
-    # 确保 candidates 是一个 numpy array 以支持高级索引
-    candidates = np.array(candidates)
-    candidate_batches = [
-        candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)
-    ]
-
-    # c. 并行执行新的、内部矢量化的批处理任务
-    # backend='loky' 是最稳定和推荐的CPU密集型任务后端
-    results = Parallel(n_jobs=num_cores, backend="loky")(
-        delayed(process_batch_vectorized)(batch, b_shapely, via_half_width) for batch in candidate_batches
-    )
-
-    # d. 收集并合并所有结果
-    valid_coords = [coord for sublist in results for coord in sublist]
-
-    # =================================================================================
-
-    # 插入 via
-    for x, y in valid_coords:
-        via_ref = via_array << via
-        via_ref.move((x, y))
-
-    return via_array
+    return _build_via_array(CompEn, WidthVia, Spacing, Enclosure, arraylayer, vialayer, TileSize)
 
 
-__all__ = ['SnakeHeater', 'ViaArray', 'DifferentHeater','ViaArrayParallel','ViaArray_optimized']
+__all__ = ['SnakeHeater', 'ViaArray', 'DifferentHeater', 'DifferentHeaterBatch', 'heater_metrics','ViaArrayParallel','ViaArray_optimized',
+           'configure_via_pool', 'shutdown_via_pool', 'iter_via_sites',
+           'configure_via_cache', 'clear_via_cache', 'via_cache_info']
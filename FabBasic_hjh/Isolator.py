@@ -3,7 +3,7 @@ from .Ring import *
 
 
 # %% SingleRingIsolator0: SingleRingIsolator:ADD-DROP ring + monitor
-@gf.cell
+@geometry_cell
 def SingleRingIsolator0(
         r_ring: float = 120,
         r_euler_false: float = 90,
@@ -146,7 +146,7 @@ def SingleRingIsolator0(
 
 
 # %% SingleRingIsolator1: SingleRingIsolator:ADD-DROP ring + monitor
-@gf.cell
+@geometry_cell
 def SingleRingIsolator1(
         r_ring: float = 120,
         r_euler_false: float = 100,
@@ -291,7 +291,7 @@ def SingleRingIsolator1(
 
 
 # %% RingAndIsolator0:Ring and SingleRingIsolator0: ring for comb and ADD-DROP ring
-@gf.cell
+@geometry_cell
 def RingAndIsolator0(
         r_ring: float = 120,
         r_euler_false: float = 100,
@@ -3,7 +3,7 @@ from .RaceTrack import *
 from .Ring import *
 
 # %% Double RaceTrack Cavity
-@gf.cell
+@geometry_cell
 def DoubleRaceTrack(
         WidthRing: float = 8,
         WidthNear: float = 5,
@@ -4,7 +4,7 @@ from .Ring import *
 
 
 # %% DoubleRingPulley
-@gf.cell
+@geometry_cell
 def DoubleRingPulley(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -124,7 +124,7 @@ def DoubleRingPulley(
 
 
 # %% DoubleRingPulley2：Snake Heater
-@gf.cell
+@geometry_cell
 def DoubleRingPulley2HSn(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -164,7 +164,7 @@ def DoubleRingPulley2HSn(
 
 
 # %% DoubleRingPulley2：Snake Heater & ring to ring round
-@gf.cell
+@geometry_cell
 def DoubleRingPulley2_1HSn(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -205,7 +205,7 @@ def DoubleRingPulley2_1HSn(
 
 
 # %% ADRAPRADR: ADRing + APRing + ADRing (with crossing ?)
-@gf.cell
+@geometry_cell
 def ADRAPRADR(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -304,7 +304,7 @@ def ADRAPRADR(
     add_labels_to_ports(TriRing)
     return TriRing
 
-@gf.cell
+@geometry_cell
 def TriRingPulley(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -435,7 +435,7 @@ def TriRingPulley(
     return c
 
 # %% CoupleCavity
-@gf.cell
+@geometry_cell
 def CoupleRingDRT1(
         WidthRing1: float = 1,
         WidthNear1: float = 0.9,
@@ -1,9 +1,9 @@
 from .BasicDefine import *
 from .ELE import *
-from .Heater import DifferentHeater
+from .Heater import DifferentHeater, DifferentHeaterBatch
 from .SnapMerge import *
 # %% RaceTrackPulley
-@gf.cell
+@geometry_cell
 def RaceTrackP(
         WidthRing: float = 8,
         WidthNear: float = 5,
@@ -62,8 +62,8 @@ def RaceTrackP(
     wgnear = gf.CrossSection(sections=[secnring])
     # run ring path
     rrun1 = gf.path.straight(length=LengthRun / 2)
-    rring1 = gf.path.arc(radius=RadiusRing, angle=70)
-    rring2 = gf.path.arc(radius=RadiusRing, angle=-70)
+    rring1 = GfPathArc(radius=RadiusRing, angle=70)
+    rring2 = GfPathArc(radius=RadiusRing, angle=-70)
     rb1 = euler_Bend_Half(radius=RadiusRing, angle=20, p=0.5)
     rb2 = euler_Bend_Half(radius=RadiusRing, angle=-20, p=0.5)
     RingPath1 = rring1 + rb1 + rrun1
@@ -82,8 +82,8 @@ def RaceTrackP(
     c.add_port("RingBmid2", port=RP4.ports["o1"])
     # out port
     r_delta = WidthRing / 2 + GapCouple + WidthNear / 2
-    rcoup1 = gf.path.arc(radius=RadiusRing + r_delta, angle=-AngleCouple / 2)
-    rcoup2 = gf.path.arc(radius=RadiusRing + r_delta, angle=AngleCouple / 2)
+    rcoup1 = GfPathArc(radius=RadiusRing + r_delta, angle=-AngleCouple / 2)
+    rcoup2 = GfPathArc(radius=RadiusRing + r_delta, angle=AngleCouple / 2)
     rcb1 = euler_Bend_Half(radius=RadiusRing + r_delta, angle=-AngleCouple / 2, p=0.5)
     rcb2 = euler_Bend_Half(radius=RadiusRing + r_delta, angle=AngleCouple / 2, p=0.5)
     RingCoup1 = rcoup1 + rcb2
@@ -115,28 +115,47 @@ def RaceTrackP(
     print("length="+str(RingPath1.length()*4))
     if HeaterConfig:
         rrun1 = gf.path.straight(length=LengthRun / 2)
-        rring1 = gf.path.arc(radius=RadiusRing, angle=45)
-        rring2 = gf.path.arc(radius=RadiusRing, angle=-70)
+        rring1 = GfPathArc(radius=RadiusRing, angle=45)
+        rring2 = GfPathArc(radius=RadiusRing, angle=-70)
         rb1 = euler_Bend_Half(radius=RadiusRing/2, angle=45, p=0.5)
         rb2 = euler_Bend_Half(radius=RadiusRing, angle=-20, p=0.5)
         HeatPath1 = rring1 + rb1
         HeatPath2 = rring2 + rb2+ rrun1
         HeatPath3 = rrun1
         heater = gf.Component()
-        RHP1 = heater << DifferentHeater(PathHeat=HeatPath1,WidthWG=WidthRing,HeaterConfig=HeaterConfig)
-        RHP2 = heater << DifferentHeater(PathHeat=HeatPath2,WidthWG=WidthRing,HeaterConfig=HeaterConfig)
-        RHP3 = heater << DifferentHeater(PathHeat=HeatPath3,WidthWG=WidthRing,HeaterConfig=HeaterConfig)
-        RHP2.connect("HeatIn", other=RHP1.ports["HeatIn"])
-        RHP3.connect("HeatOut", other=RHP2.ports["HeatOut"])
-        heater.add_port("HeatBmid1", port=RHP1.ports["HeatIn"])
-        heater.add_port("HeatBmid2", port=RHP2.ports["HeatIn"])
-        heater.add_port("HeatIn", port=RHP3.ports["HeatIn"])
-        heater.add_port("HeatOut",port=RHP1.ports["HeatOut"])
+        if HeaterConfig.TypeHeater in ("default", "side", "multi", "spilt"):
+            # 这些类型的 HeatIn/HeatOut 即路径的起点/终点，按原先 connect 的方式算出各段的摆放，三段一次生成；
+            # 路径本身不旋转，'spilt' 的过孔仍在各段自身的坐标系中计算，与逐段放置 DifferentHeater 相同
+            def port_trans(path, end):
+                point = path.points[-1] if end else path.points[0]
+                angle = path.end_angle if end else path.start_angle + 180
+                return gf.kdb.DCplxTrans(1, angle, False, point[0], point[1])
+            R180 = gf.kdb.DCplxTrans.R180
+            t2 = port_trans(HeatPath1, False) * R180 * port_trans(HeatPath2, False).inverted()
+            t3 = t2 * port_trans(HeatPath2, True) * R180 * port_trans(HeatPath3, True).inverted()
+            placements = [None] + [(t.disp.x, t.disp.y, t.angle, t.is_mirror()) for t in (t2, t3)]
+            heater_batch = DifferentHeaterBatch([HeatPath1, HeatPath2, HeatPath3], WidthWG=WidthRing,
+                                                HeaterConfig=HeaterConfig, placements=placements)
+            heater << heater_batch
+            RHP1, RHP2, RHP3 = [
+                {port.name.removeprefix(f"H{i}_"): port for port in heater_batch.ports if port.name.startswith(f"H{i}_")}
+                for i in range(3)]
+        else:
+            RHP1 = heater << DifferentHeater(PathHeat=HeatPath1,WidthWG=WidthRing,HeaterConfig=HeaterConfig)
+            RHP2 = heater << DifferentHeater(PathHeat=HeatPath2,WidthWG=WidthRing,HeaterConfig=HeaterConfig)
+            RHP3 = heater << DifferentHeater(PathHeat=HeatPath3,WidthWG=WidthRing,HeaterConfig=HeaterConfig)
+            RHP2.connect("HeatIn", other=RHP1.ports["HeatIn"])
+            RHP3.connect("HeatOut", other=RHP2.ports["HeatOut"])
+            RHP1, RHP2, RHP3 = RHP1.ports, RHP2.ports, RHP3.ports
+        heater.add_port("HeatBmid1", port=RHP1["HeatIn"])
+        heater.add_port("HeatBmid2", port=RHP2["HeatIn"])
+        heater.add_port("HeatIn", port=RHP3["HeatIn"])
+        heater.add_port("HeatOut",port=RHP1["HeatOut"])
         if HeaterConfig.TypeHeater == 'spilt':
-            heater.add_port("HeatLIn", port=RHP3.ports["HeatLIn"])
-            heater.add_port("HeatRIn", port=RHP3.ports["HeatRIn"])
-            heater.add_port("HeatLOut", port=RHP1.ports["HeatLOut"])
-            heater.add_port("HeatROut", port=RHP1.ports["HeatROut"])
+            heater.add_port("HeatLIn", port=RHP3["HeatLIn"])
+            heater.add_port("HeatRIn", port=RHP3["HeatRIn"])
+            heater.add_port("HeatLOut", port=RHP1["HeatLOut"])
+            heater.add_port("HeatROut", port=RHP1["HeatROut"])
         heater = snap_all_polygons_iteratively(heater)
         h = c << heater
         h.connect("HeatBmid1",c.ports["RingBmid1"],allow_width_mismatch=True,allow_layer_mismatch=True)
@@ -144,15 +163,15 @@ def RaceTrackP(
             h.mirror_x(RP1.ports["o1"].center[0])
         # h.mirror_x(h.ports["HeatBmid1"].center[0])
         if HeaterConfig.TypeHeater == "side":
-            heater.add_port("HeatSIn", port=RHP3.ports["HeatSIn"])
-            heater.add_port("HeatSOut", port=RHP1.ports["HeatSOut"])
+            heater.add_port("HeatSIn", port=RHP3["HeatSIn"])
+            heater.add_port("HeatSOut", port=RHP1["HeatSOut"])
         for port in h.ports:
             c.add_port(port.name, port=port)
     return c
 
 
 # %% RaceTrackPulley2
-@gf.cell
+@geometry_cell
 def RaceTrackS(
         WidthRing: float = 8,
         LengthRun: float = 200,
@@ -224,9 +243,9 @@ def RaceTrackS(
     # run ring path
     CRaceTrack = gf.Component()
     rrun1 = gf.path.straight(length=LengthRun / 2)
-    rring1 = gf.path.arc(radius=RadiusRing, angle=60)
-    rring2 = gf.path.arc(radius=RadiusRing, angle=-60)
-    rring3 = gf.path.arc(radius=RadiusRing, angle=-30)
+    rring1 = GfPathArc(radius=RadiusRing, angle=60)
+    rring2 = GfPathArc(radius=RadiusRing, angle=-60)
+    rring3 = GfPathArc(radius=RadiusRing, angle=-30)
     rb1 = euler_Bend_Half(radius=RadiusRing, angle=30, p=0.5)
     rb2 = euler_Bend_Half(radius=RadiusRing, angle=-30, p=0.5)
     rbh1 = euler_Bend_Half(radius=RadiusRing-4*HeaterConfig.WidthRoute, angle=-60, p=0.5)
@@ -359,8 +378,8 @@ def RaceTrackStrHC(
     # run ring path
     CRaceTrack = gf.Component()
     rrun1 = gf.path.straight(length=LengthRun / 2)
-    rring1 = gf.path.arc(radius=RadiusRing, angle=60)
-    rring2 = gf.path.arc(radius=RadiusRing, angle=-60)
+    rring1 = GfPathArc(radius=RadiusRing, angle=60)
+    rring2 = GfPathArc(radius=RadiusRing, angle=-60)
     rb1 = euler_Bend_Half(radius=RadiusRing, angle=30, p=0.5)
     rb2 = euler_Bend_Half(radius=RadiusRing, angle=-30, p=0.5)
     RingPath1 = rring1 + rb1 + rrun1
@@ -483,7 +502,7 @@ def RaceTrackStrHC(
     return c
 
 # %% TaperRaceTrackPulley:ringcouple +taper straight
-@gf.cell
+@geometry_cell
 def TaperRaceTrackPulley(
         WidthRing: float = 4,
         WidthNear: float = 3,
@@ -535,8 +554,8 @@ def TaperRaceTrackPulley(
     wgnear = gf.CrossSection(sections=[secnring])
     LengthRun = (LengthRun - LengthTaper >= 0) * (LengthRun - LengthTaper) + LengthTaper
     # run ring path
-    rring1 = gf.path.arc(radius=RadiusRing, angle=60)
-    rring2 = gf.path.arc(radius=RadiusRing, angle=-60)
+    rring1 = GfPathArc(radius=RadiusRing, angle=60)
+    rring2 = GfPathArc(radius=RadiusRing, angle=-60)
     rb1 = euler_Bend_Half(radius=RadiusRing, angle=30, p=0.5)
     rb2 = euler_Bend_Half(radius=RadiusRing, angle=-30, p=0.5)
     RingPath = list(range(2))
@@ -566,8 +585,8 @@ def TaperRaceTrackPulley(
     RP[3].connect("o1", other=RP[2].ports["o1"])
     # out port
     r_delta = WidthRing / 2 + GapCouple + WidthNear / 2
-    rcoup1 = gf.path.arc(radius=RadiusRing + r_delta, angle=-AngleCouple / 2)
-    rcoup2 = gf.path.arc(radius=RadiusRing + r_delta, angle=AngleCouple / 2)
+    rcoup1 = GfPathArc(radius=RadiusRing + r_delta, angle=-AngleCouple / 2)
+    rcoup2 = GfPathArc(radius=RadiusRing + r_delta, angle=AngleCouple / 2)
     rcb1 = euler_Bend_Half(radius=RadiusRing + r_delta, angle=-AngleCouple / 2, p=0.5)
     rcb2 = euler_Bend_Half(radius=RadiusRing + r_delta, angle=AngleCouple / 2, p=0.5)
     RingCoup1 = rcoup1 + rcb2
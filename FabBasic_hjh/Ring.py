@@ -6,7 +6,7 @@ from .Heater import SnakeHeater, DifferentHeater
 from .SnapMerge import *
 
 # %% RingPulley1:straight pulley
-@gf.cell
+@geometry_cell
 def RingPulley(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -66,7 +66,7 @@ def RingPulley(
 
 
 # %% RingPulley1DC: 不同耦合器
-@gf.cell
+@geometry_cell
 def RingPulley1DC(
         WidthRing: float = 1,
         WidthNear1: float = 0.9,
@@ -122,7 +122,7 @@ def RingPulley1DC(
 
 
 # %% RingPulley1HS: 加热侧
-@gf.cell
+@geometry_cell
 def RingPulley1HS(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -176,7 +176,7 @@ def RingPulley1HS(
 
 
 # %% RingPulley1HSn: 加热蛇形
-@gf.cell
+@geometry_cell
 def RingPulley1HSn(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -228,7 +228,7 @@ def RingPulley1HSn(
 
 
 # %% RingPulley2: 滑轮输入输出
-@gf.cell
+@geometry_cell
 def RingPulley2(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -269,7 +269,7 @@ def RingPulley2(
 
 
 # %% RingPulley2ES: 滑轮输入输出 + 电子线路
-@gf.cell
+@geometry_cell
 def RingPulley2ES(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -311,7 +311,7 @@ def RingPulley2ES(
 
 
 # %% RingPulley3: 大角度耦合器
-@gf.cell
+@geometry_cell
 def RingPulley3(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -346,10 +346,10 @@ def RingPulley3(
     """
     c = gf.Component()
     # 光学部分
-    ring_path90 = gf.path.arc(radius=RadiusRing, angle=90)
+    ring_path90 = GfPathArc(radius=RadiusRing, angle=90)
     ring_path_all = ring_path90 + ring_path90 + ring_path90 + ring_path90
     ring_comp = c << gf.path.extrude(ring_path_all, width=WidthRing, layer=oplayer)
-    couple_path_ring = gf.path.arc(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2, angle=AngleCouple / 2)
+    couple_path_ring = GfPathArc(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2, angle=AngleCouple / 2)
     couple_path_euler = euler_Bend_Half(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2,
                                         angle=(180 - AngleCouple) / 2, p=0.5)
     couple_path = couple_path_ring + couple_path_euler
@@ -369,7 +369,7 @@ def RingPulley3(
 
 
 # %% RingPulley4: 大角度耦合器
-@gf.cell
+@geometry_cell
 def RingPulley4(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -395,10 +395,10 @@ def RingPulley4(
     """
     c = gf.Component()
     # 光学部分
-    ring_path90 = gf.path.arc(radius=RadiusRing, angle=90)
+    ring_path90 = GfPathArc(radius=RadiusRing, angle=90)
     ring_path_all = ring_path90 + ring_path90 + ring_path90 + ring_path90
     ring_comp = c << gf.path.extrude(ring_path_all, width=WidthRing, layer=oplayer)
-    couple_path_ring = gf.path.arc(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2, angle=AngleCouple / 2)
+    couple_path_ring = GfPathArc(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2, angle=AngleCouple / 2)
     couple_path_euler_up = euler_Bend_Half(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2,
                                            angle=(270 - AngleCouple) / 2, p=1)
     couple_path_euler_down = euler_Bend_Half(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2,
@@ -423,7 +423,7 @@ def RingPulley4(
 
 
 # %% RingFinger: 山形环形结构
-@gf.cell
+@geometry_cell
 def RingFinger(
         WidthRing: float = 1,
         WidthNear: float = 0.9,
@@ -473,16 +473,16 @@ def RingFinger(
     S_couple = gf.Section(width=WidthNear, layer=oplayer, port_names=["o1", "o2"])
     CS_ring = gf.CrossSection(sections=[S_ring])
     CS_couple = gf.CrossSection(sections=[S_couple])
-    path_arc_ring = gf.path.arc(radius=RadiusCouple, angle=45)
+    path_arc_ring = GfPathArc(radius=RadiusCouple, angle=45)
     path_str_ring = gf.path.straight(length=LengthCouple)
     path_euler_ring = euler_Bend_Half(radius=RadiusCouple, angle=45)
-    path_arc_couple = gf.path.arc(radius=RadiusCouple + WidthRing / 2 + GapRing + WidthNear / 2, angle=AngleCouple / 2)
+    path_arc_couple = GfPathArc(radius=RadiusCouple + WidthRing / 2 + GapRing + WidthNear / 2, angle=AngleCouple / 2)
     path_euler_couple = gf.path.euler(radius=RadiusCouple + WidthRing / 2 + GapRing + WidthNear / 2,
                                       angle=-AngleCouple / 2)
     path_euler_side = gf.path.euler(radius=RadiusSide, angle=-AngleSide)
     path_euler_side2 = gf.path.euler(radius=RadiusSide, angle=AngleSide)
     path_str_side = gf.path.straight(length=LengthSide)
-    path_arc_connect = gf.path.arc(radius=RadiusSide, angle=90)
+    path_arc_connect = GfPathArc(radius=RadiusSide, angle=90)
     path_str_connect = gf.path.straight(length=LengthConnect)
     path_ring = path_arc_ring + path_euler_ring + path_str_ring
     path_side = path_euler_side + path_str_side
@@ -525,7 +525,7 @@ def RingFinger(
 
 
 # %% RingPulleyT1: 通用环形耦合器
-@gf.cell
+@geometry_cell
 def RingPulleyT1(
         WidthRing: float = 1.0,
         WidthNear: float = 0.9,
@@ -600,12 +600,12 @@ def RingPulleyT1(
             AngleCouple2 = AngleCouple
         IsAD = True
     # 光学部分：创建环形波导
-    ring_path90 = gf.path.arc(radius=RadiusRing, angle=90)  # 创建 90 度的圆弧路径
+    ring_path90 = GfPathArc(radius=RadiusRing, angle=90)  # 创建 90 度的圆弧路径
     ring_path_all = ring_path90 + ring_path90 + ring_path90 + ring_path90  # 拼接成完整的环形路径
     ring_comp = c << gf.path.extrude(ring_path_all, width=WidthRing, layer=oplayer)  # 将路径转换为波导
 
     # 创建耦合波导
-    couple_path_ring = gf.path.arc(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2,
+    couple_path_ring = GfPathArc(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2,
                                    angle=AngleCouple / 2)  # 创建耦合圆弧路径
     couple_path_euler = euler_Bend_Half(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2,
                                         angle=-AngleCouple / 2)  # 创建欧拉弯曲路径
@@ -631,7 +631,7 @@ def RingPulleyT1(
     c.add_port(name="RingC", center=[0, RadiusRing], orientation=90, width=WidthRing, layer=oplayer)  # 添加中间环形端口
     # Add-Drop 端口
     if IsAD:
-        couple_path_ring2 = gf.path.arc(radius=RadiusRing + GapRing2 + WidthNear2 / 2 + WidthRing / 2,
+        couple_path_ring2 = GfPathArc(radius=RadiusRing + GapRing2 + WidthNear2 / 2 + WidthRing / 2,
                                         angle=AngleCouple2 / 2)  # 创建耦合圆弧路径
         couple_path_euler2 = euler_Bend_Half(radius=RadiusRing + GapRing2 + WidthNear2 / 2 + WidthRing / 2,
                                              angle=-AngleCouple2 / 2)  # 创建欧拉弯曲路径
@@ -660,7 +660,7 @@ def RingPulleyT1(
 
 
 # %% RingPulleyT2: 通用环形耦合器2
-@gf.cell
+@geometry_cell
 def RingPulleyT2(
         WidthRing: float = 1.0,
         WidthNear: float = 0.9,
@@ -705,12 +705,12 @@ def RingPulleyT2(
     """
     c = gf.Component()
     # 光学部分：创建环形波导
-    ring_path90 = gf.path.arc(radius=RadiusRing, angle=90)
+    ring_path90 = GfPathArc(radius=RadiusRing, angle=90)
     ring_path_all = ring_path90 + ring_path90 + ring_path90 + ring_path90
     ring_comp = c << gf.path.extrude(ring_path_all, width=WidthRing, layer=oplayer)
 
     # 光学部分：创建耦合波导
-    couple_path_ring = gf.path.arc(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2, angle=AngleCouple / 2)
+    couple_path_ring = GfPathArc(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2, angle=AngleCouple / 2)
     couple_path_euler = euler_Bend_Half(radius=RadiusRing + GapRing + WidthNear / 2 + WidthRing / 2,
                                         angle=(90 - AngleCouple) / 2, p=1)
     couple_path = couple_path_ring + couple_path_euler
@@ -738,7 +738,7 @@ def RingPulleyT2(
 
 
 # %% different heater
-@gf.cell
+@geometry_cell
 def DifferentHeater_local(
         c: Component = None,
         WidthRing: float = 1,
@@ -794,7 +794,7 @@ def DifferentHeater_local(
     vialayer = HeaterConfig.LayerVia
     if TypeHeater == "default":
         # 默认加热电极
-        heat_path = gf.path.arc(radius=RadiusRing, angle=60)  # 创建加热电极路径
+        heat_path = GfPathArc(radius=RadiusRing, angle=60)  # 创建加热电极路径
         heatout_path1 = euler_Bend_Half(radius=RadiusRing / 2, angle=30)  # 创建欧拉弯曲路径
         heatout_path2 = euler_Bend_Half(radius=20, angle=-60)  # 创建欧拉弯曲路径
         heatL_comp1 = h << gf.path.extrude(heat_path + heatout_path2, width=WidthHeat, layer=heatlayer)  # 创建左侧加热电极
@@ -824,7 +824,7 @@ def DifferentHeater_local(
         c.add_port(name="HeatOut", port=heater.ports["HeatOut"])  # 添加加热输出端口
     elif TypeHeater == "snake":
         # 蛇形加热电极
-        heat_path = gf.path.arc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
+        heat_path = GfPathArc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
         heatout_path1 = euler_Bend_Half(radius=20, angle=30, use_eff=True)  # 创建欧拉弯曲路径
         heatout_path2 = euler_Bend_Half(radius=20, angle=-60, use_eff=True)  # 创建欧拉弯曲路径
         HPart = [
@@ -862,7 +862,7 @@ def DifferentHeater_local(
         c.add_port(name="HeatOut", port=heater.ports["HeatOut"])  # 添加加热输出端口
     elif TypeHeater == "side":
         # 侧边加热电极
-        heat_path = gf.path.arc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
+        heat_path = GfPathArc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
         heatout_path1 = euler_Bend_Half(radius=RadiusRing / 2, angle=30)  # 创建欧拉弯曲路径
         heatout_path2 = euler_Bend_Half(radius=RadiusRing / 2, angle=-30)  # 创建欧拉弯曲路径
         heatout_path3 = euler_Bend_Half(radius=RadiusRing / 4, angle=60)  # 创建欧拉弯曲路径
@@ -896,7 +896,7 @@ def DifferentHeater_local(
     elif TypeHeater == "inside":
         # 内部加热电极
         DeltaHeat=-abs(DeltaHeat)
-        heat_path = gf.path.arc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
+        heat_path = GfPathArc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
         heatout_path1 = euler_Bend_Half(radius=RadiusRing / 2, angle=30)  # 创建欧拉弯曲路径
         heatout_path2 = euler_Bend_Half(radius=RadiusRing / 2, angle=-30)  # 创建欧拉弯曲路径
         heatout_path3 = euler_Bend_Half(radius=RadiusRing / 4, angle=75)  # 创建欧拉弯曲路径
@@ -930,7 +930,7 @@ def DifferentHeater_local(
     elif TypeHeater == "insideP":
         # 内部加热电极,电极的加热口平行出
         DeltaHeat=-abs(DeltaHeat)
-        heat_path = gf.path.arc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
+        heat_path = GfPathArc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
         heatout_path1 = euler_Bend_Half(radius=RadiusRing / 2, angle=30)  # 创建欧拉弯曲路径
         heatout_path2 = euler_Bend_Half(radius=RadiusRing / 2, angle=-30)  # 创建欧拉弯曲路径
         heatout_path3 = euler_Bend_Half(radius=RadiusRing / 4, angle=30)  # 创建欧拉弯曲路径
@@ -964,10 +964,10 @@ def DifferentHeater_local(
     elif TypeHeater == "bothside":
         DeltaHeat = abs(DeltaHeat)
         # 侧边加热电极
-        heat_path_int1 = gf.path.arc(radius=RadiusRing - DeltaHeat, angle=90)  # 创建加热电极路径
-        heat_path_ext1 = gf.path.arc(radius=RadiusRing + DeltaHeat, angle=90)  # 创建加热电极路径
-        heat_path_int2 = gf.path.arc(radius=RadiusRing - DeltaHeat, angle=60)  # 创建加热电极路径
-        heat_path_ext2 = gf.path.arc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
+        heat_path_int1 = GfPathArc(radius=RadiusRing - DeltaHeat, angle=90)  # 创建加热电极路径
+        heat_path_ext1 = GfPathArc(radius=RadiusRing + DeltaHeat, angle=90)  # 创建加热电极路径
+        heat_path_int2 = GfPathArc(radius=RadiusRing - DeltaHeat, angle=60)  # 创建加热电极路径
+        heat_path_ext2 = GfPathArc(radius=RadiusRing + DeltaHeat, angle=60)  # 创建加热电极路径
         heatout_path1 = euler_Bend_Half(radius=RadiusRing / 5, angle=-60)  # 创建欧拉弯曲路径
         heatLint_comp1 = h << gf.path.extrude(heat_path_int2 + heatout_path1, width=WidthHeat,
                                               layer=heatlayer)  # 创建左侧加热电极
@@ -1053,8 +1053,8 @@ def DifferentHeater_local(
         # section2 = gf.Section(width=WidthHeat1, offset=-DeltaHeat, layer=heatlayer, port_names=("HeatExtIn", "HeatExtOut"))
         Xdbs = gf.CrossSection(sections=sections_tuple)
         # 侧边加热电极路径
-        heat_path_ringhalf = gf.path.arc(radius=RadiusRing, angle=150)  # 创建加热电极路径
-        heat_path_ring = gf.path.arc(radius=RadiusRing, angle=300)  # 创建加热电极路径
+        heat_path_ringhalf = GfPathArc(radius=RadiusRing, angle=150)  # 创建加热电极路径
+        heat_path_ring = GfPathArc(radius=RadiusRing, angle=300)  # 创建加热电极路径
         heatout_pathB1 = euler_Bend_Half(radius=RadiusRing/5, angle=-60)  # Backward
         heatout_pathF2 = euler_Bend_Half(radius=RadiusRing/5, angle=-60,direction="Forward")  # 创建欧拉弯曲路径
         path_total = heat_path_ring
@@ -1081,11 +1081,13 @@ def DifferentHeater_local(
         S_route2 = gf.Section(width=WidthRoute, offset=-(DeltaHeat), layer=routelayer, port_names=("r2o1", "r2o2"))
         X_Heat = gf.CrossSection(sections=[S_route1, S_route2])
         # 默认加热电极
-        heat_path = gf.path.arc(radius=RadiusRing, angle=120)  # 创建加热电极路径
-        route_path = gf.path.arc(radius=RadiusRing, angle=60)
+        heat_path = GfPathArc(radius=RadiusRing, angle=120)  # 创建加热电极路径
+        route_path = GfPathArc(radius=RadiusRing, angle=60)
         out_path = gf.path.euler(radius=20, angle=60)
         out_path2 = gf.path.euler(radius=20, angle=-60)
         heat_path.rotate(-60)
+        # 两侧是同一个 DifferentHeater 单元的两个引用，第二次调用直接命中单元缓存；
+        # 改用 DifferentHeaterBatch 反而要把同一段加热器生成两次，因此这里保持逐个引用
         heatL_comp = h << DifferentHeater(heat_path, WidthWG=WidthRing,HeaterConfig=HeaterConfig)  # 创建左侧加热电极
         heatL_comp.connect("HeatIn", c.ports["RingL"], allow_layer_mismatch=True, mirror=True,
                            allow_width_mismatch=True)  # 连接并镜像
@@ -1,9 +1,24 @@
 from .BasicDefine import *
 import gdsfactory as gf
+import datetime
+import hashlib
+import os
+import struct
+import sys
+import time
+import warnings
+from collections import OrderedDict, deque
 import numpy as np
+import shapely
+try:
+    import resource
+except ImportError:  # Windows 上没有 resource 模块，不统计内存峰值
+    resource = None
 from gdsfactory.typings import  ComponentSpec, LayerSpecs
 from shapely.ops import unary_union
 from shapely.geometry import Polygon, box
+from joblib import cpu_count
+from joblib.externals.loky import ProcessPoolExecutor
 def snap_polygon_vertices(polygon_points: np.ndarray, grid_size: float):
     """
     Snaps the vertices of a single polygon to the specified grid.
@@ -13,34 +28,52 @@ def snap_polygon_vertices(polygon_points: np.ndarray, grid_size: float):
         grid_size: The grid size to snap to.
 
     Returns:
-        Numpy array of snapped polygon vertices.
+        Numpy array of snapped polygon vertices. Always a new array; the
+        input is never returned or modified.
     """
-    if not isinstance(polygon_points, np.ndarray):
-        polygon_points = np.array(polygon_points)
-    a = np.round(polygon_points / grid_size) * grid_size
-    return np.round(polygon_points / grid_size) * grid_size
+    # np.array 总是复制一份，调用方修改返回值不会影响原数组
+    points = np.array(polygon_points)
+    snapped = np.round(points / grid_size) * grid_size
+    # 已经在格点上时返回原坐标 (的副本)，避免 round(x / g) * g 的末位误差让下游把它当作新几何重新处理
+    if np.allclose(snapped, points, rtol=0, atol=grid_size * 1e-6):
+        return points
+    return snapped
 
 
 def snap_all_polygons_iteratively(
         component_in: ComponentSpec,
         grid_size: float = 0.00001,
         Flag: bool = False,
+        hierarchical: bool = False,
+        skip_clean: bool = False,
 ) -> Component:
     """
     Snaps all polygons in a component to the grid by iterating through
     each polygon on each layer. Ports and labels are also transferred and
-    their positions snapped. The component is flattened first to ensure
-    all geometry is processed.
+    their positions snapped. Each layer is read as one flat Region
+    (including sub-cells), smoothed by a -30/+60/-30 nm sizing, merged once
+    and snapped in memory; the input component is not modified. Layers
+    are processed concurrently in a process pool when the component is
+    large enough, see `configure_layer_pool`.
 
     Args:
         component_in: The input gdsfactory Component or ComponentSpec.
         grid_size: The grid size (in um) to snap vertices to.
                    Defaults to 0.001 (1 nm).
+        Flag: If False, the component is returned unchanged.
+        hierarchical: If True, keep the hierarchy: every unique cell is
+                   snapped once on its own polygons and instance placements
+                   are snapped to the grid, see `_snap_hierarchy`.
+        skip_clean: If True, geometry that `offgrid_report` finds already on
+                   the grid is left as is: in flat mode a clean component is
+                   returned unchanged, in hierarchical mode clean cells are
+                   reused instead of copied. Note that skipped geometry also
+                   skips the -30/+60/-30 nm smoothing and merge.
 
     Returns:
         A new gdsfactory Component with all polygons, port positions,
         and label positions snapped to the grid. Returns an empty component
-        with a modified name if flattening fails.
+        with a modified name if the input cannot be resolved.
     """
     if Flag:
         # 获取 Component 对象
@@ -55,78 +88,37 @@ def snap_all_polygons_iteratively(
             )
             return gf.Component(name=f"{safe_base_name}_snap_failed_no_input_component")
 
-        # 1. 扁平化组件以访问顶层所有多边形
-        # flatten() 返回一个新的扁平化组件，原始组件不受影响
-        c_in_orig.flatten()
-        c_flat = c_in_orig
-        # 检查 flatten() 是否返回了 None
-        if c_flat is None:
-            print(f"错误: 组件 '{c_in_orig.name}' 的 flatten() 操作返回了 None。将返回一个空组件。")
-            # 为输出组件创建一个描述性的名称，即使 c_flat 为 None
-            safe_original_name_fallback = "".join(
-                char if char.isalnum() or char in ['_', '-'] else '_' for char in c_in_orig.name
-            )
-            return gf.Component(name=f"{safe_original_name_fallback}_iter_snapped_flatten_returned_none")
+        if hierarchical:
+            return _snap_hierarchy(c_in_orig, grid_size, skip_clean)
+        if skip_clean and not offgrid_report(c_in_orig, grid_size, hierarchical=False):
+            return c_in_orig
 
         # 为输出组件创建一个描述性的名称
-        # 此时 c_flat 不应该是 None，所以 c_flat.name 应该是可访问的
         safe_original_name = "".join(
-            char if char.isalnum() or char in ['_', '-'] else '_' for char in c_flat.name
+            char if char.isalnum() or char in ['_', '-'] else '_' for char in c_in_orig.name
         )
         component_out = gf.Component(name=f"{safe_original_name}_iter_snapped")
 
-        # 2. 获取扁平化组件中的所有图层
-        active_layers: LayerSpecs = c_flat.layers
+        # 1. 获取组件（含子单元）中的所有图层
+        active_layers: LayerSpecs = c_in_orig.layers
 
         if not active_layers:
-            # gf.logger.warning(f"组件 '{c_flat.name}' 中没有带多边形的图层可处理。")
-            print(f"警告: 组件 '{c_flat.name}' 中没有带多边形的图层可处理。")
+            # gf.logger.warning(f"组件 '{c_in_orig.name}' 中没有带多边形的图层可处理。")
+            print(f"警告: 组件 '{c_in_orig.name}' 中没有带多边形的图层可处理。")
             # 即使没有多边形，仍然处理端口和标签
-        c_sized = gf.Component(name=f"{safe_original_name}_iter_snapped_sized")
-        c_sized1 = gf.Component(name=f"{safe_original_name}_iter_snapped_sized1")
-        c_sized2 = gf.Component(name=f"{safe_original_name}_iter_snapped_sized2")
-        # 3. 遍历每一个图层,对所有图层都扩大一点点，然后进行合并
-        for layer_spec in active_layers:
-            c_in_sized_from_layer = c_in_orig.get_region(layer_spec)
-            c_in_sized_from_layer = c_in_sized_from_layer.size(-30)
-            c_sized.add_polygon(c_in_sized_from_layer,layer=layer_spec)
-        c_sized = merge_polygons_in_each_layer(c_sized)
-        c_sized.flatten()
-        for layer_spec in active_layers:
-            c_in_sized_from_layer = c_sized.get_region(layer_spec)
-            c_in_sized_from_layer = c_in_sized_from_layer.size(60)
-            c_sized1.add_polygon(c_in_sized_from_layer,layer=layer_spec)
-        c_sized1 = merge_polygons_in_each_layer(c_sized1)
-        c_sized1.flatten()
-        for layer_spec in active_layers:
-            c_in_sized_from_layer = c_sized1.get_region(layer_spec)
-            c_in_sized_from_layer = c_in_sized_from_layer.size(-30)
-            c_sized2.add_polygon(c_in_sized_from_layer,layer=layer_spec)
-        c_sized2 = merge_polygons_in_each_layer(c_sized2)
-        c_sized2.flatten()
-        # 4. 遍历每一个图层,对所有图层都snap到格点上
-        for layer_spec in active_layers:
-            # 获取当前图层上的所有多边形
-            polygons_on_layer = c_sized2.get_polygons_points(merge=True,by="tuple",layers=[layer_spec])
-
-            if polygons_on_layer:
-                # 遍历该图层上的每一个多边形
-                for single_polygon_points in polygons_on_layer[layer_spec]:
-                    snapped_polygon_points = snap_polygon_vertices(
-                        single_polygon_points, grid_size
-                    )
-                    component_out.add_polygon(snapped_polygon_points, layer=layer_spec)
+
+        # 2. 逐层在内存中完成 缩小-放大-缩小-对齐：get_region 递归取出扁平化的多边形，
+        #    Region.size 本身按合并后的多边形计算，中间不再生成组件、布尔合并和 flatten，
+        #    最后合并一次并写回输出组件
+        #    各层互不相关，总顶点数较多时由 `_map_layers` 分发到进程池并行处理
+        regions = _map_layers(
+            _snap_region, c_in_orig, active_layers, grid_size, c_in_orig.kcl.dbu
+        )
+        for layer_spec, (region, _, _) in zip(active_layers, regions):
+            component_out.add_polygon(region, layer=layer_spec)
 
         # 处理端口：复制、对齐位置，并添加到新组件
-        for port in c_flat.ports:
-            new_port = port
-            snapped_center = snap_polygon_vertices(
-                np.array(new_port.center), grid_size
-            )
-            new_port.center = snapped_center
-            if abs(np.round(new_port.orientation/90)-new_port.orientation/90)<0.001:
-                new_port.orientation = np.round(new_port.orientation/90)*90
-            component_out.add_port(name=new_port.name, port=new_port)
+        _snap_ports(c_in_orig, component_out, grid_size)
 
         # # 处理标签：复制、对齐位置，并添加到新组件
         # for label_obj in c_flat.labels:
@@ -148,20 +140,1143 @@ def snap_all_polygons_iteratively(
         return gf.get_component(component_in)
 
 
+def _snap_ports(
+        component_in: Component,
+        component_out: Component,
+        grid_size: float,
+) -> None:
+    """把 `component_in` 的端口复制到 `component_out`，中心对齐到格点，接近 90° 整数倍的方向取整。"""
+    for port in component_in.ports:
+        new_port = port.copy()
+        snapped_center = snap_polygon_vertices(
+            np.array(new_port.center), grid_size
+        )
+        new_port.center = snapped_center
+        if abs(np.round(new_port.orientation/90)-new_port.orientation/90)<0.001:
+            new_port.orientation = np.round(new_port.orientation/90)*90
+        component_out.add_port(name=new_port.name, port=new_port)
+
+
+def _rebuild_hierarchy(
+        component: Component,
+        name_suffix: str,
+        region_task,
+        vector_task=None,
+        port_task=None,
+        keep_cell=None,
+) -> Component:
+    """
+    自底向上遍历 `component` 的单元树，为每个不同的单元生成一个处理后的副本，每个单元只处理一次。
+
+    参数:
+        component: 输入组件，不会被修改。
+        name_suffix: 副本命名为 "<原名>_<name_suffix>"；同名单元已存在时直接复用。
+        region_task: region_task(region, source, layer_index) -> kdb.Region，处理单元自身某一层的多边形 (单位: DBU)。
+        vector_task: vector_task(kdb.Vector) -> kdb.Vector，处理实例位移和阵列步进。默认不变。
+        port_task: port_task(source, target)，把端口从原单元复制到副本。默认原样复制。
+        keep_cell: keep_cell(cell, source, mapping) -> bool，为 True 时不生成副本而沿用原单元。
+
+    返回:
+        处理后的顶层组件。
+    """
+    kcl = component.kcl
+    layout = component.kdb_cell.layout()
+    top_index = component.kdb_cell.cell_index()
+    used = set(component.kdb_cell.called_cells()) | {top_index}
+    mapping = {}
+    for cell_index in list(layout.each_cell_bottom_up()):
+        if cell_index not in used:
+            continue
+        cell = layout.cell(cell_index)
+        safe_name = "".join(char if char.isalnum() or char in ['_', '-'] else '_' for char in cell.name)
+        name = f"{safe_name}_{name_suffix}"
+        existing = layout.cell(name)
+        if existing is not None:
+            mapping[cell_index] = existing.cell_index()
+            continue
+        source = gf.Component(base=kcl[cell_index].base)
+        if keep_cell is not None and keep_cell(cell, source, mapping):
+            mapping[cell_index] = cell_index
+            continue
+        target = gf.Component(name=name)
+        for layer_index in layout.layer_indexes():
+            shapes = cell.shapes(layer_index)
+            if shapes.is_empty():
+                continue
+            region = gf.kdb.Region(shapes)
+            if region.is_empty():
+                continue
+            target.kdb_cell.shapes(layer_index).insert(region_task(region, source, layer_index))
+        for inst in cell.each_inst():
+            array = inst.cell_inst.dup()
+            array.cell_index = mapping[array.cell_index]
+            if vector_task is not None:
+                if array.is_complex():
+                    trans = array.cplx_trans
+                    trans.disp = vector_task(trans.disp)
+                    array.cplx_trans = trans
+                else:
+                    trans = array.trans
+                    trans.disp = vector_task(trans.disp)
+                    array.trans = trans
+                if array.is_regular_array():
+                    array.a = vector_task(array.a)
+                    array.b = vector_task(array.b)
+            target.kdb_cell.insert(array)
+        if port_task is None:
+            target.add_ports(source.ports)
+        else:
+            port_task(source, target)
+        mapping[cell_index] = target.kdb_cell.cell_index()
+    return gf.Component(base=kcl[mapping[top_index]].base)
+
+
+def _snap_hierarchy(
+        component: Component,
+        grid_size: float,
+        skip_clean: bool = False,
+) -> Component:
+    """
+    保留层级结构的对齐：自底向上遍历 `component` 的单元树，每个不同的单元只处理一次。
+
+    每个单元自身的多边形逐层执行 `_snap_region`，子单元实例引用对应的已对齐副本，
+    实例（含阵列）的位移和阵列步进对齐到格点；单元的端口同样复制并对齐。
+    输出单元命名为 "<原名>_hier_snapped_<grid_size>[_skip]"，已存在时直接复用，
+    因此共享子单元的多个顶层单元先后对齐时，子单元仍只处理一次。输入组件不被修改。
+    `skip_clean` 为 True 时，自身多边形、实例位移和端口都已在格点上、且子单元也都无需处理的单元直接沿用原单元。
+
+    注意: 以非 90° 整数倍角度放置的实例，其内部顶点在扁平化后不一定落在格点上。
+
+    参数:
+        component: 输入组件。
+        grid_size: 对齐的格点 (单位: µm)。
+
+    返回:
+        对齐后的顶层组件。
+    """
+    dbu = component.kcl.dbu
+    grid = grid_size / dbu
+    suffix = "".join(char if char.isalnum() else '_' for char in f"{grid_size:g}")
+    if skip_clean:
+        suffix += "_skip"
+
+    def snap_vector(v):
+        if grid <= 1:
+            return v
+        return gf.kdb.Vector(int(round(round(v.x / grid) * grid)), int(round(round(v.y / grid) * grid)))
+
+    def keep_cell(cell, source, mapping):
+        return (skip_clean and all(mapping[child] == child for child in cell.each_child_cell())
+                and not _offgrid_cell(cell, source, grid_size, dbu))
+
+    return _rebuild_hierarchy(
+        component, f"hier_snapped_{suffix}",
+        lambda region, source, layer_index: _cached_region_task(_snap_region, region, grid_size, dbu),
+        vector_task=snap_vector,
+        port_task=lambda source, target: _snap_ports(source, target, grid_size),
+        keep_cell=keep_cell,
+    )
+
+
+def _snap_region(
+        region,
+        grid_size: float,
+        dbu: float,
+):
+    """
+    对单层区域执行 缩小 30 nm - 放大 60 nm - 缩小 30 nm 的平滑，合并后把顶点对齐到 `grid_size`。
+
+    参数:
+        region: kdb.Region (单位: DBU)，会被原地修改。
+        grid_size: 对齐的格点 (单位: µm)。小于等于 DBU 时顶点本来就在格点上。
+        dbu: 数据库单位 (单位: µm)。
+
+    返回:
+        处理后的 kdb.Region。
+    """
+    region.size(-30)
+    region.size(60)
+    region.size(-30)
+    region.merge()
+    grid = grid_size / dbu
+    if grid > 1:
+        # 与逐点 np.round(x / grid) * grid 相同，格点以 DBU 表示
+        region = gf.kdb.Region([_snap_polygon_dbu(poly, grid) for poly in region.each()])
+    return region
+
+
+def _snap_polygon_dbu(
+        poly,
+        grid: float,
+):
+    """把单个 kdb.Polygon 的外轮廓和孔洞顶点对齐到 `grid` (单位: DBU)。"""
+    def snap(points):
+        pts = np.array([(pt.x, pt.y) for pt in points], dtype=float)
+        pts = np.round(np.round(pts / grid) * grid).astype(np.int64)
+        return [gf.kdb.Point(int(x), int(y)) for x, y in pts]
+
+    snapped = gf.kdb.Polygon(snap(poly.each_point_hull()))
+    for i in range(poly.holes()):
+        snapped.insert_hole(snap(poly.each_point_hole(i)))
+    return snapped
+
+
+# %% 离格检查
+# 每个单元自身的顶点用 Region.grid_check 在 KLayout 内一次检查完，格点不是整数个 DBU 时退回 NumPy 向量化检查，
+# 不需要先对齐再比较。结果既用于跳过已经在格点上的单元，也可以直接作为流片前的检查报告。
+def _offgrid_count(
+        region,
+        grid: float,
+) -> int:
+    """返回区域 (单位: DBU) 中不在 `grid` (单位: DBU) 格点上的顶点数，按原始多边形统计。"""
+    if grid <= 1 or region.is_empty():
+        return 0
+    if abs(grid - round(grid)) < 1e-9:
+        region.merged_semantics = False
+        return region.grid_check(int(round(grid)), int(round(grid))).size()
+    points = _region_to_arrays(region)[0].astype(np.float64)
+    return int(np.count_nonzero(np.abs(np.round(points / grid) * grid - points) > 1e-6))
+
+
+def _offgrid_vector(
+        v,
+        grid: float,
+) -> bool:
+    """位移 `v` (单位: DBU) 是否不在 `grid` 格点上。"""
+    return grid > 1 and any(abs(round(x / grid) * grid - x) > 1e-6 for x in (v.x, v.y))
+
+
+def _offgrid_ports(
+        component: Component,
+        grid_size: float,
+) -> int:
+    """返回中心不在 `grid_size` (单位: µm) 格点上的端口数。"""
+    centers = np.array([port.center for port in component.ports], dtype=float).reshape(-1, 2)
+    snapped = np.round(centers / grid_size) * grid_size
+    return int(np.count_nonzero(np.any(np.abs(snapped - centers) > grid_size * 1e-6, axis=1)))
+
+
+def _offgrid_cell(
+        cell,
+        component: Component,
+        grid_size: float,
+        dbu: float,
+) -> list[dict]:
+    """检查单个单元自身的多边形、实例位移和端口，返回不在格点上的条目（不含子单元内部）。"""
+    grid = grid_size / dbu
+    layout = cell.layout()
+    rows = []
+    for layer_index in layout.layer_indexes():
+        shapes = cell.shapes(layer_index)
+        if shapes.is_empty():
+            continue
+        count = _offgrid_count(gf.kdb.Region(shapes), grid)
+        if count:
+            info = layout.get_info(layer_index)
+            rows.append({"cell": cell.name, "kind": "polygon", "layer": (info.layer, info.datatype), "count": count})
+    count = 0
+    for inst in cell.each_inst():
+        array = inst.cell_inst
+        trans = array.cplx_trans if array.is_complex() else array.trans
+        count += _offgrid_vector(trans.disp, grid) or (
+            array.is_regular_array() and (_offgrid_vector(array.a, grid) or _offgrid_vector(array.b, grid)))
+    if count:
+        rows.append({"cell": cell.name, "kind": "instance", "layer": None, "count": count})
+    count = _offgrid_ports(component, grid_size)
+    if count:
+        rows.append({"cell": cell.name, "kind": "port", "layer": None, "count": count})
+    return rows
+
+
+def offgrid_report(
+        component_in: ComponentSpec,
+        grid_size: float = 0.001,
+        hierarchical: bool = True,
+) -> list[dict]:
+    """
+    检查组件中不在 `grid_size` 格点上的顶点、实例位移和端口中心。
+
+    参数:
+        component_in: 输入的 gdsfactory 组件或组件引用。
+        grid_size: 格点 (单位: µm)。小于等于 DBU 时所有顶点必然在格点上。
+        hierarchical: 为 True 时逐个检查每个不同的单元自身的内容，重复引用的单元只检查一次；
+                      为 False 时检查扁平化后各层的多边形和顶层端口。
+
+    返回:
+        每个有问题的 (单元, 类别, 图层) 一条记录的列表，记录为
+        {"cell": 单元名, "kind": "polygon" | "instance" | "port", "layer": (layer, datatype) 或 None, "count": 个数}。
+        列表为空表示全部在格点上。
+    """
+    component = gf.get_component(component_in)
+    dbu = component.kcl.dbu
+    if not hierarchical:
+        grid = grid_size / dbu
+        rows = []
+        for layer in component.layers:
+            count = _offgrid_count(component.get_region(layer), grid)
+            if count:
+                rows.append({"cell": component.name, "kind": "polygon", "layer": layer, "count": count})
+        count = _offgrid_ports(component, grid_size)
+        if count:
+            rows.append({"cell": component.name, "kind": "port", "layer": None, "count": count})
+        return rows
+    layout = component.kdb_cell.layout()
+    used = set(component.kdb_cell.called_cells()) | {component.kdb_cell.cell_index()}
+    rows = []
+    for cell_index in list(layout.each_cell_bottom_up()):
+        if cell_index in used:
+            rows += _offgrid_cell(layout.cell(cell_index), gf.Component(base=component.kcl[cell_index].base), grid_size, dbu)
+    return rows
+
+
+# %% 顶点精简
+# gf.path.extrude 对 euler_Bend_Half、gf.path.arc 等路径生成的多边形顶点很密，大半径环每条边有上千个点。
+# 精简按 Douglas-Peucker 逐段进行：被删除的顶点到保留下来的弦的距离不超过给定的弦误差，
+# 端口两端的顶点作为锚点原样保留，保证与其他器件对接处不变。
+_DECIMATE_REPORT = []
+
+
+def decimation_report() -> list[dict]:
+    """
+    返回最近一次 `decimate_vertices` 的统计，每个 (单元, 图层) 一个字典:
+    cell、layer、vertices_in、vertices_out、removed。
+    """
+    return list(_DECIMATE_REPORT)
+
+
+def _decimate_chain(
+        points: np.ndarray,
+        tol: float,
+) -> np.ndarray:
+    """
+    对开放折线 `points` (首尾保留) 执行 Douglas-Peucker 精简，返回保留顶点的布尔掩码。
+
+    顶点到所在弦 (线段) 的距离不超过 `tol` 时删除。
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i0, i1 = stack.pop()
+        if i1 - i0 < 2:
+            continue
+        p0 = points[i0]
+        chord = points[i1] - p0
+        inner = points[i0 + 1:i1] - p0
+        length2 = chord @ chord
+        if length2 == 0:
+            dist = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            t = np.clip(inner @ chord / length2, 0, 1)
+            dist = np.hypot(*(inner - t[:, None] * chord).T)
+        k = int(np.argmax(dist))
+        if dist[k] > tol:
+            k += i0 + 1
+            keep[k] = True
+            stack += [(i0, k), (k, i1)]
+    return keep
+
+
+def _decimate_contour(
+        points: np.ndarray,
+        tol: float,
+        anchors: set,
+) -> np.ndarray:
+    """
+    精简闭合轮廓 `points` (单位: DBU)。`anchors` 中的顶点保留；锚点不足两个时补上首点及离首点最远的点，
+    然后在相邻锚点之间逐段精简。
+    """
+    n = len(points)
+    if n <= 3:
+        return points
+    idx = sorted(i for i, pt in enumerate(map(tuple, points.tolist())) if pt in anchors)
+    if len(idx) < 2:
+        far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+        idx = sorted({0, far} | set(idx))
+    keep = np.zeros(n, dtype=bool)
+    for a, b in zip(idx, idx[1:] + [idx[0] + n]):
+        chain = points[np.arange(a, b + 1) % n].astype(np.float64)
+        keep[np.arange(a, b + 1) % n] |= _decimate_chain(chain, tol)
+    if keep.sum() < 3:
+        return points
+    return points[keep]
+
+
+def _port_anchors(
+        component: Component,
+) -> set:
+    """单元端口两端的点 (单位: DBU)。"""
+    anchors = set()
+    dbu = component.kcl.dbu
+    for port in component.ports:
+        angle = np.deg2rad(port.orientation)
+        half = port.width / 2
+        for sign in (1, -1):
+            x = port.center[0] - sign * half * np.sin(angle)
+            y = port.center[1] + sign * half * np.cos(angle)
+            anchors.add((int(round(x / dbu)), int(round(y / dbu))))
+    return anchors
+
+
+def _decimate_region(
+        region,
+        tol: float,
+        anchors: set,
+):
+    """逐个多边形精简外轮廓和孔洞 (单位: DBU)。"""
+    def contour(points):
+        pts = np.array([(pt.x, pt.y) for pt in points], dtype=np.int64)
+        return [gf.kdb.Point(int(x), int(y)) for x, y in _decimate_contour(pts, tol, anchors)]
+
+    out = gf.kdb.Region()
+    for poly in region.each():
+        decimated = gf.kdb.Polygon(contour(poly.each_point_hull()))
+        for i in range(poly.holes()):
+            decimated.insert_hole(contour(poly.each_point_hole(i)))
+        out.insert(decimated)
+    return out
+
+
+def decimate_vertices(
+        component_in: ComponentSpec,
+        tolerance: float = 0.001,
+        grid_size: float | None = None,
+) -> Component:
+    """
+    删除共线和近共线的顶点，减小 GDS 体积并加快后续布尔运算和 DRC。
+
+    逐个单元处理，每个不同的单元只处理一次，层级结构和实例位置不变，输入组件不被修改。
+    被删除的顶点到保留下来的弦的距离不超过 max(tolerance, grid_size)；各单元端口两端的顶点原样保留。
+    输出单元命名为 "<原名>_decimated_<容差>"，已存在时直接复用。逐单元、逐层删除的顶点数见 `decimation_report()`。
+
+    参数:
+        component_in: 输入的 gdsfactory 组件或组件引用。
+        tolerance: 允许的弦误差 (单位: µm)。
+        grid_size: 格点 (单位: µm)，作为弦误差的下限。默认为 DBU。
+
+    返回:
+        精简后的顶层组件。
+    """
+    component = gf.get_component(component_in)
+    dbu = component.kcl.dbu
+    tol = max(tolerance, grid_size if grid_size is not None else dbu) / dbu
+    suffix = "".join(char if char.isalnum() else '_' for char in f"{tol * dbu:g}")
+    _DECIMATE_REPORT.clear()
+
+    def region_task(region, source, layer_index):
+        out = _decimate_region(region, tol, _port_anchors(source))
+        n_in = sum(poly.num_points() for poly in region.each())
+        n_out = sum(poly.num_points() for poly in out.each())
+        info = source.kcl.layout.get_info(layer_index)
+        _DECIMATE_REPORT.append({
+            "cell": source.name, "layer": (info.layer, info.datatype),
+            "vertices_in": n_in, "vertices_out": n_out, "removed": n_in - n_out,
+        })
+        return out
+
+    return _rebuild_hierarchy(component, f"decimated_{suffix}", region_task)
+
+
+# %% 逐层并行进程池
+# 各图层的平滑、合并、对齐互不相关，可以交给进程池并行完成。
+# 多边形以 int32 的 DBU 坐标数组在进程间传递，而不是序列化整个组件；
+# 结果始终按图层顺序收集，与工作进程数量无关。
+#
+# 串行/并行分界由 benchmarks/layer_pool_crossover.py 实测：每个顶点的编码、传输、解码约 2.3 µs，
+# 进程池冷启动 (工作进程导入 gdsfactory) 约 2 s，热池每次分发约 2 ms。任务本身每个顶点的耗时
+# 为 `_snap_region` 约 8.9 µs、KLayout 合并约 0.7 µs、shapely 合并约 3.3 µs。
+# 只有每顶点耗时明显高于传输开销的任务才可能更快，因此只对 `_POOL_TASKS` 中的任务使用进程池，
+# 合并后端默认串行。`_snap_region` 在热池上约 1 千个顶点即可回本，但单次调用要承担冷启动，
+# 4-8 个工作进程时回本点约为 36-46 万个顶点，默认 min_points 取 40 万。
+_LAYER_POOL_CONFIG = {"n_workers": None, "min_points": 400_000, "idle_timeout": 600}
+_LAYER_POOL_STATE = {"executor": None}
+_POOL_TASKS = {_snap_region}
+
+
+def configure_layer_pool(
+        n_workers: int | None = None,
+        min_points: int = 400_000,
+        idle_timeout: float = 600,
+) -> None:
+    """
+    配置 `snap_all_polygons_iteratively` 和 `merge_polygons_in_each_layer` 逐层并行使用的进程池。
+    已存在的进程池会被关闭，下次使用时按新配置重建。
+
+    参数:
+        n_workers (int | None): 工作进程数。None 表示使用 `cpu_count()`；小于等于 1 时始终串行计算。
+        min_points (int): 启用并行所需的最少总顶点数。默认值 40 万是 4-8 个工作进程时包含进程池冷启动的
+                          实测回本点；进程池在一次会话中反复使用 (已热) 时可以调低到数千。
+        idle_timeout (float): 工作进程空闲多少秒后自动退出 (单位: s)。
+    """
+    shutdown_layer_pool()
+    _LAYER_POOL_CONFIG.update(n_workers=n_workers, min_points=min_points, idle_timeout=idle_timeout)
+
+
+def shutdown_layer_pool() -> None:
+    """关闭逐层并行使用的进程池 (只影响本模块创建的进程池)。"""
+    executor = _LAYER_POOL_STATE["executor"]
+    if executor is not None:
+        executor.shutdown(wait=True)
+    _LAYER_POOL_STATE.update(executor=None)
+
+
+def _layer_pool_workers() -> int:
+    n_workers = _LAYER_POOL_CONFIG["n_workers"]
+    return cpu_count() if n_workers is None else int(n_workers)
+
+
+def _use_layer_pool(
+        task,
+        n_jobs: int,
+        count_points,
+) -> bool:
+    """是否把 `n_jobs` 个 `task` 分发到进程池；`count_points()` 返回总顶点数，只在需要时才计数。"""
+    return (task in _POOL_TASKS and n_jobs >= 2 and _layer_pool_workers() > 1
+            and count_points() >= _LAYER_POOL_CONFIG["min_points"])
+
+
+def _layer_pool():
+    """返回本模块独占的进程池 (不是 joblib 共用的 get_reusable_executor)，首次调用时创建。"""
+    if _LAYER_POOL_STATE["executor"] is None:
+        _LAYER_POOL_STATE["executor"] = ProcessPoolExecutor(
+            max_workers=_layer_pool_workers(), timeout=_LAYER_POOL_CONFIG["idle_timeout"])
+    return _LAYER_POOL_STATE["executor"]
+
+
+def _region_to_arrays(region):
+    """
+    把 kdb.Region 编码为紧凑的整数数组，便于在进程间传递。
+
+    返回:
+        (points, sizes, counts)：points 为所有轮廓顶点依次拼接的 (N, 2) 数组 (单位: DBU)，
+        sizes 为每个轮廓的顶点数，counts 为每个多边形的轮廓数 (外轮廓 + 孔洞)。
+        坐标在 int32 范围内 (1 nm DBU 下约 ±2 m) 时使用 int32，否则退回 int64。
+    """
+    points, sizes, counts = [], [], []
+    for poly in region.each():
+        contours = [poly.each_point_hull()] + [poly.each_point_hole(i) for i in range(poly.holes())]
+        for contour in contours:
+            pts = [(pt.x, pt.y) for pt in contour]
+            points.extend(pts)
+            sizes.append(len(pts))
+        counts.append(len(contours))
+    points = np.array(points, dtype=np.int64).reshape(-1, 2)
+    if points.size == 0 or np.abs(points).max() < 2 ** 31:
+        points = points.astype(np.int32)
+    return points, np.array(sizes, dtype=np.int32), np.array(counts, dtype=np.int32)
+
+
+def _arrays_to_region(
+        points: np.ndarray,
+        sizes: np.ndarray,
+        counts: np.ndarray,
+):
+    """`_region_to_arrays` 的逆过程。"""
+    region = gf.kdb.Region()
+    # 按 KLayout 的文本格式 "(x,y;x,y/孔洞...)" 拼接后由 Polygon.from_s 解析，比逐点构造 Point 快得多
+    contours = [
+        ";".join(f"{x},{y}" for x, y in contour)
+        for contour in (np.split(points, np.cumsum(sizes)[:-1]) if len(sizes) else [])
+        for contour in [contour.tolist()]
+    ]
+    k = 0
+    for count in counts:
+        region.insert(gf.kdb.Polygon.from_s("(" + "/".join(contours[k:k + count]) + ")"))
+        k += count
+    return region
+
+
+def _peak_rss_mb() -> float | None:
+    """当前进程自启动以来的常驻内存峰值 (ru_maxrss，单位: MB)；平台不支持时返回 None。"""
+    if resource is None:
+        return None
+    # ru_maxrss 在 Linux 上以 KB 计，在 macOS 上以字节计
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+
+def _timed_task(
+        task,
+        region,
+        *args,
+):
+    """执行 `task(region, *args)`，返回 (结果, 耗时 s, 执行后本进程自启动以来的内存峰值 MB)。"""
+    t0 = time.perf_counter()
+    result = task(region, *args)
+    return result, time.perf_counter() - t0, _peak_rss_mb()
+
+
+def _region_task(
+        task,
+        arrays: tuple[np.ndarray, np.ndarray, np.ndarray],
+        *args,
+):
+    """工作进程中执行的任务：解码单层数组，执行 `task(region, *args)` 后再编码返回，附带耗时和内存峰值。"""
+    region, seconds, peak = _timed_task(task, _arrays_to_region(*arrays), *args)
+    return _region_to_arrays(region), seconds, peak
+
+
+def _map_layers(
+        task,
+        component: Component,
+        layers,
+        *args,
+) -> list:
+    """
+    对 `component` 的每个图层（含子单元，已扁平化）执行 `task(region, *args)`，
+    按 `layers` 的顺序返回 (kdb.Region, 耗时 s, 执行进程的内存峰值 MB) 列表。
+
+    `task` 值得并行 (见 `_POOL_TASKS`)、图层多于一个且总顶点数不少于 `min_points` 时，各层编码为
+    int32 数组交给进程池并行执行；否则直接在当前进程中依次执行，不做编码。两条路径结果相同。
+    启用结果缓存 (`configure_snap_cache`) 时，先按各层的几何指纹查缓存，只计算未命中的图层。
+    """
+    regions = [component.get_region(layer) for layer in layers]
+    results = [None] * len(regions)
+    keys = [None] * len(regions)
+    if _snap_cache_enabled():
+        for i, region in enumerate(regions):
+            keys[i] = _snap_cache_key(task, _region_to_arrays(region), args)
+            cached = _snap_cache_get(keys[i])
+            if cached is not None:
+                results[i] = (_arrays_to_region(*cached), 0.0, _peak_rss_mb())
+    todo = [i for i in range(len(regions)) if results[i] is None]
+    if not _use_layer_pool(task, len(todo),
+                           lambda: sum(poly.num_points() for i in todo for poly in regions[i].each())):
+        for i in todo:
+            results[i] = _timed_task(task, regions[i], *args)
+    else:
+        layer_arrays = {i: _region_to_arrays(regions[i]) for i in todo}
+        # 顶点多的图层先提交，减少最后一个大图层拖尾；结果仍按图层顺序取回
+        executor = _layer_pool()
+        order = sorted(todo, key=lambda i: -len(layer_arrays[i][0]))
+        futures = {i: executor.submit(_region_task, task, layer_arrays[i], *args) for i in order}
+        for i in todo:
+            arrays, seconds, peak = futures[i].result()
+            results[i] = (_arrays_to_region(*arrays), seconds, peak)
+    for i in todo:
+        if keys[i] is not None:
+            _snap_cache_put(keys[i], _region_to_arrays(results[i][0]))
+    return results
+
+
+# %% 磁盘缓存的大小索引
+class _DiskCacheIndex:
+    """
+    磁盘缓存目录中 .npz 文件的 LRU 大小索引。
+
+    首次使用时扫描一次目录 (按修改时间排序)，之后写入、命中和淘汰都只更新内存中的索引，
+    每次写入为 O(1)，不再逐个 stat 整个目录。其他进程写入同一目录的文件要到重新 `configure_*`
+    (重新扫描) 后才计入总大小。
+    """
+
+    def __init__(self):
+        self.path = None
+        self.files = None  # 文件名 -> 字节数，按最近使用从旧到新排列
+        self.total = 0
+
+    def reset(self, path: str | None) -> None:
+        """切换到目录 `path`；索引在下次使用时重新扫描。"""
+        self.path = path
+        self.files = None
+        self.total = 0
+
+    def _scan(self) -> None:
+        if self.files is not None:
+            return
+        entries = []
+        if self.path is not None and os.path.isdir(self.path):
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".npz"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+        self.files = OrderedDict((name, size) for _, name, size in sorted(entries))
+        self.total = sum(self.files.values())
+
+    def size(self) -> int:
+        self._scan()
+        return self.total
+
+    def touch(self, name: str) -> None:
+        """命中：刷新文件的修改时间，并移到索引末尾。"""
+        self._scan()
+        os.utime(os.path.join(self.path, name))
+        if name in self.files:
+            self.files.move_to_end(name)
+
+    def discard(self, name: str) -> None:
+        self._scan()
+        self.total -= self.files.pop(name, 0)
+
+    def add(self, name: str, max_bytes: int) -> int:
+        """
+        登记刚写入的文件，总大小超过 `max_bytes` 时从最久未用的文件开始删除。
+
+        返回:
+            删除的文件数。
+        """
+        self._scan()
+        self.discard(name)
+        self.files[name] = os.path.getsize(os.path.join(self.path, name))
+        self.total += self.files[name]
+        evicted = 0
+        while self.total > max_bytes and len(self.files) > 1:
+            old, size = self.files.popitem(last=False)
+            self.total -= size
+            try:
+                os.remove(os.path.join(self.path, old))
+            except OSError:
+                continue
+            evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        """删除目录中全部 .npz 文件。"""
+        if self.path is not None and os.path.isdir(self.path):
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".npz"):
+                    os.remove(entry.path)
+        self.files = OrderedDict()
+        self.total = 0
+
+
+# %% 对齐/合并结果缓存
+# 对齐和合并的结果只取决于输入几何和参数。以每层多边形数组 (int32 DBU) 与任务、参数的摘要为键，
+# 把结果数组缓存在内存中，并可持久化到磁盘（每个条目一个 .npz，文件名即摘要），
+# 重新生成整套版图时只有几何发生变化的单元/图层需要重新计算。
+# 磁盘缓存按 `_DiskCacheIndex` 实现 LRU：命中时刷新，总大小超过上限时删除最久未用的文件。
+_SNAP_CACHE_VERSION = 1
+_SNAP_CACHE_CONFIG = {"maxsize": 0, "path": None, "max_bytes": 1 << 30}
+_SNAP_CACHE = OrderedDict()
+_SNAP_CACHE_STATS = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0}
+_SNAP_CACHE_INDEX = _DiskCacheIndex()
+
+
+def configure_snap_cache(
+        maxsize: int = 256,
+        path: str | None = None,
+        max_bytes: int = 1 << 30,
+) -> None:
+    """
+    配置 `snap_all_polygons_iteratively` 和 `merge_polygons_in_each_layer` 的结果缓存。默认关闭。
+
+    参数:
+        maxsize (int): 内存中最多保留的条目数 (每个条目为一个单元的一层)，超出后按 LRU 淘汰。
+        path (str | None): 持久化目录。设置后每个条目另存为一个 .npz 文件，内存未命中时从磁盘读取。
+        max_bytes (int): 磁盘缓存的总大小上限 (单位: 字节)，超出后删除最久未使用的文件。
+
+    maxsize 为 0 且 path 为 None 时关闭缓存。
+    """
+    _SNAP_CACHE_CONFIG.update(maxsize=maxsize, path=path, max_bytes=max_bytes)
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+    _SNAP_CACHE_INDEX.reset(path)
+    while len(_SNAP_CACHE) > max(maxsize, 0):
+        _SNAP_CACHE.popitem(last=False)
+
+
+def clear_snap_cache(disk: bool = False) -> None:
+    """清空内存中的结果缓存及命中统计；`disk` 为 True 时同时删除磁盘上的缓存文件。"""
+    _SNAP_CACHE.clear()
+    _SNAP_CACHE_STATS.update(hits=0, misses=0, disk_hits=0, evictions=0)
+    if disk:
+        _SNAP_CACHE_INDEX.clear()
+
+
+def snap_cache_info() -> dict:
+    """返回结果缓存的统计信息：hits、misses、disk_hits、evictions、size、maxsize、disk_bytes。"""
+    return dict(_SNAP_CACHE_STATS, size=len(_SNAP_CACHE), maxsize=_SNAP_CACHE_CONFIG["maxsize"],
+                disk_bytes=_SNAP_CACHE_INDEX.size())
+
+
+def _snap_cache_enabled() -> bool:
+    return _SNAP_CACHE_CONFIG["maxsize"] > 0 or _SNAP_CACHE_CONFIG["path"] is not None
+
+
+def _snap_cache_key(
+        task,
+        arrays: tuple[np.ndarray, np.ndarray, np.ndarray],
+        args: tuple,
+) -> str:
+    """任务名、参数和单层多边形数组的摘要。"""
+    digest = hashlib.sha1(repr((_SNAP_CACHE_VERSION, task.__module__, task.__qualname__, args)).encode())
+    for array in arrays:
+        digest.update(array.dtype.str.encode())
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _snap_cache_get(key: str):
+    if key in _SNAP_CACHE:
+        _SNAP_CACHE.move_to_end(key)
+        _SNAP_CACHE_STATS["hits"] += 1
+        return _SNAP_CACHE[key]
+    path = _SNAP_CACHE_CONFIG["path"]
+    if path is not None:
+        name = key + ".npz"
+        try:
+            with np.load(os.path.join(path, name)) as data:
+                entry = (data["points"], data["sizes"], data["counts"])
+            _SNAP_CACHE_INDEX.touch(name)
+        except (OSError, KeyError, ValueError):
+            # 文件不存在、已被其他进程淘汰或损坏时按未命中处理
+            _SNAP_CACHE_INDEX.discard(name)
+            entry = None
+        if entry is not None:
+            _SNAP_CACHE_STATS["disk_hits"] += 1
+            _snap_cache_put(key, entry, persist=False)
+            return entry
+    _SNAP_CACHE_STATS["misses"] += 1
+    return None
+
+
+def _snap_cache_put(key: str, entry, persist: bool = True) -> None:
+    if _SNAP_CACHE_CONFIG["maxsize"] > 0:
+        _SNAP_CACHE[key] = entry
+        _SNAP_CACHE.move_to_end(key)
+        while len(_SNAP_CACHE) > _SNAP_CACHE_CONFIG["maxsize"]:
+            _SNAP_CACHE.popitem(last=False)
+    path = _SNAP_CACHE_CONFIG["path"]
+    if persist and path is not None:
+        points, sizes, counts = entry
+        np.savez_compressed(os.path.join(path, key + ".npz"), points=points, sizes=sizes, counts=counts)
+        _SNAP_CACHE_STATS["evictions"] += _SNAP_CACHE_INDEX.add(key + ".npz", _SNAP_CACHE_CONFIG["max_bytes"])
+
+
+def _cached_region_task(
+        task,
+        region,
+        *args,
+):
+    """在当前进程中执行 `task(region, *args)`，启用结果缓存时先查缓存。"""
+    if not _snap_cache_enabled():
+        return task(region, *args)
+    key = _snap_cache_key(task, _region_to_arrays(region), args)
+    cached = _snap_cache_get(key)
+    if cached is not None:
+        return _arrays_to_region(*cached)
+    result = task(region, *args)
+    _snap_cache_put(key, _region_to_arrays(result))
+    return result
+
+
+# %% 分块合并
+# 整片版图（长 DBR、走线）的单层布尔合并是一次巨大的运算，内存峰值很高。
+# 分块模式把图层切成 tile_size 见方的块，每块取出与之接触的全部形状（不裁剪，相邻块的取出范围互相重叠）并合并。
+# 合并结果完全落在块内的多边形一定已经完整（与它接触的形状都与该块接触），直接保留；
+# 伸出块外的多边形所对应的原始形状汇总后在缝合步骤中再合并一次。
+# 每个连通的多边形都只由它自己的原始形状合并一次得到，斜边交点的取整与整层合并相同，结果完全一致。
+_TILE_REPORT = []
+
+
+def merge_tile_report() -> list[dict]:
+    """
+    返回最近一次分块合并的逐块统计，每块一个字典:
+    layer、tile (列, 行；缝合步骤为 None)、box (µm)、polygons_in、polygons_out、time (s)。
+    """
+    return list(_TILE_REPORT)
+
+
+def _merge_tile(
+        region,
+        core: tuple[int, int, int, int],
+):
+    """
+    合并一个块中取出的形状 (单位: DBU)。
+
+    返回:
+        (inside, seam)：inside 为完全落在块 `core` 内的合并结果，seam 为组成伸出块外的多边形的原始形状。
+    """
+    region.merged_semantics = False
+    merged = region.merged()
+    core_box = gf.kdb.Box(*core)
+    inside = gf.kdb.Region()
+    outside = gf.kdb.Region()
+    for poly in merged.each():
+        (inside if poly.bbox().inside(core_box) else outside).insert(poly)
+    return inside, region.interacting(outside)
+
+
+def _merge_tile_task(
+        arrays: tuple[np.ndarray, np.ndarray, np.ndarray],
+        core: tuple[int, int, int, int],
+):
+    """工作进程中执行的任务：合并一个块，返回编码后的结果和耗时。"""
+    t0 = time.perf_counter()
+    inside, seam = _merge_tile(_arrays_to_region(*arrays), core)
+    return _region_to_arrays(inside), _region_to_arrays(seam), time.perf_counter() - t0
+
+
+def _merge_layer_tiled(
+        component: Component,
+        layer_spec,
+        tile_size: float,
+        parallel: bool = False,
+):
+    """
+    按 `tile_size` (单位: µm) 分块合并 `component` 在 `layer_spec` 上的全部形状（含子单元）。
+
+    每块的形状在轮到该块时才取出，合并后立即释放，同一时刻只保留一块的输入。
+    默认各块串行合并：KLayout 合并每个顶点的耗时低于进程间传输 (见 `_POOL_TASKS` 上方的实测)。
+    `parallel` 为 True 且进程池工作进程多于一个时，各块编码后依次提交到逐层进程池，
+    同时在途的块不超过工作进程数的两倍；不受 `min_points` 限制。结果按块的顺序收集，与工作进程数量无关。
+    每块的统计追加到 `_TILE_REPORT`。
+
+    返回:
+        合并后的 kdb.Region。
+    """
+    from gdsfactory import get_layer
+
+    layer_index = get_layer(layer_spec)
+    cell = component.kdb_cell
+    dbu = component.kcl.dbu
+    bbox = cell.bbox(layer_index)
+    if bbox.empty():
+        return gf.kdb.Region()
+    tile = max(int(round(tile_size / dbu)), 1)
+    nx = -(-bbox.width() // tile)
+    ny = -(-bbox.height() // tile)
+    cores = [
+        ((i, j), (bbox.left + i * tile, bbox.bottom + j * tile,
+                  min(bbox.left + (i + 1) * tile, bbox.right), min(bbox.bottom + (j + 1) * tile, bbox.top)))
+        for j in range(ny) for i in range(nx)
+    ]
+    merged = gf.kdb.Region()
+    seams = gf.kdb.Region()
+
+    def collect(key, count, inside, seam, dt):
+        nonlocal merged, seams
+        merged += inside
+        seams += seam
+        _TILE_REPORT.append({
+            "layer": layer_spec, "tile": key[0], "box": tuple(v * dbu for v in key[1]),
+            "polygons_in": count, "polygons_out": inside.count(), "time": dt,
+        })
+
+    # 每块只取出与其接触的形状，不需要先取出整层
+    if not (parallel and len(cores) >= 2 and _layer_pool_workers() > 1):
+        for key in cores:
+            region = gf.kdb.Region(cell.begin_shapes_rec_touching(layer_index, gf.kdb.Box(*key[1])))
+            count = region.count()
+            t0 = time.perf_counter()
+            inside, seam = _merge_tile(region, key[1])
+            collect(key, count, inside, seam, time.perf_counter() - t0)
+            del region, inside, seam
+    else:
+        executor = _layer_pool()
+        pending = deque()
+        for key in cores:
+            region = gf.kdb.Region(cell.begin_shapes_rec_touching(layer_index, gf.kdb.Box(*key[1])))
+            pending.append((key, region.count(), executor.submit(_merge_tile_task, _region_to_arrays(region), key[1])))
+            del region
+            while pending and (len(pending) > 2 * _layer_pool_workers() or key is cores[-1]):
+                done_key, count, future = pending.popleft()
+                inside, seam, dt = future.result()
+                collect(done_key, count, _arrays_to_region(*inside), _arrays_to_region(*seam), dt)
+
+    # 缝合：跨块多边形的原始形状可能被相邻块重复取出，重复的形状不影响合并结果
+    t0 = time.perf_counter()
+    n_seams = sum(1 for _ in seams.each())
+    seams.merge()
+    merged += seams
+    _TILE_REPORT.append({
+        "layer": layer_spec, "tile": None, "box": tuple(v * dbu for v in (bbox.left, bbox.bottom, bbox.right, bbox.top)),
+        "polygons_in": n_seams, "polygons_out": sum(1 for _ in seams.each()), "time": time.perf_counter() - t0,
+    })
+    return merged
+
+
+# %% 合并后端
+# 合并后端按名称注册，签名为 backend(region, grid) -> region：region 为单层扁平化后的区域 (单位: DBU)，
+# grid 为 precision 换算成的 DBU 格点，大于 1 时合并结果需对齐到该格点。
+# "tiled" 不在表中，它按块调用 "klayout" 后端，见 `_merge_layer_tiled`。
+def _snap_merged(
+        region,
+        grid: float,
+):
+    """把合并后的区域顶点对齐到 `grid` (单位: DBU) 并重新合并；`grid` 不大于 1 时原样返回。"""
+    if grid <= 1:
+        return region
+    region = gf.kdb.Region([_snap_polygon_dbu(poly, grid) for poly in region.each()])
+    region.merge()
+    return region
+
+
+def _merge_backend_klayout(
+        region,
+        grid: float,
+):
+    """KLayout Region.merge。"""
+    region.merge()
+    return _snap_merged(region, grid)
+
+
+def _merge_backend_shapely(
+        region,
+        grid: float,
+):
+    """shapely union_all (unary_union)，格点大于 1 DBU 时以 grid_size 在合并时直接对齐。适合多边形较少的小输入。"""
+    polygons = []
+    for poly in region.each():
+        hull = [(pt.x, pt.y) for pt in poly.each_point_hull()]
+        holes = [[(pt.x, pt.y) for pt in poly.each_point_hole(i)] for i in range(poly.holes())]
+        polygons.append(Polygon(hull, holes))
+    merged = shapely.union_all(polygons, grid_size=grid if grid > 1 else None)
+    out = gf.kdb.Region()
+    for part in getattr(merged, "geoms", [merged]):
+        if part.is_empty or part.geom_type != "Polygon":
+            continue
+        poly = gf.kdb.Polygon([gf.kdb.Point(int(round(x)), int(round(y))) for x, y in part.exterior.coords[:-1]])
+        for ring in part.interiors:
+            poly.insert_hole([gf.kdb.Point(int(round(x)), int(round(y))) for x, y in ring.coords[:-1]])
+        out.insert(poly)
+    out.merge()
+    return out
+
+
+_MERGE_BACKENDS = {
+    "klayout": _merge_backend_klayout,
+    "shapely": _merge_backend_shapely,
+}
+_MERGE_REPORT = []
+
+
+def register_merge_backend(
+        name: str,
+        backend,
+        parallel: bool = False,
+) -> None:
+    """
+    注册新的合并后端。
+
+    参数:
+        name (str): 后端名称，供 `merge_polygons_in_each_layer(backend=name)` 使用。
+        backend: 可在模块顶层导入的函数 backend(region, grid) -> kdb.Region（并行时需要在工作进程中序列化）。
+        parallel (bool): 是否允许逐层进程池并行执行。只有每个顶点的耗时明显高于进程间传输 (约 2.3 µs) 的
+                         后端才值得并行，默认为 False。
+    """
+    if name == "tiled":
+        raise ValueError("后端名称 'tiled' 已被分块合并占用")
+    _MERGE_BACKENDS[name] = backend
+    if parallel:
+        _POOL_TASKS.add(backend)
+    else:
+        _POOL_TASKS.discard(backend)
+
+
+def merge_layer_report() -> list[dict]:
+    """
+    返回最近一次 `merge_polygons_in_each_layer` / `merge_polygons_in_layer` 的逐层统计，每层一个字典:
+    layer、backend、polygons_in、polygons_out、vertices_in、vertices_out、time (s)、
+    process_peak_rss_mb (执行该层后，执行它的进程自启动以来的常驻内存峰值 MB，即 ru_maxrss 的高水位，
+    不是该层单独占用的内存；并行时为工作进程，平台不支持时为 None)。
+    输入的多边形数和顶点数逐个形状计数，不生成扁平化的区域。
+    """
+    return list(_MERGE_REPORT)
+
+
+def _region_stats(region) -> tuple[int, int]:
+    """返回区域的 (多边形数, 顶点数)。"""
+    polygons = vertices = 0
+    for poly in region.each():
+        polygons += 1
+        vertices += poly.num_points()
+    return polygons, vertices
+
+
+def _shape_stats(
+        component: Component,
+        layer_spec,
+) -> tuple[int, int]:
+    """逐个形状统计 `component` 在 `layer_spec` 上 (含子单元) 的 (多边形数, 顶点数)，不生成扁平化的区域。"""
+    polygons = vertices = 0
+    it = component.kdb_cell.begin_shapes_rec(gf.get_layer(layer_spec))
+    while not it.at_end():
+        shape = it.shape()
+        if shape.is_box():
+            polygons += 1
+            vertices += 4
+        elif shape.is_polygon() or shape.is_simple_polygon() or shape.is_path():
+            polygons += 1
+            vertices += shape.polygon.num_points()
+        it.next()
+    return polygons, vertices
+
+
+def _merge_layers(
+        c_in: Component,
+        component_out: Component,
+        layers,
+        precision: float,
+        backend: str | None,
+        tile_size: float | None,
+        parallel: bool = False,
+) -> None:
+    """按所选后端合并 `c_in` 在 `layers` 上的形状并写入 `component_out`，逐层统计写入 `_MERGE_REPORT`。"""
+    if backend is None:
+        backend = "klayout" if tile_size is None else "tiled"
+    if backend != "tiled" and backend not in _MERGE_BACKENDS:
+        raise ValueError(f"未知的合并后端 '{backend}'，可选: {['tiled', *_MERGE_BACKENDS]}")
+    dbu = c_in.kcl.dbu
+    grid = precision / dbu
+    _MERGE_REPORT.clear()
+    stats_in = [_shape_stats(c_in, layer) for layer in layers]
+    if backend == "tiled":
+        _TILE_REPORT.clear()
+        results = []
+        for layer_spec in layers:
+            try:
+                results.append(_timed_task(
+                    lambda layer: _snap_merged(_merge_layer_tiled(c_in, layer, tile_size or 500, parallel), grid),
+                    layer_spec,
+                ))
+            except Exception as e:
+                raise RuntimeError(f"无法在图层 {layer_spec} 上为组件 '{c_in.name}' 执行分块合并: {e}") from e
+    else:
+        try:
+            results = _map_layers(_MERGE_BACKENDS[backend], c_in, layers, grid)
+        except Exception as e:
+            raise RuntimeError(f"无法为组件 '{c_in.name}' 执行 {backend} 合并: {e}") from e
+    for layer_spec, (n_poly, n_vert), (region, seconds, peak) in zip(layers, stats_in, results):
+        component_out.add_polygon(region, layer=layer_spec)
+        n_poly_out, n_vert_out = _region_stats(region)
+        _MERGE_REPORT.append({
+            "layer": layer_spec, "backend": backend,
+            "polygons_in": n_poly, "polygons_out": n_poly_out,
+            "vertices_in": n_vert, "vertices_out": n_vert_out,
+            "time": seconds, "process_peak_rss_mb": peak,
+        })
+
+
 def merge_polygons_in_each_layer(
         component_in: ComponentSpec,
         precision: float = 1e-4,
+        tile_size: float | None = None,
+        backend: str | None = None,
+        parallel: bool = False,
 ) -> Component:
     """
     对输入组件的每一个图层上的所有多边形执行合并 (布尔 OR) 操作。
     此函数会处理组件层级结构，有效地在每个图层上扁平化并合并形状。
+    内置合并后端每个顶点的耗时低于进程间传输，各层串行合并；以 `register_merge_backend(parallel=True)`
+    注册的后端在图层较多、顶点总数较大时并行，见 `configure_layer_pool`。
+    逐层的多边形数、顶点数、耗时和进程内存峰值见 `merge_layer_report()`。
 
     Args:
         component_in: 输入的 gdsfactory 组件或组件引用。
-        precision: 布尔运算的精度。
+        precision: 合并结果的格点 (单位: µm)。大于 DBU 时合并后的顶点对齐到该格点，否则不做处理。
+        tile_size: 分块合并的块边长 (单位: µm)。设置后默认使用 "tiled" 后端，逐块耗时见 `merge_tile_report()`。
+        backend: 合并后端。"klayout" (默认) 为 Region.merge；"shapely" 为 shapely.union_all，适合小输入；
+                 "tiled" 为分块合并再缝合，降低大版图的内存峰值 (未给 tile_size 时块边长 500 µm)；
+                 也可以是 `register_merge_backend` 注册的名称。
+        parallel: 分块合并时是否把各块分发到逐层进程池 (见 `configure_layer_pool`)，只对 "tiled" 后端有效。
+                  KLayout 合并每个顶点的耗时低于进程间传输，只有单块合并很慢时才值得打开，默认为 False。
 
     Returns:
         一个新的 gdsfactory 组件，其中每个图层上的多边形都已合并。
+
+    Raises:
+        ValueError: 后端名称未知。
+        RuntimeError: 某层合并失败，原始异常见 __cause__。
     """
     c_in = gf.get_component(component_in)
 
@@ -183,18 +1298,8 @@ def merge_polygons_in_each_layer(
     if not active_layers:
         print(f"警告: 组件 '{c_in.name}' 中没有图层可供处理。")
         return component_out
-    # c_in.flatten()
-    for layer_spec in active_layers:
-        try:
-            layer_merged_component = gf.boolean(
-                c_in,c_in, operation="or", layer=layer_spec
-            )
-        except Exception as e:
-            print(f"警告: 无法在图层 {layer_spec} 上为组件 '{c_in.name}' 执行布尔操作: {e}")
-            continue
-
-        if layer_merged_component:
-            component_out << layer_merged_component
+    # 各层取出扁平化的区域后合并，由 `_map_layers` 决定是否分发到进程池
+    _merge_layers(c_in, component_out, active_layers, precision, backend, tile_size, parallel)
 
     return component_out
 
@@ -202,17 +1307,28 @@ def merge_polygons_in_layer(
         component_in: ComponentSpec,
         precision: float = 1e-4,
         mergelayer:LayerSpecs = None,
+        tile_size: float | None = None,
+        backend: str | None = None,
+        parallel: bool = False,
 ) -> Component:
     """
-    对输入组件的每一个图层上的所有多边形执行合并 (布尔 OR) 操作。
-    此函数会处理组件层级结构，有效地在每个图层上扁平化并合并形状。
+    对输入组件在 `mergelayer` 图层上的所有多边形执行合并 (布尔 OR) 操作。
+    此函数会处理组件层级结构，有效地在该图层上扁平化并合并形状。
 
     Args:
         component_in: 输入的 gdsfactory 组件或组件引用。
-        precision: 布尔运算的精度。
+        precision: 合并结果的格点 (单位: µm)，见 `merge_polygons_in_each_layer`。
+        mergelayer: 需要合并的图层。
+        tile_size: 分块合并的块边长 (单位: µm)，见 `merge_polygons_in_each_layer`。
+        backend: 合并后端，见 `merge_polygons_in_each_layer`。
+        parallel: 分块合并时是否并行，见 `merge_polygons_in_each_layer`。
 
     Returns:
-        一个新的 gdsfactory 组件，其中每个图层上的多边形都已合并。
+        一个新的 gdsfactory 组件，只包含 `mergelayer` 上合并后的多边形。
+
+    Raises:
+        ValueError: 未指定 `mergelayer`，或后端名称未知。
+        RuntimeError: 合并失败，原始异常见 __cause__。
     """
     c_in = gf.get_component(component_in)
 
@@ -223,28 +1339,311 @@ def merge_polygons_in_layer(
             char if char.isalnum() or char in ['_', '-'] else '_' for char in base_name
         )
         return gf.Component(name=f"{safe_base_name}_merge_failed_no_input_component")
+    if mergelayer is None:
+        raise ValueError("merge_polygons_in_layer 需要指定 mergelayer")
 
     safe_original_name = "".join(
         char if char.isalnum() or char in ['_', '-'] else '_' for char in c_in.name
     )
     component_out = gf.Component(name=f"{safe_original_name}_layers_merged")
 
-    active_layers: LayerSpecs = c_in.layers
+    _merge_layers(c_in, component_out, [mergelayer], precision, backend, tile_size, parallel)
+    return component_out
 
-    # if mergelayer not in active_layers:
-    #     print(f"警告: 组件 '{c_in.name}' 中没有'{mergelayer}'图层可供处理。")
-    #     return component_out
-    # c_in.flatten()
-    try:
-        layer_merged_component = gf.boolean(
-            c_in,c_in, operation="or", layer=mergelayer
-        )
-    except Exception as e:
-        print(f"警告: 无法在图层 {mergelayer} 上为组件 '{c_in.name}' 执行布尔操作: {e}")
+# %% 导出时合并
+# 逐个单元写出，写入每个单元时按图层合并它自身的多边形，不生成中间组件，也不复制版图。
+# GDS 由下面的记录写出器自底向上逐单元流式写入文件，同一时刻只保留当前单元一个图层的合并结果，
+# 内存峰值取决于最大的单元而不是整个库。KLayout 没有逐单元写出 OASIS 的接口，OASIS 仍交给
+# `kdb.Layout.write`，需要一个只含导出图层、已合并的临时版图。
+# 属性 (整数键)、文本的对齐方式和字号、实例阵列与 KLayout 写出器的记录相同，见 tests/test_write_merged.py。
+_GDS_MAX_POINTS = 8190
 
-    if layer_merged_component:
-        component_out << layer_merged_component
-    return component_out
+
+def _gds_record(
+        rectype: int,
+        datatype: int,
+        data: bytes = b"",
+) -> bytes:
+    """拼接一条 GDSII 记录。"""
+    return struct.pack(">HBB", 4 + len(data), rectype, datatype) + data
+
+
+def _gds_string(value: str) -> bytes:
+    data = value.encode("ascii", errors="replace")
+    return data + b"\0" * (len(data) % 2)
+
+
+def _gds_real8(value: float) -> bytes:
+    """GDSII 的 8 字节实数：符号位、7 位 16 进制阶码 (偏移 64)、56 位尾数。"""
+    if value == 0:
+        return b"\0" * 8
+    sign = 0x80 if value < 0 else 0
+    value = abs(value)
+    exponent = 64
+    while value >= 1:
+        value /= 16
+        exponent += 1
+    while value < 1 / 16:
+        value *= 16
+        exponent -= 1
+    mantissa = int(round(value * 2 ** 56))
+    if mantissa >= 2 ** 56:
+        mantissa //= 16
+        exponent += 1
+    return struct.pack(">B", sign | exponent) + mantissa.to_bytes(7, "big")
+
+
+def _gds_xy(points) -> bytes:
+    return _gds_record(0x10, 0x03, np.asarray(points, dtype=">i4").tobytes())
+
+
+def _gds_properties(
+        layout,
+        prop_id: int,
+) -> bytes:
+    """PROPATTR / PROPVALUE 记录；与 KLayout 相同，只写出整数键的属性。"""
+    if not prop_id:
+        return b""
+    data = b""
+    for key, value in dict(layout.properties(prop_id)).items():
+        if isinstance(key, int):
+            data += _gds_record(0x2B, 0x02, struct.pack(">h", key)) + _gds_record(0x2C, 0x06, _gds_string(str(value)))
+    return data
+
+
+def _gds_boundaries(
+        poly,
+        layer: int,
+        datatype: int,
+        properties: bytes = b"",
+):
+    """把一个 kdb.Polygon (可含孔洞) 转成一个或多个 BOUNDARY 记录；孔洞按切线展开 (与 KLayout 写出器相同)，点数超过上限时拆分。"""
+    pending = [poly.resolved_holes() if poly.holes() else poly]
+    while pending:
+        simple = pending.pop()
+        if simple.num_points() > _GDS_MAX_POINTS:
+            pending += simple.split()
+            continue
+        points = [(pt.x, pt.y) for pt in simple.each_point_hull()]
+        points.append(points[0])
+        yield (_gds_record(0x08, 0x00) + _gds_record(0x0D, 0x02, struct.pack(">h", layer))
+               + _gds_record(0x0E, 0x02, struct.pack(">h", datatype)) + _gds_xy(points) + properties
+               + _gds_record(0x11, 0x00))
+
+
+def _gds_transform(
+        mirror: bool,
+        mag: float,
+        angle: float,
+        always: bool = False,
+) -> bytes:
+    """STRANS / MAG / ANGLE 记录；变换为恒等且 `always` 为 False 时省略。"""
+    if not (always or mirror or mag != 1 or angle != 0):
+        return b""
+    data = _gds_record(0x1A, 0x01, struct.pack(">H", 0x8000 if mirror else 0))
+    if mag != 1:
+        data += _gds_record(0x1B, 0x05, _gds_real8(mag))
+    if angle != 0:
+        data += _gds_record(0x1C, 0x05, _gds_real8(angle))
+    return data
+
+
+def _gds_instance(
+        layout,
+        inst,
+) -> bytes:
+    """把一个实例 (单个或规则阵列) 转成 SREF 或 AREF 记录。"""
+    array = inst.cell_inst
+    trans = array.cplx_trans
+    x, y = int(round(trans.disp.x)), int(round(trans.disp.y))
+    header = (_gds_record(0x12, 0x06, _gds_string(layout.cell(inst.cell_index).name))
+              + _gds_transform(trans.is_mirror(), trans.mag, trans.angle))
+    properties = _gds_properties(layout, inst.prop_id)
+    if array.is_regular_array() and (array.na > 1 or array.nb > 1):
+        a, b = array.a, array.b
+        xy = [(x, y), (x + array.na * a.x, y + array.na * a.y), (x + array.nb * b.x, y + array.nb * b.y)]
+        return (_gds_record(0x0B, 0x00) + header + _gds_record(0x13, 0x02, struct.pack(">hh", array.na, array.nb))
+                + _gds_xy(xy) + properties + _gds_record(0x11, 0x00))
+    return _gds_record(0x0A, 0x00) + header + _gds_xy([(x, y)]) + properties + _gds_record(0x11, 0x00)
+
+
+def _gds_text(
+        layout,
+        shape,
+        layer: int,
+        datatype: int,
+) -> bytes:
+    """TEXT 记录：对齐方式写入 PRESENTATION，字号 (单位: µm) 写入 MAG，与 KLayout 相同。"""
+    text = shape.text
+    data = (_gds_record(0x0C, 0x00) + _gds_record(0x0D, 0x02, struct.pack(">h", layer))
+            + _gds_record(0x16, 0x02, struct.pack(">h", datatype)))
+    halign, valign, font = text.halign.to_i(), text.valign.to_i(), text.font
+    if halign >= 0 or valign >= 0 or font > 0:
+        # 水平: 0 左 1 中 2 右；垂直: 0 上 1 中 2 下，与 KLayout 的 HAlign / VAlign 取值相同；未设置时按左下
+        halign = max(halign, 0)
+        valign = valign if valign >= 0 else 2
+        font = max(font, 0) & 3
+        data += _gds_record(0x17, 0x01, struct.pack(">H", (font << 4) | (valign << 2) | halign))
+    trans = text.trans
+    data += _gds_transform(trans.is_mirror(), text.size * layout.dbu if text.size else 1, trans.angle * 90,
+                           always=True)
+    data += _gds_xy([(text.x, text.y)]) + _gds_record(0x19, 0x06, _gds_string(text.string))
+    return data + _gds_properties(layout, shape.prop_id) + _gds_record(0x11, 0x00)
+
+
+def _cell_layer_region(
+        layout,
+        cell,
+        index: int,
+        merge: bool,
+):
+    """
+    取出 `cell` 自身 (不含子单元) 在图层 `index` 上的多边形，`merge` 为 True 时合并。
+
+    带属性的形状只与属性相同的形状合并，属性保留。
+    """
+    it = gf.kdb.RecursiveShapeIterator(layout, cell, index)
+    it.max_depth = 0
+    it.enable_properties()
+    region = gf.kdb.Region(it)
+    if merge:
+        region.merge()
+    return region
+
+
+def _export_layers(
+        component: Component,
+        layers,
+) -> list[tuple[int, int, int]]:
+    """
+    返回需要写出的 (图层索引, layer, datatype)；组件中有形状却不在 `layers` 中的图层给出警告。
+    """
+    layout = component.kdb_cell.layout()
+
+    def layer_tuple(index):
+        info = layout.get_info(index)
+        return info.layer, info.datatype
+
+    defined = {layer_tuple(gf.get_layer(layer)) for layer in layers}
+    dropped = sorted({
+        layer_tuple(index) for index in layout.layer_indexes()
+        if layer_tuple(index) not in defined and not component.kdb_cell.bbox(index).empty()
+    })
+    if dropped:
+        warnings.warn(f"图层 {dropped} 不在导出的图层列表中，不会写出。", stacklevel=3)
+    return [(index, *layer_tuple(index)) for index in layout.layer_indexes() if layer_tuple(index) in defined]
+
+
+def _export_cells(component: Component):
+    """自底向上产出组件及其全部子单元 (每个单元只出现一次)。"""
+    layout = component.kdb_cell.layout()
+    used = set(component.kdb_cell.called_cells()) | {component.kdb_cell.cell_index()}
+    for cell_index in layout.each_cell_bottom_up():
+        if cell_index in used:
+            yield layout.cell(cell_index)
+
+
+def _write_gds_streaming(
+        component: Component,
+        filename: str,
+        export: list[tuple[int, int, int]],
+        merge: bool,
+) -> None:
+    """逐单元流式写出 GDS：每个单元逐图层取出、合并、写出后即释放，不复制版图。"""
+    layout = component.kdb_cell.layout()
+    now = datetime.datetime.now()
+    stamp = struct.pack(">12h", *(now.year, now.month, now.day, now.hour, now.minute, now.second) * 2)
+    with open(filename, "wb") as f:
+        f.write(_gds_record(0x00, 0x02, struct.pack(">h", 600)))
+        f.write(_gds_record(0x01, 0x02, stamp))
+        f.write(_gds_record(0x02, 0x06, _gds_string("LIB")))
+        f.write(_gds_record(0x03, 0x05, _gds_real8(layout.dbu) + _gds_real8(layout.dbu * 1e-6)))
+        for cell in _export_cells(component):
+            f.write(_gds_record(0x05, 0x02, stamp))
+            f.write(_gds_record(0x06, 0x06, _gds_string(cell.name)))
+            for index, layer, datatype in export:
+                shapes = cell.shapes(index)
+                if shapes.is_empty():
+                    continue
+                region = _cell_layer_region(layout, cell, index, merge)
+                for poly in region.each():
+                    properties = _gds_properties(layout, poly.prop_id)
+                    for record in _gds_boundaries(poly, layer, datatype, properties):
+                        f.write(record)
+                del region
+                for shape in shapes.each(gf.kdb.Shapes.STexts):
+                    f.write(_gds_text(layout, shape, layer, datatype))
+            for inst in cell.each_inst():
+                f.write(_gds_instance(layout, inst))
+            f.write(_gds_record(0x07, 0x00))
+        f.write(_gds_record(0x04, 0x00))
+
+
+def _write_with_klayout(
+        component: Component,
+        filename: str,
+        export: list[tuple[int, int, int]],
+        merge: bool,
+) -> None:
+    """
+    由 `kdb.Layout.write` 写出 (用于 OASIS)：自底向上把各单元在导出图层上的合并结果和实例复制到临时版图。
+
+    临时版图只包含导出的图层，且已合并，通常小于原版图；未导出的图层不复制。
+    """
+    layout = component.kdb_cell.layout()
+    out = gf.kdb.Layout()
+    out.dbu = layout.dbu
+    targets = {index: out.layer(layer, datatype) for index, layer, datatype in export}
+    mapping = {}
+    for cell in _export_cells(component):
+        target = out.create_cell(cell.name)
+        mapping[cell.cell_index()] = target.cell_index()
+        if cell.prop_id:
+            target.prop_id = cell.prop_id
+        for index, _, _ in export:
+            shapes = cell.shapes(index)
+            if shapes.is_empty():
+                continue
+            target.shapes(targets[index]).insert(_cell_layer_region(layout, cell, index, merge))
+            for shape in shapes.each(gf.kdb.Shapes.STexts):
+                target.shapes(targets[index]).insert(shape)
+        for inst in cell.each_inst():
+            array = inst.cell_inst.dup()
+            array.cell_index = mapping[array.cell_index]
+            target.insert(array, inst.prop_id)
+    out.write(filename)
+
+
+def write_merged(
+        component_in: ComponentSpec,
+        filename: str,
+        layers=None,
+        merge: bool = True,
+) -> str:
+    """
+    把组件及其全部子单元写入 GDS 或 OASIS 文件，写入时逐个单元按图层合并其自身的多边形。
+
+    层级结构、实例 (含阵列) 位置、文本的对齐方式与字号、整数键的属性保持不变，输入组件不被修改。
+    GDS (.gds) 自底向上逐单元流式写出，同一时刻只保留当前单元一个图层的合并结果，不复制版图；
+    OASIS (.oas / .oasis) 交给 KLayout 的写出器，需要一个只含导出图层、已合并的临时版图。
+
+    参数:
+        component_in: 输入的 gdsfactory 组件或组件引用。
+        filename: 输出文件名，按扩展名选择格式。
+        layers: 需要写出的图层。默认为 `LayerMapUserDef` 中定义的全部图层；不在列表中的图层不写出，并给出警告。
+        merge: 是否按图层合并每个单元自身的多边形。
+
+    返回:
+        输出文件名。
+    """
+    component = gf.get_component(component_in)
+    layers = list(LayerMapUserDef) if layers is None else layers
+    export = _export_layers(component, layers)
+    if os.path.splitext(filename)[1].lower() in (".oas", ".oasis"):
+        _write_with_klayout(component, filename, export, merge)
+    else:
+        _write_gds_streaming(component, filename, export, merge)
+    return filename
 
 if __name__ == "__main__":
     # --- 创建一个示例组件用于测试 ---
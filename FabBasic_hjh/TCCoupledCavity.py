@@ -6,7 +6,7 @@ from .SnapMerge import snap_all_polygons_iteratively
 
 
 # %% defult in out taper
-@gf.cell
+@geometry_cell
 def create_taper(width1, width2, lengthleft=20, lengthtaper=200, lengthright=20, layer: LayerSpec = LAYER.WG):
     taper = gf.Component("taper")
     taper_te = taper << gf.c.taper(width1=width1, width2=width2, length=lengthtaper, layer=layer)
@@ -19,12 +19,28 @@ def create_taper(width1, width2, lengthleft=20, lengthtaper=200, lengthright=20,
     return taper
 
 
-taper_in = create_taper("taper_in", width1=0.3, width2=1, layer=LAYER.WG)
-taper_out = create_taper("taper_out", width1=1, width2=0.2, layer=LAYER.WG)
+@LazyComponent
+def _taper_in():
+    return create_taper("taper_in", width1=0.3, width2=1, layer=LAYER.WG)
+
+
+@LazyComponent
+def _taper_out():
+    return create_taper("taper_out", width1=1, width2=0.2, layer=LAYER.WG)
+
+
+_LAZY_ATTRS = {"taper_in": _taper_in, "taper_out": _taper_out}
+
+
+def __getattr__(name):
+    # 默认输入输出 taper 在第一次被访问时才构建，见 `LazyComponent`
+    if name in _LAZY_ATTRS:
+        return _LAZY_ATTRS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # TCRingBoomerangT1: Total singleBoomerang Ring
-@gf.cell
+@geometry_cell
 def TCRingBoomerangT1(
         r_ring: float = 120,
         r_euler_min: float = 100,
@@ -49,8 +65,8 @@ def TCRingBoomerangT1(
         gap_heat: float = 1,
         delta_heat: float = 20,
         spacing: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         is_heat: bool = True,
         oplayer: LayerSpec = LAYER.WG,
         heatlayer: LayerSpec = LAYER.M1,
@@ -138,6 +154,7 @@ def TCRingBoomerangT1(
     comp_Ring = sr << ring
 
     # input
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     comp_Ring.connect("o1", other=tinring.ports["o2"], allow_width_mismatch=True, mirror=True)
     comp_Ring.movex(pos_ring)
@@ -181,7 +198,7 @@ def TCRingBoomerangT1(
 
 
 # TCRingDouBoomerangT1: Total singleBoomerang Ring
-@gf.cell
+@geometry_cell
 def TCRingDouBoomerangT1(
         r_ring: float = 120,
         r_euler_min: float = 100,
@@ -207,8 +224,8 @@ def TCRingDouBoomerangT1(
         delta_heat: float = 20,
         delta_lb2: float = 20,
         spacing: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         is_heat: bool = True,
         oplayer: LayerSpec = LAYER.WG,
         heatlayer: LayerSpec = LAYER.M1,
@@ -290,6 +307,7 @@ def TCRingDouBoomerangT1(
     comp_Ring = sr << ring
 
     # input
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     comp_Ring.connect("o1", other=tinring.ports["o2"], allow_width_mismatch=True, mirror=True)
     comp_Ring.movex(pos_ring)
@@ -340,7 +358,7 @@ def TCRingDouBoomerangT1(
 
 
 # TCRingTriBoomerangT1: Total singleBoomerang Ring
-@gf.cell
+@geometry_cell
 def TCRingTriBoomerangT1(
         r_ring: float = 120,
         r_euler_min: float = 100,
@@ -366,8 +384,8 @@ def TCRingTriBoomerangT1(
         delta_heat: float = 20,
         delta_lb2: float = 20,
         spacing: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         oplayer: LayerSpec = LAYER.WG,
         heatlayer: LayerSpec = LAYER.M1,
         type_heater: str = "default",  # 控制加热器类型
@@ -453,6 +471,7 @@ def TCRingTriBoomerangT1(
 
     # port edge io
     ## input
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     comp_Ring.connect("o3", other=tinring.ports["o2"], allow_width_mismatch=True, mirror=True)
     comp_Ring.movex(pos_ring)
@@ -499,7 +518,7 @@ def TCRingTriBoomerangT1(
 
 
 # TCRingT1: TCRing use RingPulleyT1
-@gf.cell
+@geometry_cell
 def TCCoupleDouRingT1(
         r_ring1: float = 120,
         width_ring1: float = 1,
@@ -530,8 +549,8 @@ def TCCoupleDouRingT1(
         length_ad_horizontal: float = 10,
         length_ad_vertical: float = 10,
         pos_ring: float = 500,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         is_heat: bool = True,
         is_ad: bool = False,
         oplayer: LayerSpec = LAYER.WG,
@@ -677,6 +696,7 @@ def TCCoupleDouRingT1(
     CCRing = sr << ring
 
     ## input
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     CCRing.connect("o1", other=tinring.ports["o2"], allow_width_mismatch=True, mirror=True)
     CCRing.movex(pos_ring)
@@ -730,7 +750,7 @@ def TCCoupleDouRingT1(
     # add_labels_to_ports(ring, (612, 8))
     return sr
 # TCCoupleDouRaceTrackST1: Total component Coupled racetrack cavity use Coupled RaceTrack
-@gf.cell
+@geometry_cell
 def TCCoupleDouRaceTrackT1(
         r_ring: float = 120,
         width_ring: float = 1,
@@ -755,8 +775,8 @@ def TCCoupleDouRaceTrackT1(
         length_ad_horizontal: float = 10,
         length_ad_vertical: float = 10,
         pos_ring: float = 500,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         is_heat: bool = True,
         is_ad: bool = False,
         type_couple = "P",
@@ -892,6 +912,7 @@ def TCCoupleDouRaceTrackT1(
     CCRing = sr << ring
 
     ## input
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     CCRing.connect("o1", other=tinring.ports["o2"], allow_width_mismatch=True, mirror=True)
     CCRing.movex(pos_ring)
@@ -937,7 +958,7 @@ def TCCoupleDouRaceTrackT1(
     add_labels_to_ports(sr, (512, 8))
     return sr
 # TCCoupleDouRaceTrackT2: Total component Coupled racetrack cavity use CoupledRaceTrack
-@gf.cell
+@geometry_cell
 def TCCoupleDouRaceTrackT2(
         r_ring: float = 120,
         r_euler_min: float = 100,
@@ -959,8 +980,8 @@ def TCCoupleDouRaceTrackT2(
         length_run: float = 400,
         length_taper2ring: float = 600,
         pos_ring= [500,2000],
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         is_heat: bool = True,
         type_heater: str = "default",  # 控制加热器类型
         type_couple: str = "P",
@@ -1038,6 +1059,7 @@ def TCCoupleDouRaceTrackT2(
     CCRing = sr << ring
     CCRing.move((pos_ring[0],-pos_ring[1]))
     ## input
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     tinring.rotate(-90)
     # tinring.movey(tinring.ports["o2"].center[1]-tinring.ports["o1"].center[1])
@@ -2,25 +2,44 @@ from .BasicDefine import *
 from .RaceTrack import *
 
 width_single = 1
-taper_in_DFB = gf.Component()
-taper_in_te0 = taper_in_DFB << gf.c.taper(width1=0.15, width2=width_single, length=200, layer=LAYER.WG)
-taper_in_tes0 = taper_in_DFB << GfCStraight(width=0.15, length=50, layer=LAYER.WG)
-taper_in_tes1 = taper_in_DFB << GfCStraight(width=width_single, length=50, layer=LAYER.WG)
-taper_in_te0.connect("o1", taper_in_tes0.ports["o2"])
-taper_in_tes1.connect("o1",taper_in_te0.ports["o2"])
-taper_in_DFB.add_port(name="o1", port=taper_in_tes0.ports["o1"])
-taper_in_DFB.add_port(name="o2", port=taper_in_tes1.ports["o2"])
-
-taper_in_DFB_reverse = gf.Component()
-taper_in_te0 = taper_in_DFB_reverse << gf.c.taper(width1=0.15, width2=width_single, length=200, layer=LAYER.WG)
-taper_in_tes0 = taper_in_DFB_reverse << GfCStraight(width=0.15, length=50, layer=LAYER.WG)
-taper_in_tes1 = taper_in_DFB_reverse << GfCStraight(width=width_single, length=50, layer=LAYER.WG)
-taper_in_te0.connect("o1", taper_in_tes0.ports["o2"])
-taper_in_tes1.connect("o1",taper_in_te0.ports["o2"])
-taper_in_DFB_reverse.add_port(name="o1", port=taper_in_tes0.ports["o2"])
-taper_in_DFB_reverse.add_port(name="o2", port=taper_in_tes1.ports["o1"])
-
-@gf.cell
+
+
+@LazyComponent
+def _taper_in_DFB():
+    taper_in_DFB = gf.Component()
+    taper_in_te0 = taper_in_DFB << gf.c.taper(width1=0.15, width2=width_single, length=200, layer=LAYER.WG)
+    taper_in_tes0 = taper_in_DFB << GfCStraight(width=0.15, length=50, layer=LAYER.WG)
+    taper_in_tes1 = taper_in_DFB << GfCStraight(width=width_single, length=50, layer=LAYER.WG)
+    taper_in_te0.connect("o1", taper_in_tes0.ports["o2"])
+    taper_in_tes1.connect("o1",taper_in_te0.ports["o2"])
+    taper_in_DFB.add_port(name="o1", port=taper_in_tes0.ports["o1"])
+    taper_in_DFB.add_port(name="o2", port=taper_in_tes1.ports["o2"])
+    return taper_in_DFB
+
+
+@LazyComponent
+def _taper_in_DFB_reverse():
+    taper_in_DFB_reverse = gf.Component()
+    taper_in_te0 = taper_in_DFB_reverse << gf.c.taper(width1=0.15, width2=width_single, length=200, layer=LAYER.WG)
+    taper_in_tes0 = taper_in_DFB_reverse << GfCStraight(width=0.15, length=50, layer=LAYER.WG)
+    taper_in_tes1 = taper_in_DFB_reverse << GfCStraight(width=width_single, length=50, layer=LAYER.WG)
+    taper_in_te0.connect("o1", taper_in_tes0.ports["o2"])
+    taper_in_tes1.connect("o1",taper_in_te0.ports["o2"])
+    taper_in_DFB_reverse.add_port(name="o1", port=taper_in_tes0.ports["o2"])
+    taper_in_DFB_reverse.add_port(name="o2", port=taper_in_tes1.ports["o1"])
+    return taper_in_DFB_reverse
+
+
+_LAZY_ATTRS = {"taper_in_DFB": _taper_in_DFB, "taper_in_DFB_reverse": _taper_in_DFB_reverse}
+
+
+def __getattr__(name):
+    # DFB 输入 taper 在第一次被访问时才构建，见 `LazyComponent`
+    if name in _LAZY_ATTRS:
+        return _LAZY_ATTRS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@geometry_cell
 def TCRaceTrackP(
         r_ring: float = 2000,
         r_bend: float = 20,
@@ -167,7 +186,7 @@ def TCRaceTrackP(
     return CompOut
 
 # %% TCRaceTrack2_1: racetrack ring,straigh couple straight in
-@gf.cell
+@geometry_cell
 def TCRaceTrackS(
         r_ring: float = 2000,
         r_bend: float = r_euler_true,
@@ -259,7 +278,7 @@ def TCRaceTrackS(
     return CompOut
 
 # %% TCRaceTrack2_2: racetrack ring,straigh couple straight out
-@gf.cell
+@geometry_cell
 def TCRaceTrackS2(
         r_ring: float = 2000,
         r_bend: float = r_euler_true,
@@ -340,7 +359,7 @@ def TCRaceTrackS2(
 
 
 # %% TCRaceTrack2_3: racetrack ring,straight couple straight in & out
-@gf.cell
+@geometry_cell
 def TCRaceTrackS3(
         r_ring: float = 2000,
         width_ring: float = 8,
@@ -479,7 +498,7 @@ def TCRaceTrackS3h(
 
 
 # %% TCTaperRaceTrack1: racetrack ring pulley coupling ring coupler + ring + bend
-@gf.cell
+@geometry_cell
 def TCTaperRaceTrackP(
         r_ring: float = 2000,
         r_bend: float = r_euler_true,
@@ -558,7 +577,7 @@ def TCTaperRaceTrackP(
 
 
 # %% TCTaperRaceTrack2: racetrack ring pulley coupling ring coupler + bend + taper
-@gf.cell
+@geometry_cell
 def TCTaperRaceTrackS(
         r_ring: float = 2000,
         r_bend: float = r_euler_true,
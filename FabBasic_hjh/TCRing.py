@@ -18,12 +18,28 @@ def create_taper(name, width1, width2, lengthleft=100, lengthtaper=100, lengthri
     return taper
 
 
-taper_in = create_taper("taper_in", width1=0.3, width2=1, layer=LAYER.WG)
-taper_out = create_taper("taper_out", width1=1, width2=0.2, layer=LAYER.WG)
+@LazyComponent
+def _taper_in():
+    return create_taper("taper_in", width1=0.3, width2=1, layer=LAYER.WG)
+
+
+@LazyComponent
+def _taper_out():
+    return create_taper("taper_out", width1=1, width2=0.2, layer=LAYER.WG)
+
+
+_LAZY_ATTRS = {"taper_in": _taper_in, "taper_out": _taper_out}
+
+
+def __getattr__(name):
+    # 默认输入输出 taper 在第一次被访问时才构建，见 `LazyComponent`
+    if name in _LAZY_ATTRS:
+        return _LAZY_ATTRS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # % TCRing: simple straight pulley
-@gf.cell
+@geometry_cell
 def TCRing(
         r_ring: float = 120,
         r_euler_true: float = r_euler_true,
@@ -36,8 +52,8 @@ def TCRing(
         pos_ring: float = 500,
         length_th_vertical=100,
         gap_rc: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         is_ad: bool = False,
         oplayer: LayerSpec = LAYER.WG,
         heater_config:HeaterConfigClass=None,
@@ -98,7 +114,7 @@ def TCRing(
 
 
 # %% TCRing1_2: add-drop ring
-@gf.cell
+@geometry_cell
 def TCRing1AD(
         r_ring: float = 120,
         width_ring: float = 1,
@@ -109,8 +125,8 @@ def TCRing1AD(
         length_total: float = 2000,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tout: Component = taper_out,
-        tin: Component = taper_in,
+        tout: Component = _taper_out,
+        tin: Component = _taper_in,
         oplayer: LayerSpec = LAYER.WG,
         heater_config:HeaterConfigClass=None,
 ) -> Component:
@@ -148,6 +164,7 @@ def TCRing1AD(
     S_near = gf.Section(width=width_near, layer=oplayer, port_names=("o1", "o2"))
     CS_near = gf.CrossSection(sections=[S_near])
     # component
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     toutring_th = sr << tout
     toutring_ad = sr << tout
@@ -215,7 +232,7 @@ def TCRing1AD(
 
 
 # %% TCRing: simple straight pulley
-@gf.cell
+@geometry_cell
 def TCRing1_3(
         r_ring: float = 120,
         width_ring: float = 1,
@@ -226,8 +243,8 @@ def TCRing1_3(
         length_total: float = 10000,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         oplayer: LayerSpec = LAYER.WG,
         heater_config:HeaterConfigClass=None,
 ) -> Component:
@@ -279,7 +296,7 @@ def TCRing1_3(
 
 
 # %% TCRing1DC: RingPulley1 different coupling
-@gf.cell
+@geometry_cell
 def TCRing1DC(
         r_ring: float = 120,
         r_euler_false: float = r_euler_false,
@@ -295,8 +312,8 @@ def TCRing1DC(
         pos_ring: float = 2000,
         gap_rc1: float = 1,
         gap_rc2: float = 4,
-        tout: Component = taper_out,
-        tin: Component = taper_in,
+        tout: Component = _taper_out,
+        tin: Component = _taper_in,
         oplayer: LayerSpec = LAYER.WG,
         heater_config:HeaterConfigClass=None,
 ) -> Component:
@@ -341,6 +358,7 @@ def TCRing1DC(
     S_near2 = gf.Section(width=width_near2, layer=oplayer, port_names=("o1", "o2"))
     CS_near2 = gf.CrossSection(sections=[S_near2])
     # component
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     toutring_th = sr << tout
     toutring_ad = sr << tout
@@ -413,7 +431,7 @@ def TCRing1DC(
 
 
 # %% TCRing2: bend PulleyRing
-@gf.cell
+@geometry_cell
 def TCRing2(
         r_ring: float = 120,
         width_ring: float = 1,
@@ -425,8 +443,8 @@ def TCRing2(
         length_th_vertical: float = 101,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tout: Component = taper_out,
-        tin: Component = taper_in,
+        tout: Component = _taper_out,
+        tin: Component = _taper_in,
         oplayer: LayerSpec = LAYER.WG,
         heater_config:HeaterConfigClass=None,
 ) -> Component:
@@ -492,8 +510,8 @@ def TCRing2(
 #         length_th_vertical=500,
 #         delta_ele=5,
 #         gap_rc: float = 1,
-#         tout: Component = taper_out,
-#         tin: Component = taper_in,
+#         tout: Component = _taper_out,
+#         tin: Component = _taper_in,
 #         oplayer: LayerSpec = LAYER.WG,
 #         elelayer: LayerSpec = LAYER.M1,
 # ) -> [Component]:
@@ -554,7 +572,7 @@ def TCRing2(
 #
 
 # %% TCRing2_2: pulleyRing taper_s2n after output bend
-@gf.cell
+@geometry_cell
 def TCRing2_2(
         r_ring: float = 120,
         width_ring: float = 1,
@@ -565,8 +583,8 @@ def TCRing2_2(
         length_total: float = 10000,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         oplayer: LayerSpec = LAYER.WG,
 ) -> Component:
     """
@@ -614,7 +632,7 @@ def TCRing2_2(
 
 
 # %% TCRing2_3: pulleyRing taper_s2n before output bend
-@gf.cell
+@geometry_cell
 def TCRing2_3(
         r_ring: float = 120,
         width_ring: float = 1,
@@ -625,8 +643,8 @@ def TCRing2_3(
         length_total: float = 10000,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         oplayer: LayerSpec = LAYER.WG,
 ) -> Component:
     """
@@ -676,7 +694,7 @@ def TCRing2_3(
 
 
 # %% TCRing3:couple angle could lager than 90,less than 180
-@gf.cell
+@geometry_cell
 def TCRing3(
         r_ring: float = 120,
         r_bend: float = r_euler_true,
@@ -688,8 +706,8 @@ def TCRing3(
         length_total: float = 10000,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tout: Component = taper_out,
-        tin: Component = taper_in,
+        tout: Component = _taper_out,
+        tin: Component = _taper_in,
         oplayer: LayerSpec = LAYER.WG,
 ) -> Component:
     """
@@ -721,6 +739,7 @@ def TCRing3(
         RingC: 环形波导的中心端口。
     """
     sr = gf.Component()
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     toutring = sr << tout
     ring = sr << RingPulley3(
@@ -760,7 +779,7 @@ def TCRing3(
 
 
 # %% TCRing4: couple angle could lager than 180
-@gf.cell
+@geometry_cell
 def TCRing4(
         r_ring: float = 120,
         width_ring: float = 1,
@@ -771,8 +790,8 @@ def TCRing4(
         length_total: float = 10000,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tout: Component = taper_out,
-        tin: Component = taper_in,
+        tout: Component = _taper_out,
+        tin: Component = _taper_in,
         oplayer: LayerSpec = LAYER.WG,
 ) -> Component:
     """
@@ -804,6 +823,7 @@ def TCRing4(
         RingC: 环形波导的中心端口。
     """
     sr = gf.Component()
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     toutring = sr << tout
     ring = sr << RingPulley4(
@@ -841,7 +861,7 @@ def TCRing4(
 
 
 # % TCFingerRing1: taper before bend out
-@gf.cell
+@geometry_cell
 def TCFingerRing1(
         r_ring: float = 120,
         r_side: float = 120,
@@ -860,8 +880,8 @@ def TCFingerRing1(
         pos_ring: float = 500,
         gap_rc: float = 1,
         heaterconfig: HeaterConfigClass = None,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         oplayer: LayerSpec = LAYER.WG,
 ) -> Component:
     """
@@ -932,6 +952,7 @@ def TCFingerRing1(
         if "Heat" in port.name:
             ring.add_port(port.name, port=port)
     Ring = sr << ring
+    tin, tout = resolve_component(tin), resolve_component(tout)
     if tin != None:
         tinring = sr << tin
         Ring.connect("Input", other=tinring.ports["o2"], allow_width_mismatch=True, mirror=True)
@@ -958,7 +979,7 @@ def TCFingerRing1(
     return sr
 
 # TCRingT1: TCRing use RingPulleyT1
-@gf.cell
+@geometry_cell
 def TCRingT1(
         r_ring: float = 120,
         r_euler_min: float = r_euler_true,
@@ -973,8 +994,8 @@ def TCRingT1(
         length_busheater: float = 1,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         is_ad: bool = False,
         oplayer: LayerSpec = LAYER.WG,
         direction_heater: str = "up",
@@ -1097,6 +1118,7 @@ def TCRingT1(
     Ring = sr << ring
 
     # input
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     Ring.connect("o1", other=tinring.ports["o2"], allow_width_mismatch=True, mirror=True)
     Ring.movex(pos_ring)
@@ -1136,7 +1158,7 @@ def TCRingT1(
 
 
 # TCRingT2
-@gf.cell
+@geometry_cell
 def TCRingT2(
         r_ring: float = 120,
         r_euler_min: float = r_euler_true,
@@ -1151,8 +1173,8 @@ def TCRingT2(
         length_busheater: float = 100,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         oplayer: LayerSpec = LAYER.WG,
         position_taper: str = "before_bend",  # 控制锥形波导的位置
         heater_config_ring: HeaterConfigClass = None,  # 控制加热器类型
@@ -1241,6 +1263,7 @@ def TCRingT2(
     Ring = sr << ring
 
     # input
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     Ring.connect("o1", other=tinring.ports["o2"], allow_width_mismatch=True, mirror=True)
     Ring.movex(pos_ring)
@@ -1273,7 +1296,7 @@ def TCRingT2(
     return sr
 
 
-@gf.cell
+@geometry_cell
 def TCRingDCouple(
         r_ring: float = 120,
         r_euler_min: float = r_euler_true,
@@ -1286,8 +1309,8 @@ def TCRingDCouple(
         length_th_horizontal: float = 20,
         pos_ring: float = 500,
         gap_rc: float = 1,
-        tin: Component = taper_in,
-        tout: Component = taper_out,
+        tin: Component = _taper_in,
+        tout: Component = _taper_out,
         oplayer: LayerSpec = LAYER.WG,
         heater_config_ring: HeaterConfigClass = None,
         heater_config_couple: HeaterConfigClass = None,
@@ -1377,6 +1400,7 @@ def TCRingDCouple(
     Ring = sr << ring
 
     # input
+    tin, tout = resolve_component(tin), resolve_component(tout)
     tinring = sr << tin
     Ring.connect("RingIn", other=tinring.ports["o2"], allow_width_mismatch=True, mirror=True)
     Ring.movex(pos_ring)
@@ -16,3 +16,12 @@ from .FabBasic_hjh.TCRing import *
 from .FabBasic_hjh.memyshev import *
 from .FabBasic_hjh.SnapMerge import *
 from .FabBasic_hjh.MultiRaceTrack import *
+
+
+def __getattr__(name):
+    # 参考组件与 PDK 延迟构建，星号导入带不出来，这里转发到定义它们的模块
+    from .FabBasic_hjh import BasicDefine, TCRaceTrack
+    for module in (BasicDefine, TCRaceTrack):
+        if name in module._LAZY_ATTRS:
+            return module._LAZY_ATTRS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
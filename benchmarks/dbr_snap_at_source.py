@@ -0,0 +1,71 @@
+"""
+snap-at-source 基准：同一组 DBR 与加热器分别在关闭 (浮点生成 + 事后捕捉) 和打开 snap-at-source 时生成，
+比较端到端耗时，并检查两种方式的几何是否一致 (XOR 面积)。
+
+两种模式的输入完全相同；模式计入单元名 (见 `geometry_cell`)，不会取到另一模式下缓存的单元。
+与原流程一致，只有 DBRFromCsvOffset 与 SGDBRFromCsvOffset 在关闭模式时做事后捕捉。
+
+用法 (需要能导入 AIPLPhMTools):
+    python benchmarks/dbr_snap_at_source.py
+"""
+import os
+import tempfile
+import time
+
+import gdsfactory as gf
+import numpy as np
+
+from AIPLPhMTools.FabBasic_hjh.BasicDefine import LAYER, HeaterConfigClass, configure_snap_at_source
+from AIPLPhMTools.FabBasic_hjh.DBR import DBRFromCsvOffset, EstrDBRFromCsvOffset, SGDBRFromCsvOffset
+from AIPLPhMTools.FabBasic_hjh.Heater import DifferentHeater
+
+NUM_PERIODS = 4000
+HEATER_CONFIG = HeaterConfigClass(TypeHeater="spilt", WidthHeat=4, WidthRoute=10, DeltaHeat=10, GapHeat=3,
+                                  WidthVia=0.5, Spacing=1.1, LayerHeat=LAYER.M1, LayerRoute=LAYER.M2,
+                                  LayerVia=LAYER.VIA)
+
+
+def _build_all(csv_name: str, radius: float = 300) -> tuple[dict, float]:
+    t0 = time.perf_counter()
+    built = {
+        "DBRFromCsvOffset": DBRFromCsvOffset(CSVName=csv_name, IsHeat=True),
+        "SGDBRFromCsvOffset": SGDBRFromCsvOffset(CSVName=csv_name, IsHeat=True),
+        "EstrDBRFromCsvOffset": EstrDBRFromCsvOffset(CSVName=csv_name),
+        "DifferentHeater": DifferentHeater(gf.path.arc(radius=radius, angle=180), HeaterConfig=HEATER_CONFIG),
+    }
+    return built, time.perf_counter() - t0
+
+
+def main():
+    rng = np.random.default_rng(0)
+    # 列顺序与默认的 Wcol=[1, 3]、Lcol=[2, 4] 一致；长度故意不在网格上
+    table = np.column_stack([
+        rng.uniform(0.9, 1.1, NUM_PERIODS), rng.uniform(0.15, 0.25, NUM_PERIODS),
+        rng.uniform(0.6, 0.8, NUM_PERIODS), rng.uniform(0.15, 0.25, NUM_PERIODS),
+    ])
+    csv_dir = tempfile.mkdtemp()
+    csv_name = os.path.join(csv_dir, "dbr.csv")
+    np.savetxt(csv_name, table, delimiter=",")
+    warmup_name = os.path.join(csv_dir, "warmup.csv")
+    np.savetxt(warmup_name, table[:20], delimiter=",")
+
+    # 预热：两种模式各用一个小表和不同的加热器半径跑一遍，排除首次导入和进程池启动的开销
+    for enabled in (False, True):
+        configure_snap_at_source(enabled)
+        _build_all(warmup_name, radius=50)
+    try:
+        configure_snap_at_source(False)
+        legacy, t_legacy = _build_all(csv_name)
+        configure_snap_at_source(True)
+        at_source, t_source = _build_all(csv_name)
+    finally:
+        configure_snap_at_source(False)
+    print(f"事后捕捉: {t_legacy:.3f} s, snap-at-source: {t_source:.3f} s, 加速 {t_legacy / t_source:.2f}x")
+    for name in legacy:
+        for layer in legacy[name].layers:
+            xor = legacy[name].get_region(layer) ^ at_source[name].get_region(layer)
+            print(f"{name} {layer}: XOR 面积 {xor.area()} DBU^2")
+
+
+if __name__ == "__main__":
+    main()
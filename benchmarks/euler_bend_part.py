@@ -0,0 +1,51 @@
+"""
+`euler_Bend_Part` 的微基准：向量化 (cumsum) 积分与原先逐点累加的写法对比耗时。
+两者结果一致性的检查见 tests/test_euler_part.py。
+
+用法 (需要能导入 AIPLPhMTools):
+    python benchmarks/euler_bend_part.py
+"""
+import time
+
+import numpy as np
+from gdsfactory.pdk import get_active_pdk
+
+from AIPLPhMTools.FabBasic_hjh.BasicDefine import euler_Bend_Part
+
+
+def _euler_part_loop(radius1, radius2, angle, p, npoints):
+    # 原先逐点累加的欧拉段积分，仅作对照
+    alpha_euler = p * np.radians(angle)
+    k1, k2 = 1.0 / radius1, 1.0 / radius2
+    s_total = 2 * alpha_euler / (k1 + k2)
+    ds = s_total / (npoints - 1)
+    xs, ys, cur_x, cur_y, cur_theta = [], [], 0.0, 0.0, 0.0
+    for i, s in enumerate(np.linspace(0.0, s_total, npoints)):
+        cur_theta += 0.0 if i == 0 else (k1 + (k2 - k1) * (s / s_total)) * ds
+        cur_x += ds * np.cos(cur_theta)
+        cur_y += ds * np.sin(cur_theta)
+        xs.append(cur_x)
+        ys.append(cur_y)
+    return np.column_stack([xs, ys])
+
+
+def _best(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    for radius in (100, 1000, 5000):
+        npoints = 2 * int(np.ceil(2 * radius * np.pi / 2 / get_active_pdk().bend_points_distance / 2))
+        t_vec = _best(lambda: euler_Bend_Part(radius, 2 * radius, 90, 0.5, npoints=npoints))
+        t_loop = _best(lambda: _euler_part_loop(radius, 2 * radius, 90, 0.5, npoints // 2))
+        print(f"radius={radius}: {npoints} 点, euler_Bend_Part (cumsum) {t_vec * 1e3:.2f} ms, "
+              f"逐点欧拉段 {t_loop * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
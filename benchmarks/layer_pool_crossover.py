@@ -0,0 +1,91 @@
+"""
+测量逐层进程池 (`_map_layers` / `_merge_layer_tiled`) 的串行/并行分界点，用于确定
+`configure_layer_pool` 的 `min_points` 默认值。
+
+并行路径的耗时模型为 T_par(N) = f + c·N + a·N / W，串行为 T_ser(N) = a·N：
+    a: 任务本身每个顶点的耗时 (串行测得)；
+    c: 每个顶点额外的 int32 编码、进程间传输和解码耗时；
+    f: 每次分发的固定开销 (提交、唤醒工作进程、取回结果)；
+    W: 工作进程数。
+用单个工作进程的进程池测出 T_pool1(N) = f + c·N + a·N，与串行比较即可在单核机器上拟合 f 和 c，
+分界点为 N* = f / (a·(1 - 1/W) - c)。
+
+用法 (工作进程需要能导入 AIPLPhMTools，即已安装或其所在目录在 PYTHONPATH 中):
+    python benchmarks/layer_pool_crossover.py
+"""
+import time
+
+import gdsfactory as gf
+import numpy as np
+from joblib.externals.loky import get_reusable_executor
+
+from AIPLPhMTools.FabBasic_hjh import SnapMerge
+
+N_LAYERS = 4
+VERTICES_PER_POLYGON = 256
+
+
+def _layer(n_points: int, seed: int):
+    # 互相部分重叠的椭圆，近似弯曲波导/环等多顶点多边形
+    rng = np.random.default_rng(seed)
+    region = gf.kdb.Region()
+    for _ in range(max(n_points // VERTICES_PER_POLYGON, 1)):
+        x, y = (int(v) for v in rng.integers(0, 2_000_000, 2))
+        w, h = (int(v) for v in rng.integers(2_000, 40_000, 2))
+        region.insert(gf.kdb.Polygon.ellipse(gf.kdb.Box(x, y, x + w, y + h), VERTICES_PER_POLYGON))
+    return region
+
+
+def _serial(task, regions, args):
+    t0 = time.perf_counter()
+    for region in regions:
+        SnapMerge._timed_task(task, region.dup(), *args)
+    return time.perf_counter() - t0
+
+
+def _pool(executor, task, regions, args):
+    # 与 _map_layers 的并行分支相同：父进程编码、提交、取回并解码
+    t0 = time.perf_counter()
+    arrays = [SnapMerge._region_to_arrays(region) for region in regions]
+    futures = [executor.submit(SnapMerge._region_task, task, a, *args) for a in arrays]
+    for future in futures:
+        SnapMerge._arrays_to_region(*future.result()[0])
+    return time.perf_counter() - t0
+
+
+def _best(fn, repeat=3):
+    return min(fn() for _ in range(repeat))
+
+
+def main():
+    executor = get_reusable_executor(max_workers=1)
+    tasks = {
+        "snap (_snap_region)": (SnapMerge._snap_region, (0.001, 0.001)),
+        "merge (klayout)": (SnapMerge._merge_backend_klayout, (1,)),
+    }
+    sizes = [8_000, 32_000, 128_000, 512_000]
+    for name, (task, args) in tasks.items():
+        executor.submit(SnapMerge._region_task, task, SnapMerge._region_to_arrays(_layer(256, 0)), *args).result()
+        rows = []
+        for n in sizes:
+            regions = [_layer(n // N_LAYERS, seed) for seed in range(N_LAYERS)]
+            ser = _best(lambda: _serial(task, regions, args))
+            par = _best(lambda: _pool(executor, task, regions, args))
+            rows.append((n, ser, par))
+        n = np.array([r[0] for r in rows], dtype=float)
+        ser = np.array([r[1] for r in rows])
+        par = np.array([r[2] for r in rows])
+        a = np.polyfit(n, ser, 1)[0]
+        c, f = np.polyfit(n, par - ser, 1)
+        print(f"\n{name}")
+        for (points, s, p) in rows:
+            print(f"  N = {points:>8d}: serial {s * 1e3:8.1f} ms, 1-worker pool {p * 1e3:8.1f} ms")
+        print(f"  a = {a * 1e9:.0f} ns/pt, c = {c * 1e9:.0f} ns/pt, f = {f * 1e3:.1f} ms")
+        for workers in (2, 4, 8):
+            gain = a * (1 - 1 / workers) - c
+            crossover = f / gain if gain > 0 else float("inf")
+            print(f"  W = {workers}: crossover N* = {crossover:,.0f} points")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import importlib.util
+import pathlib
+import sys
+import warnings
+
+# 仓库根目录本身就是 AIPLPhMTools 包；从源码树直接运行测试时按包名注册一次
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if "AIPLPhMTools" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "AIPLPhMTools", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["AIPLPhMTools"] = module
+    spec.loader.exec_module(module)
+
+warnings.filterwarnings("ignore", category=UserWarning, module="gdsfactory")
@@ -0,0 +1,52 @@
+import gdsfactory as gf
+import pytest
+
+from AIPLPhMTools.FabBasic_hjh import BasicDefine
+
+
+@pytest.fixture
+def cell_cache():
+    BasicDefine.configure_cell_cache()
+    BasicDefine.clear_cell_cache()
+    yield
+    BasicDefine.configure_cell_cache()
+    BasicDefine.clear_cell_cache()
+
+
+@BasicDefine.canonical_cell
+@gf.cell
+def _wedge(width: float = 1, angle: float = 10) -> gf.Component:
+    c = gf.Component()
+    c.add_polygon([(0, 0), (10, 0), (10, width + angle / 100)], layer=(1, 0))
+    return c
+
+
+def test_only_length_parameters_are_rounded(cell_cache):
+    first = _wedge(width=1, angle=10)
+    # 长度差不到 1 DBU 视为同一单元；角度不取整，相差 0.0001° 也是不同的单元
+    assert _wedge(width=1.0002, angle=10) is first
+    assert _wedge(width=1, angle=10.0001) is not first
+    assert BasicDefine.cell_cache_info("_wedge")["hits"] == 1
+
+
+def test_callables_are_keyed_by_identity():
+    def make(slope):
+        def width(x):
+            return 1 + slope * x
+        return width
+
+    # 两个闭包的 __module__ / __qualname__ 相同，但行为不同
+    a, b = make(0.1), make(0.2)
+    assert BasicDefine.canonical_key(a) != BasicDefine.canonical_key(b)
+    assert BasicDefine.canonical_key(a) == BasicDefine.canonical_key(a)
+
+
+def test_cache_is_bounded_and_skips_destroyed(cell_cache):
+    BasicDefine.configure_cell_cache(maxsize=2)
+    cells = [_wedge(width=w) for w in (1, 2, 3)]
+    info = BasicDefine.cell_cache_info("_wedge")
+    assert info["size"] == 2 and info["evictions"] == 1
+    cells[2].delete()
+    assert BasicDefine.cell_cache_info("_wedge")["size"] == 1
+    rebuilt = _wedge(width=3)
+    assert not rebuilt.destroyed()
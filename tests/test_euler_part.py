@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from AIPLPhMTools.FabBasic_hjh.BasicDefine import euler_Bend_Part
+
+
+def _euler_part_loop(radius1, radius2, angle, p, npoints):
+    # 原先逐点累加的欧拉段积分，作为对照
+    alpha_euler = p * np.radians(abs(angle))
+    k1, k2 = 1.0 / radius1, 1.0 / radius2
+    s_total = 2 * alpha_euler / (k1 + k2)
+    ds = s_total / (npoints - 1)
+    xs, ys, cur_x, cur_y, cur_theta = [], [], 0.0, 0.0, 0.0
+    for i, s in enumerate(np.linspace(0.0, s_total, npoints)):
+        cur_theta += 0.0 if i == 0 else (k1 + (k2 - k1) * (s / s_total)) * ds
+        cur_x += ds * np.cos(cur_theta)
+        cur_y += ds * np.sin(cur_theta)
+        xs.append(cur_x)
+        ys.append(cur_y)
+    points = np.column_stack([xs, ys])
+    return points * (1, -1) if angle < 0 else points
+
+
+@pytest.mark.parametrize(("radius1", "radius2", "angle", "p", "npoints"), [
+    (100, 200, 90, 0.5, 600),
+    (1000, 2000, 60, 0.3, 4001),
+    (50, 20, -120, 0.5, 300),
+    (200, 400, 45, 1.0, 500),
+])
+def test_vectorized_euler_section_matches_loop(radius1, radius2, angle, p, npoints):
+    path = euler_Bend_Part(radius1, radius2, angle, p, npoints=npoints)
+    num_pts_euler = npoints if p == 1 else max(2, int(round(npoints * p)))
+    expected = _euler_part_loop(radius1, radius2, angle, p, num_pts_euler)
+    np.testing.assert_allclose(path.points[:num_pts_euler], expected, rtol=0, atol=1e-12)
+    # 起止切线角仍由首末两段弦给出
+    d0, d1 = path.points[1] - path.points[0], path.points[-1] - path.points[-2]
+    for actual, chord in ((path.start_angle, d0), (path.end_angle, d1)):
+        assert (actual - np.degrees(np.arctan2(chord[1], chord[0])) + 180) % 360 - 180 == pytest.approx(0, abs=1e-9)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from AIPLPhMTools.FabBasic_hjh import BasicDefine
+
+
+@pytest.fixture
+def templates():
+    # 不载入随包发布的模板，只看本测试生成的
+    BasicDefine.configure_euler_templates(bundled=False)
+    BasicDefine.clear_euler_templates()
+    yield
+    BasicDefine.configure_euler_templates()
+    BasicDefine.clear_euler_templates()
+
+
+def test_saved_templates_match_fresh_ones(templates, tmp_path):
+    filename = str(tmp_path / "templates.npz")
+    count = BasicDefine.build_euler_templates(angles=(20, 45), resolutions=(64, 256))
+    fresh = {key: entry for key, entry in BasicDefine._EULER_TEMPLATES.items()}
+    assert BasicDefine.save_euler_templates(filename) == count == 4
+    BasicDefine.clear_euler_templates()
+    assert BasicDefine.load_euler_templates(filename) == count
+    for key, (points, Reff, Rmin) in fresh.items():
+        loaded = BasicDefine._euler_unit_curve(*key)
+        np.testing.assert_array_equal(loaded[0], points)
+        assert loaded[1:] == (Reff, Rmin)
+    assert BasicDefine.euler_template_info()["misses"] == 0
+
+
+def test_bundled_templates_load_lazily_and_match_fresh_ones(templates):
+    BasicDefine.configure_euler_templates(bundled=True)
+    key = ("Backward", 45.0, 0.5, 256)
+    bundled = BasicDefine._euler_unit_curve(*key)
+    info = BasicDefine.euler_template_info()
+    assert info["loaded"] == info["size"] == 98 and info["hits"] == 1
+    BasicDefine.configure_euler_templates(bundled=False)
+    BasicDefine.clear_euler_templates()
+    fresh = BasicDefine._euler_unit_curve(*key)
+    np.testing.assert_array_equal(bundled[0], fresh[0])
+    assert bundled[1:] == fresh[1:]
+
+
+def test_scale_only_reuse_is_the_default(templates):
+    # 默认分辨率阶梯下，相近半径取到同一级点数，只需缩放同一模板
+    assert BasicDefine._euler_npoints(100, 45, None) == BasicDefine._euler_npoints(110, 45, None)
+    assert BasicDefine._euler_npoints(100, 45, None) in BasicDefine.EULER_TEMPLATE_RESOLUTIONS
@@ -0,0 +1,76 @@
+import gdsfactory as gf
+import pytest
+
+import AIPLPhMTools as A
+from AIPLPhMTools.FabBasic_hjh import BasicDefine
+
+SPILT = A.HeaterConfigClass(TypeHeater="spilt", WidthHeat=4, WidthRoute=10, DeltaHeat=10, GapHeat=3,
+                            WidthVia=0.5, Spacing=1.1, LayerHeat=(10, 0), LayerRoute=(4, 1), LayerVia=(70, 0))
+
+
+@pytest.fixture
+def snap_mode():
+    BasicDefine.configure_snap_at_source(False)
+    yield
+    BasicDefine.configure_snap_at_source(False)
+
+
+@BasicDefine.geometry_cell
+def _ramp_holder(width2: float = 1.0004) -> gf.Component:
+    # 外层单元本身不读取模式，几何随所含的 OffsetRamp 变化
+    c = gf.Component()
+    c << A.OffsetRamp(length=10, width1=1, width2=width2, offset=0.0004)
+    return c
+
+
+def _flat_region(component, layer=(1, 0)):
+    return gf.kdb.Region(component.kdb_cell.begin_shapes_rec(component.kcl.layer(*layer)))
+
+
+def test_snap_at_source_is_part_of_the_cell(snap_mode):
+    # 上边缘 0.5002 + 0.0004：事后取整为 501 DBU，snap-at-source 分别取整后为 500 DBU
+    off = _ramp_holder()
+    BasicDefine.configure_snap_at_source(True)
+    on = _ramp_holder()
+    assert on is not off and on.name != off.name
+    assert on.settings["GeometryMode"] == "snap"
+    assert not (_flat_region(on) ^ _flat_region(off)).is_empty()
+    BasicDefine.configure_snap_at_source(False)
+    assert _ramp_holder() is off
+    assert "GeometryMode" not in off.settings
+
+
+def test_canonical_cells_follow_the_mode(snap_mode):
+    path = gf.path.arc(radius=50, angle=90)
+    off = A.DifferentHeater(path, HeaterConfig=SPILT)
+    BasicDefine.configure_snap_at_source(True)
+    on = A.DifferentHeater(path, HeaterConfig=SPILT)
+    assert on is not off and on.name != off.name
+    BasicDefine.configure_snap_at_source(False)
+    assert A.DifferentHeater(path, HeaterConfig=SPILT) is off
+
+
+@pytest.fixture
+def sagitta():
+    BasicDefine.configure_sagitta_sampling(None)
+    yield
+    BasicDefine.configure_sagitta_sampling(None)
+
+
+def _vertex_count(component):
+    return sum(poly.num_points() for poly in _flat_region(component).each())
+
+
+def test_sagitta_tolerance_is_part_of_the_cell(sagitta):
+    dense = A.RingPulleyT1(RadiusRing=1000)
+    BasicDefine.configure_sagitta_sampling(0.001)
+    sparse = A.RingPulleyT1(RadiusRing=1000)
+    assert sparse is not dense and sparse.name != dense.name
+    assert _vertex_count(sparse) < _vertex_count(dense) / 4
+    # 容限不同也是不同的单元
+    BasicDefine.configure_sagitta_sampling(0.002)
+    assert A.RingPulleyT1(RadiusRing=1000) is not sparse
+    BasicDefine.configure_sagitta_sampling(0.001)
+    assert A.RingPulleyT1(RadiusRing=1000) is sparse
+    BasicDefine.configure_sagitta_sampling(None)
+    assert A.RingPulleyT1(RadiusRing=1000) is dense
@@ -0,0 +1,73 @@
+import gdsfactory as gf
+import numpy as np
+import pytest
+
+import AIPLPhMTools as A
+
+SPILT = A.HeaterConfigClass(TypeHeater="spilt", WidthHeat=4, WidthRoute=10, DeltaHeat=10, GapHeat=3,
+                            WidthVia=0.5, Spacing=1.1, LayerHeat=(10, 0), LayerRoute=(4, 1), LayerVia=(70, 0))
+DEFAULT = A.HeaterConfigClass(TypeHeater="default", WidthHeat=4, LayerHeat=(10, 0))
+LAYERS = ((10, 0), (4, 1), (70, 0))
+
+
+def _segments(radius):
+    # 与 RaceTrackP 相同的三段：圆弧 + 欧拉弯、反向圆弧 + 欧拉弯 + 直线、直线
+    run = gf.path.straight(length=60)
+    path1 = A.GfPathArc(radius=radius, angle=45) + A.euler_Bend_Half(radius=radius / 2, angle=45, p=0.5)
+    path2 = A.GfPathArc(radius=radius, angle=-70) + A.euler_Bend_Half(radius=radius, angle=-20, p=0.5) + run
+    return [path1, path2, run]
+
+
+def _per_segment(paths, config):
+    # 原先的做法：每段一个 DifferentHeater 引用，再逐段 connect，其中包含 60° 的旋转与镜像
+    c = gf.Component()
+    refs = [c << A.DifferentHeater(path, HeaterConfig=config) for path in paths]
+    refs[1].connect("HeatIn", other=refs[0].ports["HeatIn"])
+    refs[2].connect("HeatOut", other=refs[1].ports["HeatOut"], mirror=True)
+    refs[2].rotate(60, center=refs[1].ports["HeatOut"].center)
+    return c, refs
+
+
+def _xor_area(a, b, layer):
+    # 各段在不同坐标系中取整，边缘允许 1-2 DBU 的差异
+    return (a.get_region(layer) ^ b.get_region(layer)).sized(-2).area()
+
+
+@pytest.mark.parametrize("config", [SPILT, DEFAULT], ids=["spilt", "default"])
+def test_batch_placements_match_per_segment_refs(config):
+    paths = _segments(150)
+    reference, refs = _per_segment(paths, config)
+    placements = [None] + [(r.dcplx_trans.disp.x, r.dcplx_trans.disp.y, r.dcplx_trans.angle,
+                            r.dcplx_trans.is_mirror()) for r in refs[1:]]
+    batch = A.DifferentHeaterBatch(paths, HeaterConfig=config, placements=placements)
+    flat = reference.dup()
+    flat.flatten()
+    batch_flat = batch.dup()
+    batch_flat.flatten()
+    for layer in LAYERS:
+        assert batch_flat.get_region(layer).count() == flat.get_region(layer).count()
+        assert _xor_area(batch_flat, flat, layer) == 0
+    for port in batch.ports:
+        segment, name = port.name.split("_", 1)
+        expected = refs[int(segment[1:])].ports[name]
+        assert port.center == pytest.approx(expected.center, abs=2e-3)
+        assert port.orientation == pytest.approx(expected.orientation, abs=1e-6)
+
+
+def test_racetrack_spilt_vias_follow_segments():
+    config = SPILT
+    paths = _segments(150)
+    reference = gf.Component()
+    refs = [reference << A.DifferentHeater(path, HeaterConfig=config) for path in paths]
+    refs[1].connect("HeatIn", other=refs[0].ports["HeatIn"])
+    refs[2].connect("HeatOut", other=refs[1].ports["HeatOut"])
+    start = np.asarray(refs[0].ports["HeatIn"].center)
+    reference.flatten()
+    # RaceTrackP 按同样的 connect 规则算出各段摆放；过孔应与逐段放置的结果一致，而不是落在全局网格上
+    ring = A.RaceTrackP(RadiusRing=150, LengthRun=120, HeaterConfig=config, DirectionHeater="up").dup()
+    ring.flatten()
+    vias = ring.get_region((70, 0))
+    offset = (np.asarray(ring.ports["HeatBmid1"].center) - start) / ring.kcl.dbu
+    expected = reference.get_region((70, 0)).moved(*np.round(offset).astype(int).tolist())
+    assert vias.count() == expected.count()
+    assert (vias ^ expected).sized(-2).area() == 0
@@ -0,0 +1,118 @@
+import math
+
+import gdsfactory as gf
+import numpy as np
+import pytest
+
+import AIPLPhMTools as A
+
+LAYERS = dict(LayerHeat=(10, 0), LayerRoute=(4, 1), LayerVia=(70, 0))
+CONFIGS = {
+    "default": A.HeaterConfigClass(TypeHeater="default", WidthHeat=4, **LAYERS),
+    "side": A.HeaterConfigClass(TypeHeater="side", WidthHeat=3, DeltaHeat=4, **LAYERS),
+    "bothside": A.HeaterConfigClass(TypeHeater="bothside", WidthHeat=2, DeltaHeat=3, **LAYERS),
+    "multi": A.HeaterConfigClass(TypeHeater="multi", WidthHeat=(1.5, 2), DeltaHeat=(-3, 3), **LAYERS),
+    "snake": A.HeaterConfigClass(TypeHeater="snake", WidthHeat=4, GapHeat=2, **LAYERS),
+    "spilt": A.HeaterConfigClass(TypeHeater="spilt", WidthHeat=4, WidthRoute=10, DeltaHeat=10, GapHeat=3,
+                                 WidthVia=0.5, Spacing=1.1, **LAYERS),
+}
+# 与实际版图比较的容差：面积与方块数只差 DBU 取整和折线化误差
+AREA_RTOL = 1e-4
+SQUARES_RTOL = 1e-4
+
+
+def _curved_path():
+    return A.GfPathArc(radius=120, angle=50) + A.euler_Bend_Half(radius=80, angle=-40, p=0.5)
+
+
+def _straight_path():
+    return gf.path.straight(length=200)
+
+
+def _heat_region(path, config, WidthWG=1):
+    return A.DifferentHeater(path, WidthWG=WidthWG, HeaterConfig=config).get_region(config.LayerHeat)
+
+
+def _band_squares(region):
+    # 等宽条带：面积 = w L，周长 = 2 (L + w)，解出 w 后方块数为 L / w；各条带并联
+    conductance = 0
+    for poly in region.each():
+        area, half = poly.area() * 1e-6, poly.perimeter() * 1e-3 / 2
+        width = (half - math.sqrt(half ** 2 - 4 * area)) / 2
+        conductance += width ** 2 / area
+    return 1 / conductance
+
+
+def _sliced_squares(region, axis_values, dbu=1e-3):
+    # 沿 x 的直加热器：在相邻顶点横坐标之间宽度不变，逐段求 dx / w
+    xs = np.unique(axis_values)
+    squares = 0
+    for x0, x1 in zip(xs[:-1], xs[1:]):
+        mid = int(round((x0 + x1) / 2 / dbu))
+        probe = gf.kdb.Region(gf.kdb.Box(mid, -10 ** 6, mid + 1, 10 ** 6)) & region
+        width = probe.area()
+        if width:
+            squares += (x1 - x0) / (width * dbu)
+    return squares
+
+
+@pytest.mark.parametrize("kind", list(CONFIGS))
+def test_heater_area_matches_layout(kind):
+    path = _curved_path()
+    config = CONFIGS[kind]
+    metrics = A.heater_metrics(path, WidthWG=1, HeaterConfig=config)
+    area = _heat_region(path, config).area() * 1e-6
+    assert metrics["heater_area"] == pytest.approx(area, rel=AREA_RTOL)
+
+
+@pytest.mark.parametrize("kind", ["default", "side", "bothside", "multi"])
+def test_strip_squares_match_layout(kind):
+    path = _curved_path()
+    config = CONFIGS[kind]
+    metrics = A.heater_metrics(path, HeaterConfig=config, SheetResistance=20)
+    squares = _band_squares(_heat_region(path, config))
+    assert metrics["squares"] == pytest.approx(squares, rel=SQUARES_RTOL)
+    assert metrics["resistance"] == pytest.approx(20 * squares, rel=SQUARES_RTOL)
+
+
+def test_snake_squares_match_layout():
+    # 一维近似忽略切口处的横向电流，与逐段 dx / w 的积分一致
+    path = _straight_path()
+    config = CONFIGS["snake"]
+    region = _heat_region(path, config)
+    xs = [p.x * 1e-3 for poly in region.each() for p in poly.each_point_hull()]
+    metrics = A.heater_metrics(path, WidthWG=1, HeaterConfig=config)
+    assert metrics["squares"] == pytest.approx(_sliced_squares(region, xs), rel=SQUARES_RTOL)
+
+
+def test_spilt_squares_match_layout():
+    # 直路径上横档之间的加热条段经布线臂并联；横档位置由加热层中伸出加热条的部分读出
+    path = _straight_path()
+    config = CONFIGS["spilt"]
+    region = _heat_region(path, config)
+    outside = region & gf.kdb.Region(gf.kdb.Box(-10 ** 6, 2500, 10 ** 6, 3000))
+    outside += region & gf.kdb.Region(gf.kdb.Box(-10 ** 6, -3000, 10 ** 6, -2500))
+    boxes = sorted((b.left * 1e-3, b.right * 1e-3) for b in (poly.bbox() for poly in outside.each()))
+    gaps = np.array([b[0] - a[1] for a, b in zip(boxes[:-1], boxes[1:])])
+    squares = 1 / np.sum(config.WidthHeat / gaps[gaps > 0])
+    metrics = A.heater_metrics(path, HeaterConfig=config)
+    assert metrics["squares"] == pytest.approx(squares, rel=SQUARES_RTOL)
+
+
+@pytest.mark.parametrize("path", [_straight_path(), _curved_path(), gf.path.arc(radius=60, angle=-135)],
+                         ids=["straight", "curved", "arc"])
+def test_spilt_via_count_is_exact(path):
+    config = CONFIGS["spilt"]
+    built = A.DifferentHeater(path, HeaterConfig=config).dup()
+    built.flatten()
+    vias = built.get_region(config.LayerVia).count()
+    assert vias > 0
+    assert A.heater_metrics(path, HeaterConfig=config)["via_count"] == vias
+
+
+def test_non_spilt_heaters_have_no_vias():
+    path = _curved_path()
+    for kind in ("default", "side", "bothside", "multi", "snake"):
+        config = CONFIGS[kind]
+        assert A.heater_metrics(path, HeaterConfig=config)["via_count"] == 0
+        assert A.DifferentHeater(path, HeaterConfig=config).get_region(config.LayerVia).is_empty()
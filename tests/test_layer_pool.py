@@ -0,0 +1,85 @@
+import gdsfactory as gf
+import pytest
+
+from AIPLPhMTools.FabBasic_hjh import SnapMerge
+
+
+@pytest.fixture
+def eager_pool(monkeypatch):
+    # 两个工作进程、门限为 0：只剩任务本身决定是否并行；真正分发时记录下来而不启动进程
+    SnapMerge.configure_layer_pool(n_workers=2, min_points=0)
+    submitted = []
+
+    class Recorder:
+        def submit(self, fn, *args):
+            submitted.append(args[0])
+            raise RuntimeError("dispatched")
+
+    monkeypatch.setattr(SnapMerge, "_layer_pool", lambda: Recorder())
+    yield submitted
+    SnapMerge.configure_layer_pool()
+
+
+def _two_layers():
+    c = gf.Component()
+    c << gf.components.ring(radius=10, width=0.5, layer=(1, 0))
+    c << gf.components.ring(radius=12, width=0.5, layer=(2, 0))
+    return c
+
+
+def test_merge_backends_stay_serial(eager_pool):
+    merged = SnapMerge.merge_polygons_in_each_layer(_two_layers())
+    assert eager_pool == []
+    assert not merged.get_region((1, 0)).is_empty()
+
+
+def test_snap_task_uses_pool(eager_pool):
+    with pytest.raises(RuntimeError, match="dispatched"):
+        SnapMerge.snap_all_polygons_iteratively(_two_layers(), Flag=True)
+    assert eager_pool == [SnapMerge._snap_region]
+
+
+def test_registered_backend_can_opt_in(eager_pool):
+    SnapMerge.register_merge_backend("klayout_pooled", SnapMerge._merge_backend_klayout, parallel=True)
+    try:
+        with pytest.raises(RuntimeError, match="dispatched"):
+            SnapMerge.merge_polygons_in_each_layer(_two_layers(), backend="klayout_pooled")
+    finally:
+        SnapMerge.register_merge_backend("klayout_pooled", SnapMerge._merge_backend_klayout)
+        SnapMerge._MERGE_BACKENDS.pop("klayout_pooled")
+    assert eager_pool == [SnapMerge._merge_backend_klayout]
+
+
+def test_tiled_merge_parallel_matches_serial(monkeypatch):
+    # 在当前进程中同步执行的“进程池”：走并行分支的编码、提交、按序收集，结果应与串行分块和整层合并相同
+    from concurrent.futures import Future
+
+    class Inline:
+        def submit(self, fn, *args):
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+    SnapMerge.configure_layer_pool(n_workers=2)
+    monkeypatch.setattr(SnapMerge, "_layer_pool", lambda: Inline())
+    try:
+        # 输出组件按输入命名，每次合并用一个新的输入
+        whole = SnapMerge.merge_polygons_in_layer(_two_layers(), mergelayer=(1, 0)).get_region((1, 0))
+        serial = SnapMerge.merge_polygons_in_layer(_two_layers(), mergelayer=(1, 0), tile_size=5).get_region((1, 0))
+        report = SnapMerge.merge_layer_report()
+        parallel = SnapMerge.merge_polygons_in_layer(_two_layers(), mergelayer=(1, 0), tile_size=5,
+                                                     parallel=True).get_region((1, 0))
+    finally:
+        SnapMerge.configure_layer_pool()
+    assert (serial ^ whole).is_empty() and (parallel ^ whole).is_empty()
+    assert len(SnapMerge.merge_tile_report()) == 5 * 5 + 1  # 20.5 µm 见方，5 µm 一块
+    assert SnapMerge.merge_layer_report()[0]["polygons_in"] == report[0]["polygons_in"] > 0
+
+
+def test_merge_report_counts_shapes_without_flattening():
+    c = _two_layers()
+    c.add_polygon([(0, 0), (30, 0), (30, 1), (0, 1)], layer=(2, 0))
+    SnapMerge.merge_polygons_in_each_layer(c)
+    for row in SnapMerge.merge_layer_report():
+        assert (row["polygons_in"], row["vertices_in"]) == SnapMerge._region_stats(c.get_region(row["layer"]))
+        assert "process_peak_rss_mb" in row
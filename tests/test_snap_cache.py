@@ -0,0 +1,52 @@
+import os
+
+import gdsfactory as gf
+import pytest
+
+from AIPLPhMTools.FabBasic_hjh import SnapMerge
+
+
+@pytest.fixture
+def snap_cache(tmp_path):
+    yield tmp_path
+    SnapMerge.configure_snap_cache(maxsize=0, path=None)
+    SnapMerge.clear_snap_cache()
+
+
+def _ring(radius):
+    return gf.components.ring(radius=radius, width=0.5, layer=(1, 0))
+
+
+def test_disk_cache_respects_max_bytes(snap_cache):
+    # 每个条目约 2 kB，上限只够放下两个
+    SnapMerge.configure_snap_cache(maxsize=0, path=str(snap_cache), max_bytes=5_000)
+    for radius in (10, 11, 12, 13, 14, 15):
+        SnapMerge.snap_all_polygons_iteratively(_ring(radius), Flag=True)
+    info = SnapMerge.snap_cache_info()
+    on_disk = sum(entry.stat().st_size for entry in os.scandir(snap_cache))
+    assert info["evictions"] > 0
+    assert info["disk_bytes"] == on_disk <= 5_000
+
+
+def test_disk_cache_put_does_not_rescan(snap_cache, monkeypatch):
+    SnapMerge.configure_snap_cache(maxsize=0, path=str(snap_cache), max_bytes=1 << 30)
+    SnapMerge.snap_all_polygons_iteratively(_ring(20), Flag=True)
+    calls = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, "scandir", lambda path: calls.append(path) or scandir(path))
+    for radius in (21, 22, 23):
+        SnapMerge.snap_all_polygons_iteratively(_ring(radius), Flag=True)
+    assert calls == []
+    # 新进程 (重新配置) 扫描一次后得到同样的总大小
+    before = SnapMerge.snap_cache_info()["disk_bytes"]
+    SnapMerge.configure_snap_cache(maxsize=0, path=str(snap_cache), max_bytes=1 << 30)
+    assert SnapMerge.snap_cache_info()["disk_bytes"] == before
+    assert len(calls) == 1
+
+
+def test_disk_cache_hit_reproduces_result(snap_cache):
+    SnapMerge.configure_snap_cache(maxsize=0, path=str(snap_cache))
+    first = SnapMerge.snap_all_polygons_iteratively(_ring(30), Flag=True)
+    second = SnapMerge.snap_all_polygons_iteratively(_ring(30).dup(), Flag=True)
+    assert SnapMerge.snap_cache_info()["disk_hits"] > 0
+    assert (first.get_region((1, 0)) ^ second.get_region((1, 0))).is_empty()
@@ -0,0 +1,22 @@
+import numpy as np
+
+from AIPLPhMTools.FabBasic_hjh.SnapMerge import snap_polygon_vertices
+
+
+def test_on_grid_input_is_copied():
+    points = np.array([[0.0, 0.0], [1.5, 0.25], [2.001, -3.0]])
+    snapped = snap_polygon_vertices(points, 0.001)
+    assert snapped is not points
+    np.testing.assert_array_equal(snapped, points)
+    snapped[0] = 99
+    assert points[0, 0] == 0
+
+
+def test_off_grid_input_is_snapped_without_touching_input():
+    points = np.array([[0.0004, 0.0], [1.0006, 2.0]])
+    original = points.copy()
+    snapped = snap_polygon_vertices(points, 0.001)
+    np.testing.assert_allclose(snapped, [[0.0, 0.0], [1.001, 2.0]])
+    np.testing.assert_array_equal(points, original)
+    # 列表输入同样返回数组
+    np.testing.assert_array_equal(snap_polygon_vertices([[1.0, 2.0]], 0.001), [[1.0, 2.0]])
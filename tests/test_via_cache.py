@@ -0,0 +1,64 @@
+import os
+
+import gdsfactory as gf
+import numpy as np
+import pytest
+
+import AIPLPhMTools as A
+from AIPLPhMTools.FabBasic_hjh import Heater
+
+SPILT = A.HeaterConfigClass(TypeHeater="spilt", WidthHeat=4, WidthRoute=10, DeltaHeat=10, GapHeat=3,
+                            WidthVia=0.5, Spacing=1.1, LayerHeat=(10, 0), LayerRoute=(4, 1), LayerVia=(70, 0))
+
+
+@pytest.fixture
+def via_cache():
+    Heater.configure_via_cache(maxsize=256)
+    Heater.clear_via_cache()
+    yield
+    Heater.configure_via_cache(maxsize=256, path=None)
+    Heater.clear_via_cache()
+
+
+def _translated(path, offset):
+    # Path.move 会按首尾线段重新计算 start_angle/end_angle，这里只平移点列，保持几何完全相同
+    moved = path.copy()
+    moved.points = moved.points + np.asarray(offset)
+    return moved
+
+
+def _via_centers(component, layer=(70, 0)):
+    boxes = [poly.bbox() for poly in component.get_region(layer).each()]
+    return np.array(sorted((b.center().x, b.center().y) for b in boxes))
+
+
+def test_spilt_heater_uses_via_cache(via_cache):
+    path = gf.path.arc(radius=150, angle=90)
+    first = A.DifferentHeater(path, HeaterConfig=SPILT)
+    assert Heater.via_cache_info()["misses"] == 1
+    # 平移整数 DBU 的同一路径命中缓存，过孔与直接计算的结果一致
+    moved = A.DifferentHeater(_translated(path, (123.456, -78.9)), HeaterConfig=SPILT)
+    assert Heater.via_cache_info()["hits"] == 1
+    shift = np.array([123456, -78900])
+    np.testing.assert_array_equal(_via_centers(moved), _via_centers(first) + shift)
+    Heater.configure_via_cache(maxsize=0)
+    direct = A.DifferentHeater(_translated(path, (123.456, -78.899)), HeaterConfig=SPILT)
+    np.testing.assert_array_equal(_via_centers(direct), _via_centers(first) + shift + [0, 1])
+
+
+def test_spilt_heater_enclosure_is_configurable(via_cache, monkeypatch):
+    path = gf.path.arc(radius=160, angle=90)
+    default = A.DifferentHeater(path, HeaterConfig=SPILT)
+    monkeypatch.setattr(Heater, "_SPILT_VIA_ENCLOSURE", 3)
+    wider = A.DifferentHeater(_translated(path, (0, 1)), HeaterConfig=SPILT)
+    assert 0 < len(_via_centers(wider)) < len(_via_centers(default))
+
+
+def test_via_disk_cache_respects_max_bytes(via_cache, tmp_path):
+    Heater.configure_via_cache(maxsize=256, path=str(tmp_path), max_bytes=1_000)
+    for width in (20, 21, 22, 23, 24, 25):
+        A.ViaArray(gf.components.rectangle(size=(width, 10), layer=(10, 0)), arraylayer=(10, 0))
+    info = Heater.via_cache_info()
+    on_disk = sum(entry.stat().st_size for entry in os.scandir(tmp_path))
+    assert info["evictions"] > 0
+    assert info["disk_bytes"] == on_disk <= 1_000
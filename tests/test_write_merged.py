@@ -0,0 +1,86 @@
+import gdsfactory as gf
+import pytest
+
+from AIPLPhMTools.FabBasic_hjh.SnapMerge import write_merged
+
+LAYERS = [(1, 0), (10, 0)]
+UNLISTED = (63, 7)
+
+
+def _design():
+    kdb = gf.kdb
+    child = gf.Component()
+    layout = child.kdb_cell.layout()
+    wg, metal = (layout.layer(*layer) for layer in LAYERS)
+    # 两个重叠的矩形合并为一个；带属性的矩形只与属性相同的形状合并
+    child.kdb_cell.shapes(wg).insert(kdb.Box(0, 0, 2000, 500))
+    child.kdb_cell.shapes(wg).insert(kdb.Box(1500, 0, 4000, 500))
+    net = layout.properties_id({1: "net_a"})
+    child.kdb_cell.shapes(metal).insert(kdb.Box(0, 1000, 1000, 2000), net)
+    child.kdb_cell.shapes(metal).insert(kdb.Box(500, 1000, 3000, 2000), net)
+    child.kdb_cell.shapes(metal).insert(kdb.Box(2500, 1500, 3500, 3000))
+    label = kdb.Text("pad", kdb.Trans(100, 200))
+    label.halign, label.valign, label.size = kdb.HAlign.HAlignCenter, kdb.VAlign.VAlignTop, 300
+    child.kdb_cell.shapes(metal).insert(label)
+    child.kdb_cell.shapes(layout.layer(*UNLISTED)).insert(kdb.Box(0, 0, 100, 100))
+
+    top = gf.Component()
+    top.kdb_cell.insert(kdb.CellInstArray(child.kdb_cell.cell_index(), kdb.Trans(0, 0),
+                                          kdb.Vector(5000, 0), kdb.Vector(0, 4000), 3, 2))
+    rotated = kdb.CellInstArray(child.kdb_cell.cell_index(), kdb.Trans(kdb.Trans.R90, 20000, 0))
+    top.kdb_cell.insert(rotated, layout.properties_id({2: "rotated"}))
+    # 镜像、放大、任意角度的实例
+    top.kdb_cell.insert(kdb.CellInstArray(child.kdb_cell.cell_index(), kdb.ICplxTrans(2, 30, True, -8000, 6000)))
+    return top, child
+
+
+def _flat_region(layout, cell, layer):
+    return gf.kdb.Region(cell.begin_shapes_rec(layout.layer(*layer)))
+
+
+@pytest.mark.parametrize("suffix", [".gds", ".oas"])
+def test_write_merged_round_trip(tmp_path, suffix):
+    top, child = _design()
+    filename = str(tmp_path / f"design{suffix}")
+    with pytest.warns(UserWarning, match="63"):
+        write_merged(top, filename, layers=LAYERS)
+
+    read = gf.kdb.Layout()
+    read.read(filename)
+    read_top = read.cell(top.name)
+    read_child = read.cell(child.name)
+    source = top.kdb_cell.layout()
+    for layer in LAYERS:
+        assert (_flat_region(read, read_top, layer) ^ _flat_region(source, top.kdb_cell, layer)).is_empty()
+    assert read.find_layer(*UNLISTED) is None
+
+    # 层级与阵列保留，每个单元只合并自身的形状
+    insts = sorted((inst.is_regular_array(), inst.size(), inst.prop_id != 0) for inst in read_top.each_inst())
+    assert insts == [(False, 1, False), (False, 1, True), (True, 6, False)]
+    skewed = next(inst for inst in read_top.each_inst() if inst.is_complex())
+    assert skewed.cplx_trans == gf.kdb.ICplxTrans(2, 30, True, -8000, 6000)
+    rotated = next(inst for inst in read_top.each_inst() if inst.prop_id)
+    assert dict(read.properties(rotated.prop_id)) == {2: "rotated"}
+    assert read_child.shapes(read.layer(1, 0)).size() == 1
+
+    metal = read_child.shapes(read.layer(10, 0))
+    polygons = list(metal.each(gf.kdb.Shapes.SRegions))
+    assert len(polygons) == 2
+    nets = sorted(str(dict(read.properties(s.prop_id)).get(1)) for s in polygons)
+    assert nets == ["None", "net_a"]
+    (text,) = list(metal.each(gf.kdb.Shapes.STexts))
+    assert text.text.string == "pad"
+    if suffix == ".oas":
+        return  # OASIS 不记录文字的对齐与字号
+    assert text.text.halign == gf.kdb.HAlign.HAlignCenter
+    assert text.text.valign == gf.kdb.VAlign.VAlignTop
+    assert text.text.size == 300
+
+
+def test_write_merged_leaves_input_untouched(tmp_path):
+    top, child = _design()
+    layout = child.kdb_cell.layout()
+    before = child.kdb_cell.shapes(layout.layer(1, 0)).size()
+    with pytest.warns(UserWarning):
+        write_merged(top, str(tmp_path / "design.gds"), layers=LAYERS)
+    assert child.kdb_cell.shapes(layout.layer(1, 0)).size() == before == 2